@@ -0,0 +1,9 @@
+# Unity builds compile the source files of a batch as one translation unit.
+# The batches are written by scripts/cpp/unity_build.py generate, from the compile_commands.json of a regular build.
+set(RTS_UNITY_BATCHES "${CMAKE_SOURCE_DIR}/cmake/unity-batches.cmake" CACHE FILEPATH "Unity batches written by scripts/cpp/unity_build.py")
+
+if(EXISTS "${RTS_UNITY_BATCHES}")
+    include("${RTS_UNITY_BATCHES}")
+else()
+    message(WARNING "RTS_BUILD_OPTION_UNITY is ON, but ${RTS_UNITY_BATCHES} does not exist. Generate it with scripts/cpp/unity_build.py generate.")
+endif()
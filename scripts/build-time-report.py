@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# Copyright 2026 TheSuperHackers
+#
+# This file is part of Command & Conquer: Generals and Command & Conquer: Zero Hour.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Build time report for Ninja builds.
+
+This script shows where the build time goes by:
+- Parsing .ninja_log of one or more builds, and averaging the last runs of each log.
+- Reporting the wall time and the slowest targets, source directories and translation units.
+- Finding the critical path through the build graph of build.ninja (or estimating it from the log).
+- Aggregating clang -ftime-trace files: frontend/backend time per translation unit and the time spent
+  parsing each header, over all translation units.
+- Comparing two builds and flagging the steps that became slower.
+
+Any Ninja preset works, for example:
+  cmake --preset win32
+  cmake --build build/win32
+
+For header parse times, build with clang and -ftime-trace:
+  cmake -B build/trace -G Ninja -DCMAKE_CXX_COMPILER=clang++ -DCMAKE_CXX_FLAGS=-ftime-trace
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from typing import NamedTuple
+
+CONFIG_NAMES = {"Debug", "Release", "RelWithDebInfo", "MinSizeRel"}
+
+RE_OBJECT = re.compile(r'^(?:(?P<dir>.*?)/)?CMakeFiles/(?P<target>[^/]+)\.dir/(?P<source>.*)\.(?:o|obj)$')
+RE_NINJA_BUILD = re.compile(r'^build\s+(.*?)(?<!\$):\s*(\S+)(.*)$')
+RE_NINJA_INCLUDE = re.compile(r'^(?:include|subninja)\s+(.+)$')
+
+
+class LogEntry(NamedTuple):
+    start: int      # Milliseconds since the start of the build
+    end: int
+    output: str
+
+
+class BuildTimes(NamedTuple):
+    durations: dict         # output -> milliseconds, averaged over the runs
+    wallTimes: list         # wall time of each run in milliseconds
+    lastRun: list           # entries of the last run, for the timeline based critical path estimate
+
+
+class OutputInfo(NamedTuple):
+    target: str
+    source: str             # Source file of an object file, relative to the build's source folder, or ""
+
+
+# .ninja_log
+
+def parse_ninja_log(path: str) -> list[list[LogEntry]]:
+    """
+    Returns the runs recorded in a .ninja_log. Every run lists the last entry of each output.
+    Ninja appends to the log on every build, with times relative to the start of that build. Entries are
+    written in the order the commands finish, so start times go back in any parallel build, but end times only
+    go back to a lower value where a new run begins.
+    """
+    runs: list[dict[str, LogEntry]] = []
+    current: dict[str, LogEntry] = {}
+    lastEnd = -1
+    with open(path, 'r', encoding="utf-8", errors="replace") as file:
+        for line in file:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 4:
+                continue
+            start, end, output = int(fields[0]), int(fields[1]), fields[3]
+            if end < lastEnd and current:
+                runs.append(current)
+                current = {}
+            lastEnd = end
+            current[output] = LogEntry(start, end, output)
+    if current:
+        runs.append(current)
+    return [sorted(run.values(), key=lambda entry: entry.start) for run in runs]
+
+
+def find_ninja_log(path: str) -> str:
+    if os.path.isdir(path):
+        path = os.path.join(path, ".ninja_log")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f".ninja_log not found: {path}")
+    return path
+
+
+def load_build_times(logPaths: list[str], lastRuns: int) -> BuildTimes:
+    """
+    Returns the mean duration of every output over the last runs of the given logs.
+    """
+    samples: dict[str, list[int]] = {}
+    wallTimes = []
+    lastRun: list[LogEntry] = []
+    for logPath in logPaths:
+        runs = parse_ninja_log(find_ninja_log(logPath))[-lastRuns:]
+        for run in runs:
+            if not run:
+                continue
+            wallTimes.append(max(entry.end for entry in run) - min(entry.start for entry in run))
+            for entry in run:
+                samples.setdefault(entry.output, []).append(entry.end - entry.start)
+        if runs:
+            lastRun = runs[-1]
+    durations = {output: statistics.fmean(values) for output, values in samples.items()}
+    return BuildTimes(durations, wallTimes, lastRun)
+
+
+def describe_output(output: str) -> OutputInfo:
+    """
+    Returns the target and the source file of a build output, derived from the object file layout of CMake:
+    <dir>/CMakeFiles/<target>.dir/[<config>/]<source path>.obj, where ../ in the source path is written as __/
+    """
+    match = RE_OBJECT.match(output.replace("\\", "/"))
+    if match is None:
+        return OutputInfo(os.path.basename(output), "")
+    parts = match.group("source").split("/")
+    if len(parts) > 1 and parts[0] in CONFIG_NAMES:
+        parts = parts[1:]
+    parts = [".." if part == "__" else part for part in parts]
+    source = os.path.normpath(os.path.join(match.group("dir") or "", *parts)).replace(os.sep, "/")
+    return OutputInfo(match.group("target"), source)
+
+
+# build.ninja
+
+def _split_ninja_paths(text: str) -> list[str]:
+    paths = []
+    for path in re.split(r'(?<!\$) +', text.strip()):
+        if path:
+            paths.append(path.replace("$ ", " ").replace("$:", ":").replace("$$", "$"))
+    return paths
+
+
+def parse_build_ninja(path: str, deps: dict[str, list[str]] | None = None) -> dict[str, list[str]]:
+    """
+    Returns output -> inputs (explicit, implicit and order-only) of all build statements of a build.ninja
+    and the files it includes.
+    """
+    if deps is None:
+        deps = {}
+    folder = os.path.dirname(path)
+    with open(path, 'r', encoding="utf-8", errors="replace") as file:
+        lines = file.read().replace("$\n", "").splitlines()
+    for line in lines:
+        match = RE_NINJA_BUILD.match(line)
+        if match is not None:
+            outputs = _split_ninja_paths(match.group(1).replace("|", " "))
+            inputs = _split_ninja_paths(match.group(3).replace("||", " ").replace("|", " "))
+            for output in outputs:
+                deps.setdefault(output, []).extend(inputs)
+            continue
+        match = RE_NINJA_INCLUDE.match(line)
+        if match is not None:
+            included = os.path.join(folder, match.group(1).strip())
+            if os.path.isfile(included):
+                parse_build_ninja(included, deps)
+    return deps
+
+
+def critical_path(durations: dict[str, float], deps: dict[str, list[str]]) -> list[tuple[str, float]]:
+    """
+    Returns the chain of outputs with the highest total duration through the dependency graph.
+    Outputs without a logged duration, like phony targets and source files, count as 0.
+    """
+    best: dict[str, tuple[float, str | None]] = {}
+
+    for root in durations:
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in best:
+                continue
+            inputs = deps.get(node, ())
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((dep, False) for dep in inputs if dep not in best)
+                continue
+            bestInput = max(inputs, key=lambda dep: best.get(dep, (0.0, None))[0], default=None)
+            inputTime = best.get(bestInput, (0.0, None))[0] if bestInput is not None else 0.0
+            best[node] = (inputTime + durations.get(node, 0.0), bestInput)
+
+    if not best:
+        return []
+    node = max(durations, key=lambda output: best[output][0])
+    chain = []
+    while node is not None:
+        if node in durations:
+            chain.append((node, durations[node]))
+        node = best[node][1]
+    return chain[::-1]
+
+
+def estimate_critical_path(run: list[LogEntry]) -> list[tuple[str, float]]:
+    """
+    Estimates the critical path from the timeline alone: starting with the last step to finish, the step
+    that finished last before a step started is taken as the one it waited for.
+    """
+    if not run:
+        return []
+    byEnd = sorted(run, key=lambda entry: entry.end)
+    entry = byEnd[-1]
+    chain = [entry]
+    while True:
+        previous = [e for e in byEnd if e.end <= entry.start]
+        if not previous:
+            break
+        entry = previous[-1]
+        chain.append(entry)
+    return [(e.output, float(e.end - e.start)) for e in reversed(chain)]
+
+
+# -ftime-trace
+
+def find_time_traces(folder: str) -> list[str]:
+    traces = []
+    for subdir, _, files in os.walk(folder):
+        for file in files:
+            if file.endswith(".json") and file != "compile_commands.json":
+                traces.append(os.path.join(subdir, file))
+    return sorted(traces)
+
+
+def parse_time_trace(path: str) -> tuple[dict[str, float], dict[str, list[float]]] | None:
+    """
+    Returns (totals, headers) of a clang -ftime-trace file, or None if the file is not a time trace.
+    totals maps the names of the "Total ..." events (for example "Frontend") to milliseconds.
+    headers maps every parsed file to [count, inclusive milliseconds, exclusive milliseconds].
+    """
+    try:
+        with open(path, 'r', encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict) or "traceEvents" not in data:
+        return None
+
+    totals: dict[str, float] = {}
+    sources = []
+    for event in data["traceEvents"]:
+        if event.get("ph") != "X":
+            continue
+        name = event.get("name", "")
+        if name.startswith("Total "):
+            name = name[len("Total "):]
+            totals[name] = totals.get(name, 0.0) + event.get("dur", 0) / 1000.0
+        elif name == "Source":
+            detail = event.get("args", {}).get("detail", "")
+            sources.append([event.get("tid", 0), event.get("ts", 0), event.get("dur", 0), detail, event.get("dur", 0)])
+
+    # Nested includes are nested events. Subtract the children from their parent to get its exclusive time.
+    sources.sort(key=lambda source: (source[0], source[1], -source[2]))
+    stack: list[list] = []
+    for source in sources:
+        tid, ts, dur = source[0], source[1], source[2]
+        while stack and (stack[-1][0] != tid or stack[-1][1] + stack[-1][2] <= ts):
+            stack.pop()
+        if stack:
+            stack[-1][4] -= dur
+        stack.append(source)
+
+    headers: dict[str, list[float]] = {}
+    for _, _, dur, detail, exclusive in sources:
+        stats = headers.setdefault(os.path.normpath(detail), [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += dur / 1000.0
+        stats[2] += exclusive / 1000.0
+    return totals, headers
+
+
+class TraceSummary(NamedTuple):
+    units: dict         # trace file -> totals
+    headers: dict       # header -> [count, inclusive ms, exclusive ms] over all traces
+
+
+def load_time_traces(folders: list[str]) -> TraceSummary:
+    units: dict[str, dict[str, float]] = {}
+    headers: dict[str, list[float]] = {}
+    for folder in folders:
+        for path in find_time_traces(folder):
+            result = parse_time_trace(path)
+            if result is None:
+                continue
+            totals, fileHeaders = result
+            units[path] = totals
+            for header, stats in fileHeaders.items():
+                total = headers.setdefault(header, [0, 0.0, 0.0])
+                for index in range(3):
+                    total[index] += stats[index]
+    return TraceSummary(units, headers)
+
+
+# Reports
+
+class BuildSummary(NamedTuple):
+    wallTime: float                 # Mean wall time of the runs in milliseconds
+    runs: int
+    durations: dict                 # output -> milliseconds
+    criticalPath: list              # [output, milliseconds]
+    criticalPathExact: bool         # False if estimated from the timeline
+    headers: dict                   # header -> [count, inclusive ms, exclusive ms]
+    units: dict                     # trace file -> totals
+
+
+def summarize(logPaths: list[str], runs: int, traceFolders: list[str], tracesInBuild: bool) -> BuildSummary:
+    times = load_build_times(logPaths, runs)
+    deps: dict[str, list[str]] = {}
+    for logPath in logPaths:
+        buildNinja = os.path.join(os.path.dirname(find_ninja_log(logPath)), "build.ninja")
+        if os.path.isfile(buildNinja):
+            parse_build_ninja(buildNinja, deps)
+    if deps:
+        path = critical_path(times.durations, deps)
+    else:
+        path = estimate_critical_path(times.lastRun)
+
+    traceFolders = list(traceFolders)
+    if tracesInBuild:
+        traceFolders.extend(os.path.dirname(find_ninja_log(logPath)) for logPath in logPaths)
+    traces = load_time_traces(traceFolders) if traceFolders else TraceSummary({}, {})
+
+    wallTime = statistics.fmean(times.wallTimes) if times.wallTimes else 0.0
+    return BuildSummary(wallTime, len(times.wallTimes), times.durations, [list(step) for step in path], bool(deps),
+                        traces.headers, traces.units)
+
+
+def load_summary(path: str, args) -> BuildSummary:
+    """
+    Returns the summary of a JSON report written with --json, or of a build folder or .ninja_log.
+    """
+    if path.endswith(".json") and os.path.isfile(path):
+        with open(path, 'r', encoding="utf-8") as file:
+            return BuildSummary(**json.load(file))
+    return summarize([path], args.runs, [], args.traces_in_build)
+
+
+def format_time(ms: float) -> str:
+    if abs(ms) >= 60000:
+        return f"{ms / 60000:.1f}m"
+    if abs(ms) >= 1000:
+        return f"{ms / 1000:.1f}s"
+    return f"{ms:.0f}ms"
+
+
+def group_durations(durations: dict[str, float], key) -> list[tuple[str, float, int]]:
+    groups: dict[str, list[float]] = {}
+    for output, duration in durations.items():
+        name = key(output)
+        if name is not None:
+            groups.setdefault(name, []).append(duration)
+    rows = [(name, sum(values), len(values)) for name, values in groups.items()]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def source_dir(output: str) -> str | None:
+    source = describe_output(output).source
+    return os.path.dirname(source) if source else None
+
+
+def source_file(output: str) -> str | None:
+    return describe_output(output).source or None
+
+
+def print_table(title: str, rows: list[tuple[str, float, int]], top: int, totalTime: float) -> None:
+    print(f"\n{title}")
+    print(f"{'Time':>9}  {'Share':>6}  {'Steps':>5}  Name")
+    for name, duration, count in rows[:top]:
+        share = 100.0 * duration / totalTime if totalTime else 0.0
+        print(f"{format_time(duration):>9}  {share:5.1f}%  {count:>5}  {name}")
+
+
+def print_report(summary: BuildSummary, top: int) -> None:
+    totalTime = sum(summary.durations.values())
+    parallelism = totalTime / summary.wallTime if summary.wallTime else 0.0
+    print(f"Runs: {summary.runs}, wall time: {format_time(summary.wallTime)}, "
+          f"sum of step times: {format_time(totalTime)}, average parallelism: {parallelism:.1f}")
+
+    print_table("Targets", group_durations(summary.durations, lambda output: describe_output(output).target), top, totalTime)
+    print_table("Source directories", group_durations(summary.durations, source_dir), top, totalTime)
+    print_table("Translation units", group_durations(summary.durations, source_file), top, totalTime)
+
+    kind = "from build.ninja" if summary.criticalPathExact else "estimated from the timeline"
+    pathTime = sum(duration for _, duration in summary.criticalPath)
+    print(f"\nCritical path ({kind}): {format_time(pathTime)} in {len(summary.criticalPath)} step(s)")
+    for output, duration in summary.criticalPath:
+        print(f"{format_time(duration):>9}  {output}")
+
+    if summary.units:
+        frontend = sum(totals.get("Frontend", 0.0) for totals in summary.units.values())
+        backend = sum(totals.get("Backend", 0.0) for totals in summary.units.values())
+        print(f"\nTime traces: {len(summary.units)}, frontend: {format_time(frontend)}, backend: {format_time(backend)}")
+        units = sorted(summary.units.items(), key=lambda item: item[1].get("ExecuteCompiler", 0.0), reverse=True)
+        print(f"{'Total':>9}  {'Frontend':>9}  {'Backend':>9}  Trace")
+        for path, totals in units[:top]:
+            print(f"{format_time(totals.get('ExecuteCompiler', 0.0)):>9}  {format_time(totals.get('Frontend', 0.0)):>9}  "
+                  f"{format_time(totals.get('Backend', 0.0)):>9}  {path}")
+
+    if summary.headers:
+        print("\nHeader parse time over all translation units (inclusive = with the headers it includes)")
+        print(f"{'Inclusive':>9}  {'Exclusive':>9}  {'Count':>5}  Header")
+        headers = sorted(summary.headers.items(), key=lambda item: item[1][1], reverse=True)
+        for header, (count, inclusive, exclusive) in headers[:top]:
+            print(f"{format_time(inclusive):>9}  {format_time(exclusive):>9}  {count:>5}  {header}")
+
+
+def print_diff(old: BuildSummary, new: BuildSummary, top: int, threshold: float, minDelta: float) -> int:
+    """
+    Prints the steps that became slower or faster. Returns the number of regressions.
+    """
+    print(f"Wall time: {format_time(old.wallTime)} -> {format_time(new.wallTime)} ({format_time(new.wallTime - old.wallTime)})")
+    oldPath = sum(duration for _, duration in old.criticalPath)
+    newPath = sum(duration for _, duration in new.criticalPath)
+    print(f"Critical path: {format_time(oldPath)} -> {format_time(newPath)} ({format_time(newPath - oldPath)})")
+
+    def compare(title: str, before: dict[str, float], after: dict[str, float]) -> int:
+        rows = []
+        for name in before.keys() | after.keys():
+            b = before.get(name, 0.0)
+            a = after.get(name, 0.0)
+            delta = a - b
+            if abs(delta) >= minDelta and (b == 0.0 or abs(delta) / b >= threshold):
+                rows.append((name, b, a, delta))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        regressions = [row for row in rows if row[3] > 0]
+        improvements = [row for row in rows if row[3] < 0][::-1]
+        print(f"\n{title}: {len(regressions)} regression(s), {len(improvements)} improvement(s)")
+        for name, b, a, delta in regressions[:top] + improvements[:top]:
+            marker = "REGRESSION" if delta > 0 else "improved"
+            print(f"{format_time(b):>9} -> {format_time(a):>9}  {'+' if delta > 0 else ''}{format_time(delta):>8}  {marker:<10}  {name}")
+        return len(regressions)
+
+    regressions = compare("Steps", old.durations, new.durations)
+    targets = lambda durations: {name: time for name, time, _ in group_durations(durations, lambda output: describe_output(output).target)}
+    compare("Targets", targets(old.durations), targets(new.durations))
+    if old.headers and new.headers:
+        compare("Header parse time", {h: s[1] for h, s in old.headers.items()}, {h: s[1] for h, s in new.headers.items()})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report where the build time of Ninja builds goes.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Report of the last build
+  python scripts/build-time-report.py report build/win32
+
+  # Average the last 3 runs and include the -ftime-trace files of the build
+  python scripts/build-time-report.py report build/trace --runs 3 --traces-in-build
+
+  # Save a report and compare a later build against it
+  python scripts/build-time-report.py report build/win32 --json before.json
+  python scripts/build-time-report.py diff before.json build/win32
+        """
+    )
+    # Options of both commands, accepted after the command name
+    commonParser = argparse.ArgumentParser(add_help=False)
+    commonParser.add_argument("--top", type=int, default=20, help="Number of rows per table (default: 20)")
+    commonParser.add_argument("--runs", type=int, default=1, help="Number of the last runs of each log to average (default: 1)")
+    commonParser.add_argument("--traces-in-build", action="store_true",
+                              help="Also read the -ftime-trace files in the build folders")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reportParser = subparsers.add_parser("report", parents=[commonParser], help="Report the build time of one or more builds")
+    reportParser.add_argument("logs", nargs="+", metavar="BUILD", help="Build folder or .ninja_log")
+    reportParser.add_argument("--time-trace", action="append", default=[], metavar="DIR",
+                              help="Folder with -ftime-trace files. Can be given more than once")
+    reportParser.add_argument("--json", metavar="FILE", help="Also write the report to FILE, for a later diff")
+
+    diffParser = subparsers.add_parser("diff", parents=[commonParser], help="Compare two builds and flag regressions")
+    diffParser.add_argument("old", help="Build folder, .ninja_log or report written with --json")
+    diffParser.add_argument("new", help="Build folder, .ninja_log or report written with --json")
+    diffParser.add_argument("--threshold", type=float, default=0.1,
+                            help="Relative change to report (default: 0.1 for 10%%)")
+    diffParser.add_argument("--min-delta", type=float, default=500.0,
+                            help="Absolute change in milliseconds to report (default: 500)")
+    diffParser.add_argument("--fail-on-regression", action="store_true",
+                            help="Exit with code 1 if any step became slower")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "report":
+            summary = summarize(args.logs, args.runs, args.time_trace, args.traces_in_build)
+            print_report(summary, args.top)
+            if args.json:
+                with open(args.json, 'w', encoding="utf-8") as file:
+                    json.dump(summary._asdict(), file, indent=1, sort_keys=True)
+
+        elif args.command == "diff":
+            old = load_summary(args.old, args)
+            new = load_summary(args.new, args)
+            regressions = print_diff(old, new, args.top, args.threshold, args.min_delta)
+            if args.fail_on_regression and regressions:
+                sys.exit(1)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+
+"""
+Fixture based tests for the GeneralsGameCode clang-tidy checks.
+
+Each fixture is a C++ file that is run through clang-tidy with the plugin loaded, in the manner of LLVM's
+check_clang_tidy.py. The first line names the check:
+  // RUN: %check_clang_tidy %s generals-use-is-empty %t
+As in LLVM, "-- <clang-tidy arguments> -- <compiler arguments>" may follow %t. The default standard is -std=c++20.
+
+Expectations are comments below the code they refer to:
+  // CHECK-MESSAGES: :[[@LINE-1]]:7: warning: use str.isEmpty() instead of comparing getLength() with 0
+  // CHECK-FIXES: if (str.isEmpty()) {}
+CHECK-MESSAGES must be found in the diagnostics, and every warning or error of the fixture must be expected.
+CHECK-FIXES must be found, in order, in the lines of the fixed file without the CHECK comments.
+Both match part of a line. [[@LINE]], [[@LINE+N]] and [[@LINE-N]] stand for line numbers, and {{regex}}
+for regular expressions.
+
+The fixtures run in parallel on copies in a temporary folder. The time of each check is taken from the
+clang-tidy check profile, so the cost of a change to a check can be measured with --repeat.
+
+clang-tidy and the plugin are found like run-clang-tidy.py does. On Windows, where the checks are built into
+clang-tidy, use --no-plugin.
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_COMPILER_ARGS = ['-std=c++20']
+
+RE_RUN = re.compile(r'^//\s*RUN:\s*%check_clang_tidy\s+(.*)$')
+RE_CHECK_MESSAGES = re.compile(r'//\s*CHECK-MESSAGES:\s*(.*?)\s*$')
+RE_CHECK_FIXES = re.compile(r'//\s*CHECK-FIXES:\s*(.*?)\s*$')
+RE_CHECK_COMMENT = re.compile(r'^\s*//\s*CHECK-')
+RE_LINE_VARIABLE = re.compile(r'\[\[@LINE([+-]\d+)?\]\]')
+RE_DIAGNOSTIC = re.compile(r'^(.*?):(\d+):(\d+): (warning|error|note): (.*)$')
+RE_PROFILE_KEY = re.compile(r'^time\.clang-tidy\.(.+)\.wall$')
+
+
+def _load_runner():
+    """Load run-clang-tidy.py, whose name is not a module name, to share its clang-tidy lookup."""
+    path = Path(__file__).resolve().parents[2] / 'run-clang-tidy.py'
+    spec = importlib.util.spec_from_file_location('run_clang_tidy', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+runner = _load_runner()
+
+
+class Expectation(NamedTuple):
+    line: int          # Line of the CHECK comment, 1 based
+    pattern: str       # Regular expression
+    text: str          # As written in the fixture
+
+
+class Fixture(NamedTuple):
+    path: Path
+    check: str
+    tidy_args: List[str]
+    compiler_args: List[str]
+    messages: List[Expectation]
+    fixes: List[Expectation]
+
+
+class FixtureResult(NamedTuple):
+    path: Path
+    check: str
+    passed: bool
+    problems: List[str]
+    seconds: float                     # Wall time of clang-tidy, median over the runs
+    check_seconds: Dict[str, float]    # Wall time per check from the check profile, median over the runs
+
+
+def to_pattern(text: str, line: int) -> str:
+    """Turn FileCheck style text into a regular expression, with [[@LINE]] relative to the given line."""
+    def substitute_lines(literal: str) -> str:
+        parts = []
+        pos = 0
+        for match in RE_LINE_VARIABLE.finditer(literal):
+            parts.append(re.escape(literal[pos:match.start()]))
+            parts.append(str(line + int(match.group(1) or 0)))
+            pos = match.end()
+        parts.append(re.escape(literal[pos:]))
+        return ''.join(parts)
+
+    pattern = []
+    pos = 0
+    for match in re.finditer(r'\{\{(.*?)\}\}', text):
+        pattern.append(substitute_lines(text[pos:match.start()]))
+        pattern.append(f'(?:{match.group(1)})')
+        pos = match.end()
+    pattern.append(substitute_lines(text[pos:]))
+    return ''.join(pattern)
+
+
+def parse_fixture(path: Path) -> Fixture:
+    """Read the RUN line and the expectations of a fixture."""
+    lines = path.read_text(encoding='utf-8').splitlines()
+    check = None
+    tidy_args: List[str] = []
+    compiler_args: List[str] = []
+    messages = []
+    fixes = []
+
+    for index, line in enumerate(lines, 1):
+        match = RE_RUN.match(line.strip())
+        if match:
+            words = match.group(1).split()
+            std_args = [w for w in words if w.startswith('-std=')]
+            words = [w for w in words if not w.startswith('-std=')]
+            if len(words) < 3 or words[0] != '%s' or words[2] != '%t':
+                raise ValueError(f"{path}:{index}: expected '// RUN: %check_clang_tidy %s <check> %t'")
+            check = words[1]
+            # As in LLVM: %t -- <clang-tidy arguments> -- <compiler arguments>
+            extra = words[3:]
+            if extra and extra[0] == '--':
+                extra = extra[1:]
+            if '--' in extra:
+                split = extra.index('--')
+                tidy_args, compiler_args = extra[:split], extra[split + 1:]
+            else:
+                tidy_args = extra
+            if std_args:
+                compiler_args = [a for a in compiler_args if not a.startswith('-std=')] + std_args[-1:]
+            elif not any(a.startswith('-std=') for a in compiler_args):
+                compiler_args += DEFAULT_COMPILER_ARGS
+            continue
+        match = RE_CHECK_MESSAGES.search(line)
+        if match:
+            messages.append(Expectation(index, to_pattern(match.group(1), index), match.group(1)))
+            continue
+        match = RE_CHECK_FIXES.search(line)
+        if match:
+            fixes.append(Expectation(index, to_pattern(match.group(1), index), match.group(1)))
+
+    if check is None:
+        raise ValueError(f"{path}: no '// RUN: %check_clang_tidy' line")
+    return Fixture(path, check, tidy_args, compiler_args, messages, fixes)
+
+
+def read_check_profile(profile_dir: Path) -> Dict[str, float]:
+    """Sum the wall time per check of the profiles that clang-tidy stored."""
+    seconds: Dict[str, float] = {}
+    for profile_file in profile_dir.rglob('*.json'):
+        try:
+            profile = json.loads(profile_file.read_text(encoding='utf-8')).get('profile', {})
+        except (OSError, json.JSONDecodeError):
+            continue
+        for key, value in profile.items():
+            match = RE_PROFILE_KEY.match(key)
+            if match:
+                seconds[match.group(1)] = seconds.get(match.group(1), 0.0) + float(value)
+    return seconds
+
+
+def run_clang_tidy_once(fixture: Fixture, clang_tidy_exe: str, plugin_path: Optional[str],
+                        work_dir: Path) -> Tuple[str, str, float, Dict[str, float]]:
+    """Run clang-tidy with fixes on a copy of the fixture. Return the output, the fixed text and the timings."""
+    shutil.rmtree(work_dir, ignore_errors=True)
+    profile_dir = work_dir / 'profile'
+    profile_dir.mkdir(parents=True)
+    source = work_dir / fixture.path.name
+    shutil.copyfile(fixture.path, source)
+
+    cmd = [clang_tidy_exe]
+    if plugin_path:
+        cmd += ['-load', plugin_path]
+    cmd += [
+        f'--checks=-*,{fixture.check}',
+        '--fix',
+        '--enable-check-profile',
+        f'--store-check-profile={profile_dir}',
+    ]
+    cmd += fixture.tidy_args
+    cmd += [str(source), '--'] + fixture.compiler_args
+
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    output = result.stdout + result.stderr
+    return output, source.read_text(encoding='utf-8'), seconds, read_check_profile(profile_dir)
+
+
+def compare_messages(fixture: Fixture, output: str) -> List[str]:
+    """Match the diagnostics of the fixture against its CHECK-MESSAGES."""
+    problems = []
+    diagnostics = []
+    for line in output.splitlines():
+        match = RE_DIAGNOSTIC.match(line.strip())
+        if match and Path(match.group(1)).name == fixture.path.name:
+            diagnostics.append((f':{match.group(2)}:{match.group(3)}: {match.group(4)}: {match.group(5)}', match.group(4)))
+
+    matched = [False] * len(diagnostics)
+    for expectation in fixture.messages:
+        found = next((i for i, (text, _) in enumerate(diagnostics)
+                      if not matched[i] and re.search(expectation.pattern, text)), None)
+        if found is None:
+            problems.append(f'line {expectation.line}: expected message not found: {expectation.text}')
+        else:
+            matched[found] = True
+
+    for (text, severity), was_matched in zip(diagnostics, matched):
+        if not was_matched and severity in ('warning', 'error'):
+            problems.append(f'unexpected diagnostic {text}')
+    return problems
+
+
+def compare_fixes(fixture: Fixture, fixed_text: str) -> List[str]:
+    """Find the CHECK-FIXES in order in the fixed file, without the CHECK comments."""
+    problems = []
+    fixed_lines = [line for line in fixed_text.splitlines() if not RE_CHECK_COMMENT.match(line)]
+    pos = 0
+    for expectation in fixture.fixes:
+        found = next((i for i in range(pos, len(fixed_lines)) if re.search(expectation.pattern, fixed_lines[i])), None)
+        if found is None:
+            problems.append(f'line {expectation.line}: expected fix not found: {expectation.text}')
+        else:
+            pos = found + 1
+    return problems
+
+
+def _run_fixture(args: Tuple) -> FixtureResult:
+    """Helper function to run one fixture (for the thread pool)."""
+    index, fixture, clang_tidy_exe, plugin_path, work_root, repeat, verbose = args
+    work_dir = work_root / f'{index}_{fixture.path.stem}'
+    problems: List[str] = []
+    wall_times = []
+    check_times: Dict[str, List[float]] = {}
+
+    for run in range(repeat):
+        try:
+            output, fixed_text, seconds, profile = run_clang_tidy_once(fixture, clang_tidy_exe, plugin_path, work_dir)
+        except FileNotFoundError:
+            return FixtureResult(fixture.path, fixture.check, False, ['clang-tidy not found'], 0.0, {})
+        wall_times.append(seconds)
+        for check, check_seconds in profile.items():
+            check_times.setdefault(check, []).append(check_seconds)
+        if run == 0:
+            problems = compare_messages(fixture, output) + compare_fixes(fixture, fixed_text)
+            if problems and verbose:
+                problems.append('clang-tidy output:\n' + output.rstrip())
+
+    return FixtureResult(fixture.path, fixture.check, not problems, problems, statistics.median(wall_times),
+                         {check: statistics.median(times) for check, times in check_times.items()})
+
+
+def find_fixtures(paths: List[Path]) -> List[Path]:
+    fixtures = []
+    for path in paths:
+        if path.is_dir():
+            fixtures.extend(sorted(path.rglob('*.cpp')))
+        else:
+            fixtures.append(path)
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the fixture tests of the GeneralsGameCode clang-tidy checks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run all fixtures
+  python scripts/clang-tidy-plugin/test/check_clang_tidy.py
+
+  # Run the fixtures of one check 5 times and compare the check time to the last run
+  python scripts/clang-tidy-plugin/test/check_clang_tidy.py --filter use-is-empty --repeat 5 --json timing.json
+
+  # Use a clang-tidy with the checks built in (Windows)
+  python scripts/clang-tidy-plugin/test/check_clang_tidy.py --no-plugin --clang-tidy llvm-project/build/bin/clang-tidy.exe
+        """
+    )
+    parser.add_argument('fixtures', nargs='*', type=Path,
+                        help='Fixture files or folders (default: the folders next to this script)')
+    parser.add_argument('--filter', '-f', action='append', default=[],
+                        help='Only run fixtures whose path contains this text (can be used multiple times)')
+    parser.add_argument('--clang-tidy', help='clang-tidy executable (auto-detected if omitted)')
+    parser.add_argument('--plugin', help='Plugin library (auto-detected if omitted)')
+    parser.add_argument('--no-plugin', action='store_true', help='Do not load the plugin, for a clang-tidy with the checks built in')
+    parser.add_argument('--jobs', '-j', type=int, default=multiprocessing.cpu_count(),
+                        help=f'Number of parallel fixtures (default: {multiprocessing.cpu_count()})')
+    parser.add_argument('--repeat', type=int, default=1, help='Run each fixture this many times and report the median time')
+    parser.add_argument('--json', type=Path, help='Write the results and timings to this file')
+    parser.add_argument('--baseline', type=Path, help='Timings of an earlier --json run to compare the check times with')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the clang-tidy output of failed fixtures')
+    args = parser.parse_args()
+
+    test_dir = Path(__file__).resolve().parent
+    fixture_paths = find_fixtures(args.fixtures or [p for p in sorted(test_dir.iterdir()) if p.is_dir() and p.name != '__pycache__'])
+    if args.filter:
+        fixture_paths = [p for p in fixture_paths if any(f in str(p) for f in args.filter)]
+    if not fixture_paths:
+        print("No fixtures found.")
+        return 1
+
+    try:
+        fixtures = [parse_fixture(path) for path in fixture_paths]
+        clang_tidy_exe = args.clang_tidy or runner.find_clang_tidy()
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    plugin_path = None
+    if not args.no_plugin:
+        plugin_path = args.plugin or runner.find_clang_tidy_plugin(runner.find_project_root())
+        if not plugin_path:
+            print("Error: clang-tidy plugin not found. Build it (see scripts/clang-tidy-plugin/README.md), "
+                  "pass --plugin, or use --no-plugin with a clang-tidy that has the checks built in.", file=sys.stderr)
+            return 1
+
+    version = runner.get_clang_tidy_version(clang_tidy_exe)
+    llvm_version = runner.extract_llvm_version(version) if version else None
+    print(f"Using {clang_tidy_exe}" + (f" (LLVM {llvm_version})" if llvm_version else "")
+          + (f" with {plugin_path}" if plugin_path else ""))
+
+    baseline: Dict[str, float] = {}
+    if args.baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8')).get('checks', {})
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='check_clang_tidy_') as work_root:
+        jobs = max(1, min(args.jobs, len(fixtures)))
+        with ThreadPool(processes=jobs) as pool:
+            results = pool.map(
+                _run_fixture,
+                [(index, fixture, clang_tidy_exe, plugin_path, Path(work_root), max(1, args.repeat), args.verbose)
+                 for index, fixture in enumerate(fixtures)]
+            )
+    total_seconds = time.perf_counter() - start
+
+    check_seconds: Dict[str, float] = {}
+    for result in results:
+        relative = result.path.relative_to(test_dir) if result.path.is_relative_to(test_dir) else result.path
+        status = 'PASS' if result.passed else 'FAIL'
+        print(f"{status}  {result.seconds:7.3f}s  {relative}")
+        for problem in result.problems:
+            print(f"      {problem}")
+        for check, seconds in result.check_seconds.items():
+            check_seconds[check] = check_seconds.get(check, 0.0) + seconds
+
+    if check_seconds:
+        print("\nCheck time (sum of the fixture medians):")
+        for check, seconds in sorted(check_seconds.items(), key=lambda item: -item[1]):
+            change = ''
+            if check in baseline and baseline[check] > 0:
+                change = f"  {100.0 * (seconds - baseline[check]) / baseline[check]:+.1f}% vs baseline"
+            print(f"  {check:<45} {seconds * 1000:9.3f} ms{change}")
+
+    failed = sum(1 for result in results if not result.passed)
+    print(f"\nSummary: {len(results) - failed} passed, {failed} failed, {total_seconds:.2f}s")
+
+    if args.json:
+        report = {
+            'clang_tidy': clang_tidy_exe,
+            'llvm_version': llvm_version,
+            'repeat': args.repeat,
+            'checks': check_seconds,
+            'fixtures': [
+                {
+                    'path': result.path.as_posix(),
+                    'check': result.check,
+                    'passed': result.passed,
+                    'problems': result.problems,
+                    'seconds': result.seconds,
+                    'check_seconds': result.check_seconds,
+                }
+                for result in results
+            ],
+        }
+        args.json.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"Wrote {args.json}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
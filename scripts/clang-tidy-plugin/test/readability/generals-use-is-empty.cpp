@@ -0,0 +1,91 @@
+// RUN: %check_clang_tidy %s generals-use-is-empty %t
+
+class AsciiString
+{
+public:
+	int getLength() const;
+	bool isEmpty() const;
+	int compare(const char *s) const;
+	int compareNoCase(const char *s) const;
+};
+
+class UnicodeString
+{
+public:
+	int getLength() const;
+	bool isEmpty() const;
+};
+
+class StringClass
+{
+public:
+	int Get_Length() const;
+	bool Is_Empty() const;
+};
+
+class WideStringClass
+{
+public:
+	int Get_Length() const;
+	bool Is_Empty() const;
+};
+
+void use(bool b);
+
+void getLengthComparisons(const AsciiString &str, const UnicodeString &wide)
+{
+	use(str.getLength() == 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use str.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(str.isEmpty());
+
+	use(str.getLength() > 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use !str.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(!str.isEmpty());
+
+	use(str.getLength() != 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use !str.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(!str.isEmpty());
+
+	use(str.getLength() <= 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use str.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(str.isEmpty());
+
+	use(0 == wide.getLength());
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use wide.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(wide.isEmpty());
+
+	use(0 != wide.getLength());
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use !wide.isEmpty() instead of comparing getLength() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(!wide.isEmpty());
+}
+
+void compareWithEmptyString(const AsciiString &str)
+{
+	use(str.compare("") == 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use str.isEmpty() instead of comparing compare() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(str.isEmpty());
+
+	use(str.compareNoCase("") != 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use !str.isEmpty() instead of comparing compareNoCase() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(!str.isEmpty());
+}
+
+void wwvegasStrings(const StringClass &str, const WideStringClass &wide)
+{
+	use(str.Get_Length() == 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use str.Is_Empty() instead of comparing Get_Length() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(str.Is_Empty());
+
+	use(wide.Get_Length() > 0);
+	// CHECK-MESSAGES: :[[@LINE-1]]:6: warning: use !wide.Is_Empty() instead of comparing Get_Length() with 0 [generals-use-is-empty]
+	// CHECK-FIXES: use(!wide.Is_Empty());
+}
+
+void noWarnings(const AsciiString &str, const StringClass &ww)
+{
+	use(str.getLength() == 1);
+	use(str.getLength() < 0);
+	use(str.compare("a") == 0);
+	use(str.compare("") < 0);
+	use(ww.Get_Length() >= 0);
+}
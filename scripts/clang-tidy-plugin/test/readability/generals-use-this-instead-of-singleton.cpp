@@ -0,0 +1,61 @@
+// RUN: %check_clang_tidy %s generals-use-this-instead-of-singleton %t
+
+class GameLogic
+{
+public:
+	unsigned int getFrame() const;
+	void setFrame(unsigned int frame);
+	void update();
+	unsigned int peekFrame() const;
+	static void resetAll();
+
+	unsigned int m_frame;
+};
+
+class GameClient
+{
+public:
+	void draw();
+};
+
+extern GameLogic *TheGameLogic;
+extern GameClient *TheGameClient;
+
+void GameLogic::update()
+{
+	unsigned int now = TheGameLogic->getFrame();
+	// CHECK-MESSAGES: :[[@LINE-1]]:21: warning: use 'getFrame()' instead of 'TheGameLogic->getFrame' when inside a member function [generals-use-this-instead-of-singleton]
+	// CHECK-FIXES: unsigned int now = getFrame();
+
+	TheGameLogic->setFrame(now + 1);
+	// CHECK-MESSAGES: :[[@LINE-1]]:2: warning: use 'setFrame(now + 1)' instead of 'TheGameLogic->setFrame' when inside a member function [generals-use-this-instead-of-singleton]
+	// CHECK-FIXES: {{^}}	setFrame(now + 1);
+
+	TheGameLogic->m_frame = 10;
+	// CHECK-MESSAGES: :[[@LINE-1]]:2: warning: use 'm_frame' instead of 'TheGameLogic->m_frame' when inside a member function [generals-use-this-instead-of-singleton]
+	// CHECK-FIXES: {{^}}	m_frame = 10;
+
+	// A singleton of another class stays.
+	TheGameClient->draw();
+}
+
+unsigned int GameLogic::peekFrame() const
+{
+	// A non-const member function cannot be called from a const one, so that call stays.
+	TheGameLogic->setFrame(0);
+
+	return TheGameLogic->getFrame();
+	// CHECK-MESSAGES: :[[@LINE-1]]:9: warning: use 'getFrame()' instead of 'TheGameLogic->getFrame' when inside a member function [generals-use-this-instead-of-singleton]
+	// CHECK-FIXES: return getFrame();
+}
+
+void GameLogic::resetAll()
+{
+	// Static member functions have no this.
+	TheGameLogic->setFrame(0);
+}
+
+void tick()
+{
+	TheGameLogic->setFrame(TheGameLogic->getFrame() + 1);
+}
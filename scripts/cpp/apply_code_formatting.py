@@ -3,21 +3,27 @@
 # This script applies basic formatting and cleanups to the various CPP files.
 # Just run it.
 
-import glob
+import argparse
 import os
 
+from codemod_io import print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from cpp_lexer import LexedLine, lex_lines
+from file_selection import add_file_selection_arguments, select_files
+
+
+def apply_formatting(lexedLine: LexedLine) -> str:
+    line = lexedLine.text
 
-def apply_formatting(line: str) -> str:
     # Strip useless comments behind scope end
-    scopeEndIndex = line.find('}')
+    scopeEndIndex = lexedLine.code.find('}')
     if scopeEndIndex >= 0:
         if scopeEndIndex == 0 or line[:scopeEndIndex].isspace():
             afterScopeIndex = scopeEndIndex + 1
             while afterScopeIndex < len(line) and line[afterScopeIndex] == ';':
                 afterScopeIndex += 1
-            commentBeginIndex = line.find("//")
-            namespaceCommentBeginIndex = line.find("// namespace")
-            if commentBeginIndex >= 0 and namespaceCommentBeginIndex < 0:
+            commentBeginIndex = lexedLine.commentBegin
+            if commentBeginIndex >= 0 and line.startswith("//", commentBeginIndex) and not line.startswith("// namespace", commentBeginIndex):
                 if afterScopeIndex == commentBeginIndex or line[afterScopeIndex:commentBeginIndex].isspace():
                     line = line[:commentBeginIndex]
 
@@ -28,7 +34,25 @@ def apply_formatting(line: str) -> str:
     return line
 
 
+def format_lines(lines: list[str]) -> list[str]:
+    newLines = []
+    for lexedLine in lex_lines(lines):
+        line = apply_formatting(lexedLine)
+        newLines.append(line)
+    if lines:
+        lastLine = lines[-1]
+        if lastLine and lastLine[-1] != '\n':
+            newLines.append("\n") # write new line to end of file
+
+    return newLines
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Apply basic formatting and cleanups to the CPP files.")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
@@ -36,29 +60,21 @@ def main():
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
     utility_dir = os.path.join(root_dir, "Dependencies", "Utility")
-    fileNames = []
-    for ext in ["*.cpp", "*.h", "*.inl"]:
-        fileNames.extend(glob.glob(os.path.join(core_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generals_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(utility_dir, '**', ext), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir, utility_dir], [".cpp", ".h", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-
-        with open(fileName, 'w', encoding="cp1252") as file:
-            for line in lines:
-                line = apply_formatting(line)
-                file.write(line)
-            if lines:
-                lastLine = lines[-1]
-                if lastLine and lastLine[-1] != '\n':
-                    file.write("\n") # write new line to end of file
+        source = read_source(fileName, manifest)
+        lines = source.lines()
+
+        newLines = format_lines(lines)
+
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+benchmark_transforms.py
+
+Measures the throughput of the codemod transforms of this folder on a synthetic C++ corpus, and checks
+that their output did not change, so that the transforms can be optimized without changing what they do.
+
+The corpus is generated from a seed into a temporary folder and never touches the source tree. At scale 1
+it has about as many .h, .cpp and .inl files of about the same sizes as the Core, Generals and GeneralsMD
+folders. Unlike the source tree, which the codemods already cleaned up, it contains a realistic share of
+the code the codemods rewrite: include guards, MSVC guards around '#pragma once', DEBUG_LOG messages with
+trailing new lines, deleteInstance() calls, RTS_INTERNAL conditions, string instantiations, trailing
+returns and trailing whitespace. Some files are CP-1252 with non-ASCII bytes, some have a UTF-8 byte order
+mark and some have CRLF line breaks.
+
+Every transform runs in-process with the same functions its script runs, including the file_contains()
+prefilter, read_source() and the encoding of changed files, but without writing the files. Whole pipelines
+run several transforms on each file after a single read. For every transform and pipeline, the report lists
+the files per second, the megabytes per second and the peak memory traced by tracemalloc while processing
+the largest files, which is where a transform that keeps one file in memory at a time reaches its peak.
+
+The output of every run is summarized by a hash per changed file. With --golden, the hashes are compared
+with the ones of a golden file, which is written by the first run, or by any run with --update-golden.
+Any difference is listed and fails the run.
+
+Usage:
+  python benchmark_transforms.py [--scale 1] [--seed 1] [--repeat 3] [--only delete_instance,all]
+                                 [--golden golden.json [--update-golden]] [--corpus DIR] [--json report.json]
+
+Example, to make sure that an optimization keeps the output:
+  git stash && python benchmark_transforms.py --scale 0.2 --golden /tmp/golden.json --update-golden
+  git stash pop && python benchmark_transforms.py --scale 0.2 --golden /tmp/golden.json
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from apply_code_formatting import format_lines
+from codemod_io import SourceText, encode_source, encode_text, file_contains, read_source
+from cpp_lexer import lex_lines
+from normalize_headers import STEPS, normalize_header
+from refactor_asciistring_unicodestring_instantiation import fix_string
+from refactor_debug_log_newline import LOG_MACROS, modifyLine as fixDebugLogLine
+from refactor_delete_instance import modifyLine as fixDeleteInstanceLine
+from remove_return import apply_fixes
+from remove_rts_internal import modifyLine as fixRtsInternalLine, removeInternalBlocks
+
+# Bump when the generated content changes, so that golden files of older corpora are not compared.
+CORPUS_VERSION = 1
+CORPUS_STAMP = "corpus.json"
+MB = 1024 * 1024
+MEMORY_SAMPLE_FILES = 20
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+class FileProfile(NamedTuple):
+    count: int          # Number of files at scale 1
+    medianSize: int     # Median file size in bytes
+    sigma: float        # Spread of the log-normal size distribution
+    maxSize: int        # Largest file size in bytes
+
+
+class CorpusProfile(NamedTuple):
+    files: dict[str, FileProfile]   # Per file extension
+    pragmaOnly: float               # Share of headers with just '#pragma once'
+    mscGuard: float                 # Share of headers with '#pragma once' in an MSVC-only guard, plus an include guard
+    guardOnly: float                # Share of headers with just an include guard. The others have none
+    debugLog: float                 # Share of statements that are log messages
+    debugLogNewline: float          # Share of log messages that end with a new line
+    deleteInstance: float           # Share of statements that call deleteInstance()
+    stringInstance: float           # Share of statements that instantiate a string from a literal
+    trailingReturn: float           # Share of functions that end with a superfluous return
+    rtsInternal: float              # Share of functions wrapped in an RTS_INTERNAL condition
+    trailingSpace: float            # Share of lines with trailing whitespace
+    scopeComment: float             # Share of scope ends with a comment like '// end if'
+    cp1252: float                   # Share of files that contain CP-1252 bytes
+    utf8Bom: float                  # Share of files that start with a UTF-8 byte order mark
+    crlf: float                     # Share of files with CRLF line breaks
+
+
+# File counts and sizes of Core, Generals and GeneralsMD. The rates of the code to rewrite
+# are those of the original source code before the codemods ran.
+DEFAULT_PROFILE = CorpusProfile(
+    files={
+        ".h": FileProfile(2031, 3700, 1.07, 160000),
+        ".cpp": FileProfile(1949, 10200, 1.24, 410000),
+        ".inl": FileProfile(7, 3400, 1.0, 35000),
+    },
+    pragmaOnly=0.35,
+    mscGuard=0.45,
+    guardOnly=0.15,
+    debugLog=0.08,
+    debugLogNewline=0.7,
+    deleteInstance=0.02,
+    stringInstance=0.02,
+    trailingReturn=0.1,
+    rtsInternal=0.03,
+    trailingSpace=0.03,
+    scopeComment=0.3,
+    cp1252=0.03,
+    utf8Bom=0.01,
+    crlf=0.2,
+)
+
+GAME_FOLDERS = ["Core", "Generals", "GeneralsMD"]
+SUB_FOLDERS = ["Common", "GameClient", "GameLogic", "GameNetwork", "W3DDevice", "WWVegas"]
+FILES_PER_FOLDER = 60
+
+WORDS = ["Object", "Player", "Team", "Weapon", "Drawable", "Module", "Update", "Behavior", "Terrain", "Script",
+         "Audio", "Particle", "Control", "Bar", "Shell", "Game", "Window", "Radar", "Partition", "Locomotor"]
+TYPES = ["Int", "Real", "Bool", "UnsignedInt", "AsciiString", "Coord3D", "ObjectID"]
+LOG_NAMES = ["DEBUG_LOG", "DEBUG_LOG", "DEBUG_LOG", "DEBUG_CRASH", "DEBUG_ASSERTCRASH", "WWDEBUG_SAY", "RELEASE_CRASH"]
+CP1252_WORDS = ["café", "naïve", "© Westwood", "½ second", "déjà vu", "– note"]
+
+LICENSE = """\
+/*
+**	Command & Conquer Generals Zero Hour(tm)
+**	Copyright 2025 Electronic Arts Inc.
+**
+**	This program is free software: you can redistribute it and/or modify
+**	it under the terms of the GNU General Public License as published by
+**	the Free Software Foundation, either version 3 of the License, or
+**	(at your option) any later version.
+**
+**	This program is distributed in the hope that it will be useful,
+**	but WITHOUT ANY WARRANTY; without even the implied warranty of
+**	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+**	GNU General Public License for more details.
+**
+**	You should have received a copy of the GNU General Public License
+**	along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+"""
+
+
+class SourceGenerator:
+    """
+    Generates the text of one synthetic source file. All choices come from the given random generator,
+    so the same seed always gives the same file.
+    """
+
+    def __init__(self, rng: random.Random, profile: CorpusProfile, name: str, ext: str, cp1252: bool):
+        self.rng = rng
+        self.profile = profile
+        self.name = name
+        self.ext = ext
+        self.cp1252 = cp1252
+        self.parts: list[str] = []
+        self.size = 0
+
+    def emit(self, line: str) -> None:
+        if self.rng.random() < self.profile.trailingSpace:
+            line += self.rng.choice([" ", "\t", "  "])
+        self.parts.append(line + "\n")
+        self.size += len(line) + 1
+
+    def word(self) -> str:
+        return self.rng.choice(WORDS)
+
+    def comment(self, indent: str) -> None:
+        text = f"{self.word()} {self.word().lower()} handling"
+        if self.cp1252 and self.rng.random() < 0.3:
+            text += " " + self.rng.choice(CP1252_WORDS)
+        self.emit(f"{indent}// {text}")
+
+    def statement(self, indent: str) -> None:
+        rng = self.rng
+        profile = self.profile
+        roll = rng.random()
+        if roll < profile.debugLog:
+            macro = rng.choice(LOG_NAMES)
+            newline = "\\n" if rng.random() < profile.debugLogNewline else ""
+            if macro == "DEBUG_ASSERTCRASH":
+                self.emit(f'{indent}{macro}(m_{self.word().lower()} != nullptr, ("{self.word()} is missing{newline}"));')
+            elif macro == "WWDEBUG_SAY":
+                self.emit(f'{indent}{macro}(("{self.word()} %d{newline}", value));')
+            else:
+                self.emit(f'{indent}{macro}(("{self.word()}::{self.word()} failed for %s{newline}", name.str()));')
+            return
+        roll -= profile.debugLog
+        if roll < profile.deleteInstance:
+            style = rng.randrange(4)
+            if style == 0:
+                self.emit(f"{indent}m_{self.word().lower()}->deleteInstance();")
+            elif style == 1:
+                self.emit(f"{indent}{self.word().lower()}->deleteInstance(); {self.word().lower()} = nullptr;")
+            elif style == 2:
+                self.emit(f"{indent}deleteInstance();")
+            else:
+                self.emit(f'{indent}DEBUG_LOG(("calling deleteInstance() on %p", this));')
+            return
+        roll -= profile.deleteInstance
+        if roll < profile.stringInstance:
+            typename = rng.choice(["AsciiString", "UnicodeString"])
+            prefix = "L" if typename == "UnicodeString" else ""
+            self.emit(f'{indent}set{self.word()}({typename}( {prefix}"{self.word()}" ));')
+            return
+        kind = rng.randrange(6)
+        if kind == 0:
+            self.emit(f"{indent}{rng.choice(TYPES)} {self.word().lower()}{rng.randrange(10)} = get{self.word()}();")
+        elif kind == 1:
+            self.emit(f"{indent}if (m_{self.word().lower()} == nullptr)")
+            self.emit(f"{indent}{{")
+            self.emit(f"{indent}\treturn;")
+            self.emit(f"{indent}}}")
+        elif kind == 2:
+            scopeEnd = "} // end if" if rng.random() < self.profile.scopeComment else "}"
+            self.emit(f"{indent}for (Int i = 0; i < count; ++i)")
+            self.emit(f"{indent}{{")
+            self.emit(f"{indent}\tvalue += compute{self.word()}(i);")
+            self.emit(f"{indent}{scopeEnd}")
+        elif kind == 3:
+            self.comment(indent)
+        elif kind == 4:
+            self.emit(f'{indent}const char *text = "{self.word()} {{ }} // not a comment";')
+        else:
+            self.emit(f"{indent}m_{self.word().lower()}.update(frame, {rng.randrange(100)});")
+
+    def function(self, className: str) -> None:
+        rng = self.rng
+        internal = rng.random() < self.profile.rtsInternal
+        if internal:
+            self.emit(rng.choice(["#ifdef RTS_INTERNAL", "#if defined(RTS_INTERNAL)", "#if defined(RTS_DEBUG) || defined(RTS_INTERNAL)"]))
+        self.emit("//-------------------------------------------------------------------------------------------------")
+        self.emit(f"void {className}::{rng.choice(['update', 'process', 'reset', 'load', 'draw'])}{self.word()}()")
+        self.emit("{")
+        for _ in range(rng.randint(2, 14)):
+            self.statement("\t")
+        if rng.random() < self.profile.trailingReturn:
+            if rng.random() < 0.3:
+                self.emit("")
+            self.emit("\treturn;")
+        scopeEnd = "}  // end " + self.word().lower() if rng.random() < self.profile.scopeComment else "}"
+        self.emit(scopeEnd)
+        if internal:
+            if rng.random() < 0.3:
+                self.emit("#else")
+                self.emit(f"void {className}::noop{self.word()}() {{}}")
+            self.emit("#endif")
+        self.emit("")
+
+    def includes(self) -> None:
+        for _ in range(self.rng.randint(1, 12)):
+            self.emit(f'#include "{self.rng.choice(SUB_FOLDERS)}/{self.word()}{self.word()}.h"')
+        self.emit("")
+
+    def class_declaration(self, className: str) -> None:
+        rng = self.rng
+        self.emit(f"class {className} : public MemoryPoolObject")
+        self.emit("{")
+        self.emit(f"\tMEMORY_POOL_GLUE_WITH_USERLOOKUP_CREATE({className}, \"{className}Pool\")")
+        self.emit("public:")
+        for _ in range(rng.randint(3, 20)):
+            kind = rng.randrange(5)
+            if kind == 0:
+                self.emit(f"\t{rng.choice(TYPES)} get{self.word()}() const {{ return m_{self.word().lower()}; }}")
+            elif kind == 1:
+                self.emit(f"\tvoid set{self.word()}({rng.choice(TYPES)} value);")
+            elif kind == 2:
+                self.comment("\t")
+            elif kind == 3 and rng.random() < 0.2:
+                self.emit(f"\tvoid friend_deleteInstance() {{ deleteInstance(); }}")
+            else:
+                self.emit(f"\tvirtual void on{self.word()}();")
+        self.emit("protected:")
+        for _ in range(rng.randint(1, 8)):
+            self.emit(f"\t{rng.choice(TYPES)} m_{self.word().lower()}{rng.randrange(10)};")
+        self.emit("};")
+        self.emit("")
+
+    def header(self, targetSize: int) -> None:
+        rng = self.rng
+        profile = self.profile
+        guard = f"_{self.name.upper()}_H_"
+        roll = rng.random()
+        pragma = roll < profile.pragmaOnly + profile.mscGuard
+        msc = profile.pragmaOnly <= roll < profile.pragmaOnly + profile.mscGuard
+        includeGuard = roll >= profile.pragmaOnly and roll < profile.pragmaOnly + profile.mscGuard + profile.guardOnly
+
+        self.parts.append(LICENSE)
+        self.size += len(LICENSE)
+        if msc:
+            self.emit(rng.choice(["#if _MSC_VER >= 1000", "#ifdef _MSC_VER", "#if defined(_MSC_VER)"]))
+            self.emit("#pragma once")
+            self.emit("#endif // _MSC_VER >= 1000")
+            self.emit("")
+        elif pragma:
+            self.emit("#pragma once")
+            if rng.random() < 0.5:
+                self.emit("")
+        if includeGuard:
+            self.emit(f"#ifndef {guard}" if rng.random() < 0.8 else f"#if !defined({guard})")
+            self.emit(f"#define {guard}")
+            self.emit("")
+        self.includes()
+        className = self.name
+        while self.size < targetSize:
+            self.class_declaration(className)
+            className = f"{self.name}{self.word()}"
+        if includeGuard:
+            self.emit("")
+            self.emit(f"#endif // {guard}")
+
+    def source(self, targetSize: int) -> None:
+        self.parts.append(LICENSE)
+        self.size += len(LICENSE)
+        self.emit('#include "PreRTS.h"')
+        self.includes()
+        while self.size < targetSize:
+            self.function(self.name)
+
+    def generate(self, targetSize: int) -> str:
+        if self.ext == ".h":
+            self.header(targetSize)
+        else:
+            self.source(targetSize)
+        return "".join(self.parts)
+
+
+def file_sizes(rng: random.Random, profile: FileProfile, count: int) -> list[int]:
+    sigma = profile.sigma
+    return [min(profile.maxSize, max(600, int(rng.lognormvariate(math.log(profile.medianSize), sigma)))) for _ in range(count)]
+
+
+def corpus_stamp(seed: int, scale: float) -> dict:
+    return {"version": CORPUS_VERSION, "seed": seed, "scale": scale}
+
+
+def generate_corpus(corpusDir: str, seed: int, scale: float, profile: CorpusProfile = DEFAULT_PROFILE) -> list[str]:
+    """
+    Writes the corpus for the seed and scale into corpusDir and returns the sorted paths of its files.
+    A corpus written before with the same seed and scale is reused.
+    """
+    stampPath = os.path.join(corpusDir, CORPUS_STAMP)
+    stamp = corpus_stamp(seed, scale)
+    try:
+        with open(stampPath, 'r', encoding="utf-8") as file:
+            existing = json.load(file)
+    except (OSError, ValueError):
+        existing = None
+    if existing is not None and existing.get("stamp") == stamp:
+        return [os.path.join(corpusDir, path) for path in existing["files"]]
+
+    for entry in os.listdir(corpusDir):
+        path = os.path.join(corpusDir, entry)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    rng = random.Random(seed)
+    relPaths = []
+    for ext, fileProfile in profile.files.items():
+        count = max(1, round(fileProfile.count * scale))
+        for index, targetSize in enumerate(file_sizes(rng, fileProfile, count)):
+            folder = os.path.join(rng.choice(GAME_FOLDERS), "Code", "Source" if ext == ".cpp" else "Include",
+                                  rng.choice(SUB_FOLDERS), f"Part{index // FILES_PER_FOLDER}")
+            name = f"{rng.choice(WORDS)}{rng.choice(WORDS)}{index}"
+            cp1252 = rng.random() < profile.cp1252
+            bom = not cp1252 and rng.random() < profile.utf8Bom
+            newline = "\r\n" if rng.random() < profile.crlf else "\n"
+
+            text = SourceGenerator(rng, profile, name, ext, cp1252).generate(targetSize)
+            encoding = "cp1252" if cp1252 else "utf-8-sig" if bom else "utf-8"
+            relPath = os.path.join(folder, name + ext)
+            path = os.path.join(corpusDir, relPath)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(encode_text(text, encoding, newline))
+            relPaths.append(relPath)
+
+    relPaths.sort()
+    with open(stampPath, 'w', encoding="utf-8") as file:
+        json.dump({"stamp": stamp, "files": relPaths}, file)
+    return [os.path.join(corpusDir, path) for path in relPaths]
+
+
+# ---------------------------------------------------------------------------
+# Transforms
+# ---------------------------------------------------------------------------
+
+class Transform(NamedTuple):
+    name: str
+    extensions: tuple[str, ...]     # Extensions of the files the script selects
+    needles: list[str]              # The script only reads files that contain one of these. Empty for all files
+    apply: Callable[[SourceText], str]
+
+
+def apply_debug_log_newline(source: SourceText) -> str:
+    return "".join(fixDebugLogLine(line) for line in source.lines())
+
+
+def apply_delete_instance(source: SourceText) -> str:
+    return "".join(fixDeleteInstanceLine(lexedLine) for lexedLine in lex_lines(source.lines()))
+
+
+def apply_rts_internal(source: SourceText) -> str:
+    return "".join(fixRtsInternalLine(line) for line in removeInternalBlocks(source.lines()))
+
+
+def apply_string_instantiation(source: SourceText) -> str:
+    return "".join(fix_string(fix_string(line, 'AsciiString'), 'UnicodeString') for line in source.lines())
+
+
+def apply_remove_return(source: SourceText) -> str:
+    return "".join(apply_fixes(source.lines()))
+
+
+def apply_code_formatting(source: SourceText) -> str:
+    return "".join(format_lines(source.lines()))
+
+
+def apply_normalize_headers(source: SourceText) -> str:
+    return normalize_header(source.text, STEPS)[0]
+
+
+CPP_EXTENSIONS = (".cpp", ".h", ".inl")
+
+TRANSFORMS = {transform.name: transform for transform in [
+    Transform("rts_internal", CPP_EXTENSIONS, ["RTS_INTERNAL"], apply_rts_internal),
+    Transform("debug_log_newline", CPP_EXTENSIONS, LOG_MACROS, apply_debug_log_newline),
+    Transform("delete_instance", CPP_EXTENSIONS, ["deleteInstance()"], apply_delete_instance),
+    Transform("string_instantiation", CPP_EXTENSIONS, ["AsciiString", "UnicodeString"], apply_string_instantiation),
+    Transform("remove_return", CPP_EXTENSIONS, ["return;", "return ;"], apply_remove_return),
+    Transform("normalize_headers", (".h",), [], apply_normalize_headers),
+    Transform("code_formatting", CPP_EXTENSIONS, [], apply_code_formatting),
+]}
+
+# Pipelines run their transforms in order on each file after a single read.
+PIPELINES = {
+    "all": list(TRANSFORMS),
+    "lexer": ["delete_instance", "code_formatting"],
+}
+
+
+class Job(NamedTuple):
+    name: str
+    transforms: list[Transform]
+    pipeline: bool
+
+
+def run_job(job: Job, paths: list[str], corpusDir: str) -> tuple[int, int, dict[str, str]]:
+    """
+    Runs the job on the files and returns (selected files, bytes of the selected files, hash per changed file).
+    """
+    extensions = tuple(ext for transform in job.transforms for ext in transform.extensions)
+    selected = 0
+    size = 0
+    hashes = {}
+    for path in paths:
+        if not path.endswith(extensions):
+            continue
+        selected += 1
+        size += os.path.getsize(path)
+
+        if job.pipeline:
+            source = read_source(path)
+            text = source.text
+            for transform in job.transforms:
+                if not path.endswith(transform.extensions):
+                    continue
+                if transform.needles and not any(needle in text for needle in transform.needles):
+                    continue
+                text = transform.apply(source._replace(text=text))
+        else:
+            transform = job.transforms[0]
+            if transform.needles and not file_contains(path, [needle.encode("ascii") for needle in transform.needles]):
+                continue
+            source = read_source(path)
+            text = transform.apply(source)
+
+        if text != source.text:
+            data = encode_source(text, source)
+            relPath = os.path.relpath(path, corpusDir).replace(os.sep, "/")
+            hashes[relPath] = hashlib.sha1(data).hexdigest()[:16]
+    return selected, size, hashes
+
+
+class JobResult(NamedTuple):
+    name: str
+    files: int          # Selected files
+    megabytes: float    # Size of the selected files
+    changed: int        # Files the job changed
+    seconds: float      # Best time of the timed runs
+    peakMemory: float   # Peak traced memory in megabytes while processing the largest files
+    digest: str         # Hash over the hashes of all changed files
+    hashes: dict[str, str]
+
+    @property
+    def filesPerSecond(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def megabytesPerSecond(self) -> float:
+        return self.megabytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def output_digest(hashes: dict[str, str]) -> str:
+    digest = hashlib.sha1()
+    for relPath in sorted(hashes):
+        digest.update(f"{relPath}={hashes[relPath]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def benchmark_job(job: Job, paths: list[str], corpusDir: str, repeat: int) -> JobResult:
+    best = math.inf
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        selected, size, hashes = run_job(job, paths, corpusDir)
+        best = min(best, time.perf_counter() - begin)
+
+    # The transforms keep one file in memory at a time, so the peak is reached on the largest files.
+    # Tracing is slow, so only those are traced, in an untimed run.
+    largest = sorted(paths, key=os.path.getsize, reverse=True)[:MEMORY_SAMPLE_FILES]
+    tracemalloc.start()
+    run_job(job, largest, corpusDir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return JobResult(job.name, selected, size / MB, len(hashes), best, peak / MB, output_digest(hashes), hashes)
+
+
+# ---------------------------------------------------------------------------
+# Golden output
+# ---------------------------------------------------------------------------
+
+def load_golden(path: str) -> dict | None:
+    try:
+        with open(path, 'r', encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_golden(path: str, stamp: dict, results: list[JobResult], golden: dict | None) -> None:
+    jobs = dict(golden["jobs"]) if golden is not None and golden.get("stamp") == stamp else {}
+    for result in results:
+        jobs[result.name] = {"changed": result.changed, "digest": result.digest, "files": result.hashes}
+    with open(path, 'w', encoding="utf-8") as file:
+        json.dump({"stamp": stamp, "jobs": jobs}, file, indent=1, sort_keys=True)
+
+
+def compare_golden(result: JobResult, golden: dict) -> list[str]:
+    """
+    Returns the differences of the output of the job to the golden output, or an empty list if it matches.
+    """
+    entry = golden["jobs"].get(result.name)
+    if entry is None:
+        return ["no golden output"]
+    if entry["digest"] == result.digest:
+        return []
+    goldenHashes = entry["files"]
+    differences = []
+    for relPath in sorted(set(goldenHashes) | set(result.hashes)):
+        goldenHash = goldenHashes.get(relPath)
+        actualHash = result.hashes.get(relPath)
+        if goldenHash == actualHash:
+            continue
+        if goldenHash is None:
+            differences.append(f"{relPath}: changed, golden output is unchanged")
+        elif actualHash is None:
+            differences.append(f"{relPath}: unchanged, golden output is changed")
+        else:
+            differences.append(f"{relPath}: output differs")
+    return differences
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def select_jobs(only: str | None) -> list[Job]:
+    names = [name.strip() for name in only.split(",") if name.strip()] if only else [*TRANSFORMS, *PIPELINES]
+    jobs = []
+    for name in names:
+        if name in TRANSFORMS:
+            jobs.append(Job(name, [TRANSFORMS[name]], False))
+        elif name in PIPELINES:
+            jobs.append(Job(name, [TRANSFORMS[step] for step in PIPELINES[name]], True))
+        elif "+" in name and all(step in TRANSFORMS for step in name.split("+")):
+            jobs.append(Job(name, [TRANSFORMS[step] for step in name.split("+")], True))
+        else:
+            raise ValueError(f"unknown transform or pipeline '{name}'. Known: {', '.join([*TRANSFORMS, *PIPELINES])}")
+    return jobs
+
+
+def print_report(results: list[JobResult], goldenStatus: dict[str, str], totalFiles: int, totalMegabytes: float) -> None:
+    print(f"Corpus: {totalFiles} files, {totalMegabytes:.1f} MB")
+    print(f"{'transform':<24} {'files':>7} {'changed':>8} {'seconds':>8} {'files/s':>9} {'MB/s':>7} {'peak MB':>8}  golden")
+    for result in results:
+        print(f"{result.name:<24} {result.files:>7} {result.changed:>8} {result.seconds:>8.2f} {result.filesPerSecond:>9.0f} "
+              f"{result.megabytesPerSecond:>7.2f} {result.peakMemory:>8.1f}  {goldenStatus.get(result.name, '-')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the codemod transforms on a synthetic C++ corpus and check their output.",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=f"Transforms: {', '.join(TRANSFORMS)}\n"
+                                            f"Pipelines: {', '.join(PIPELINES)}, or transforms joined with +, for example delete_instance+remove_return")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Size of the corpus relative to Core, Generals and GeneralsMD (default: 1). Use 10 for a 10x corpus")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the corpus (default: 1)")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="Folder to write the corpus to and to reuse it from on later runs. Default: a temporary folder")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary corpus folder")
+    parser.add_argument("--only", metavar="NAMES", help="Comma separated transforms and pipelines to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per transform, the best one counts (default: 3)")
+    parser.add_argument("--golden", metavar="FILE",
+                        help="Compare the output with the golden output in FILE. Written if it does not exist")
+    parser.add_argument("--update-golden", action="store_true", help="Write the output to the golden file instead of comparing it")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE as JSON")
+    args = parser.parse_args()
+
+    if args.scale <= 0 or args.repeat < 1:
+        parser.error("--scale must be positive and --repeat at least 1")
+    if args.update_golden and not args.golden:
+        parser.error("--update-golden requires --golden")
+    try:
+        jobs = select_jobs(args.only)
+    except ValueError as e:
+        parser.error(str(e))
+
+    corpusDir = os.path.abspath(args.corpus) if args.corpus else tempfile.mkdtemp(prefix="codemod_corpus_")
+    os.makedirs(corpusDir, exist_ok=True)
+    try:
+        begin = time.perf_counter()
+        paths = generate_corpus(corpusDir, args.seed, args.scale)
+        totalMegabytes = sum(os.path.getsize(path) for path in paths) / MB
+        print(f"Generated the corpus in {corpusDir} in {time.perf_counter() - begin:.1f} seconds")
+
+        results = []
+        for job in jobs:
+            results.append(benchmark_job(job, paths, corpusDir, args.repeat))
+            print(f"  {job.name}: {results[-1].seconds:.2f} seconds")
+    finally:
+        if not args.corpus and not args.keep:
+            shutil.rmtree(corpusDir, ignore_errors=True)
+
+    stamp = corpus_stamp(args.seed, args.scale)
+    goldenStatus = {}
+    failed = False
+    if args.golden:
+        golden = load_golden(args.golden)
+        if golden is not None and golden.get("stamp") != stamp and not args.update_golden:
+            print(f"Error: {args.golden} was written for the corpus {golden.get('stamp')}, not for {stamp}")
+            return 1
+        if golden is None or args.update_golden:
+            save_golden(args.golden, stamp, results, golden)
+            goldenStatus = {result.name: "written" for result in results}
+        else:
+            for result in results:
+                differences = compare_golden(result, golden)
+                goldenStatus[result.name] = "MISMATCH" if differences else "ok"
+                if differences:
+                    failed = True
+                    print(f"Output of {result.name} differs from the golden output in {len(differences)} files:")
+                    for difference in differences[:20]:
+                        print(f"  {difference}")
+                    if len(differences) > 20:
+                        print(f"  ... and {len(differences) - 20} more")
+
+    print_report(results, goldenStatus, len(paths), totalMegabytes)
+
+    if args.json:
+        report = {
+            "corpus": {**stamp, "files": len(paths), "megabytes": round(totalMegabytes, 3)},
+            "jobs": [{
+                "name": result.name,
+                "files": result.files,
+                "megabytes": round(result.megabytes, 3),
+                "changed": result.changed,
+                "seconds": round(result.seconds, 4),
+                "files_per_second": round(result.filesPerSecond, 1),
+                "megabytes_per_second": round(result.megabytesPerSecond, 3),
+                "peak_memory_megabytes": round(result.peakMemory, 2),
+                "digest": result.digest,
+                "golden": goldenStatus.get(result.name),
+            } for result in results],
+        }
+        with open(args.json, 'w', encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,488 @@
+# Created with python 3.11.4
+
+# This module models the source lists of a CMakeLists.txt. The source lists of this project name one file
+# per line, and files that are not (or no longer) built stay in the list as commented out lines:
+#
+#   set(GAMEENGINE_SRC
+#       Include/Common/ActionManager.h
+#   #    Include/Common/ArchiveFile.h
+#   )
+#
+# Entries are matched by their exact path, so that editing Include/Common/Radar.h never touches
+# Include/Common/RadarUpgrade.h or Include/W3DDevice/Common/W3DRadar.h.
+#
+# The module also maintains a persistent index of the source lists of all CMakeLists.txt of the project:
+# which targets build a file, and which files are commented out, missing or not listed at all.
+# A CMakeLists.txt is only parsed again if it changed.
+#
+# Usage:
+#   python cmake_sources.py owners GeneralsMD/Code/GameEngine/Source/Common/Recorder.cpp
+#   python cmake_sources.py commented [--existing] [--under Core]
+#   python cmake_sources.py missing
+#   python cmake_sources.py unlisted [--under GeneralsMD/Code/GameEngine]
+#
+# Other scripts use load_source_index() to query the index.
+
+import argparse
+import json
+import os
+import re
+from typing import NamedTuple
+
+from codemod_io import SourceText, read_source, write_if_changed, write_source_if_changed
+from codemod_manifest import hash_content
+from compile_db import project_dir
+
+INDEX_FORMAT_VERSION = 1
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+default_index_path = os.path.join(current_dir, ".cmake_sources.json")
+
+SOURCE_ROOTS = ["Core", "Generals", "GeneralsMD", "Dependencies"]
+SOURCE_EXTENSIONS = (".h", ".hpp", ".inl", ".c", ".cpp", ".cc", ".cxx")
+
+# A line with a single path, optionally quoted, commented out and followed by a comment.
+RE_SOURCE_LINE = re.compile(r'^[ \t]*(#*)[ \t]*"?([^\s#()${}"]+\.[A-Za-z0-9]+)"?[ \t]*(?:#.*)?$')
+RE_COMMAND_BEGIN = re.compile(r'^[ \t]*(set|list|target_sources|add_library|add_executable|target_link_libraries)[ \t]*\(', re.IGNORECASE)
+RE_ARGUMENT = re.compile(r'"[^"]*"|[^\s"()]+')
+RE_VARIABLE = re.compile(r'^\$\{(\w+)\}$')
+
+# Keywords of the parsed commands that are not sources, libraries or names.
+COMMAND_KEYWORDS = {"PRIVATE", "PUBLIC", "INTERFACE", "STATIC", "SHARED", "MODULE", "OBJECT", "WIN32",
+                    "MACOSX_BUNDLE", "EXCLUDE_FROM_ALL", "IMPORTED", "GLOBAL", "APPEND", "ALIAS"}
+
+
+class SourceLine(NamedTuple):
+    index: int          # 0 based line index
+    entry: str          # Path as listed, relative to the folder of the CMakeLists.txt
+    commented: bool
+
+
+def parse_source_line(line: str) -> tuple[str, bool] | None:
+    """
+    Returns the entry of a source list line and whether it is commented out, or None if the line is not a source entry.
+    """
+    match = RE_SOURCE_LINE.match(line.rstrip("\r\n"))
+    if match is None:
+        return None
+    return match.group(2), bool(match.group(1))
+
+
+class CmakeListsFile:
+    """
+    The lines of a CMakeLists.txt with an index of its source entries. Edits change the lines in memory
+    until save() is called.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source: SourceText = read_source(path)
+        self.lines: list[str] = self.source.lines()
+        self.entries: dict[str, list[SourceLine]] = {}
+        for index, line in enumerate(self.lines):
+            parsed = parse_source_line(line)
+            if parsed is not None:
+                self.entries.setdefault(parsed[0], []).append(SourceLine(index, parsed[0], parsed[1]))
+
+    def find(self, entry: str) -> list[SourceLine]:
+        return self.entries.get(entry, [])
+
+    def comment(self, entry: str) -> int:
+        """
+        Comments out the active lines of an entry. Returns the number of changed lines.
+        """
+        changed = 0
+        for number, sourceLine in enumerate(self.find(entry)):
+            if not sourceLine.commented:
+                self.lines[sourceLine.index] = "#" + self.lines[sourceLine.index]
+                self.entries[entry][number] = sourceLine._replace(commented=True)
+                changed += 1
+        return changed
+
+    def uncomment(self, entry: str) -> int:
+        """
+        Removes the first '#' of the commented out lines of an entry. Returns the number of changed lines.
+        """
+        changed = 0
+        for number, sourceLine in enumerate(self.find(entry)):
+            if sourceLine.commented:
+                self.lines[sourceLine.index] = self.lines[sourceLine.index].replace("#", "", 1)
+                self.entries[entry][number] = sourceLine._replace(commented=parse_source_line(self.lines[sourceLine.index])[1])
+                changed += 1
+        return changed
+
+    def text(self) -> str:
+        return "".join(self.lines)
+
+    def save(self) -> bool:
+        return write_source_if_changed(self.path, self.text(), self.source)
+
+
+# Index
+
+
+class ListEntry(NamedTuple):
+    path: str           # File relative to the project folder, with '/' separators
+    cmakeFile: str      # CMakeLists.txt that lists the file, relative to the project folder
+    line: int           # 1 based line number
+    commented: bool
+    listName: str       # Variable or target whose source list contains the entry
+
+
+def _split_comment(text: str) -> tuple[str, str]:
+    inQuotes = False
+    for index, ch in enumerate(text):
+        if ch == '"':
+            inQuotes = not inQuotes
+        elif ch == '#' and not inQuotes:
+            return text[:index], text[index:]
+    return text, ""
+
+
+def parse_commands(lines: list[str]) -> list[list]:
+    """
+    Returns the set, list, target_sources, add_library, add_executable and target_link_libraries commands of
+    a CMakeLists.txt as [name, arguments], where each argument is [text, commented, line number].
+    Commented out source lines inside of a command are returned as commented arguments.
+    """
+    commands = []
+    index = 0
+    while index < len(lines):
+        match = RE_COMMAND_BEGIN.match(lines[index])
+        if match is None:
+            index += 1
+            continue
+        arguments = []
+        depth = 1
+        text = lines[index][match.end():]
+        while True:
+            code, comment = _split_comment(text)
+            for token in re.findall(r'"[^"]*"|\(|\)|[^\s"()]+', code):
+                if token == "(":
+                    depth += 1
+                elif token == ")":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                else:
+                    arguments.append([token.strip('"'), False, index + 1])
+            if not code.strip() and comment:
+                parsed = parse_source_line(text)
+                if parsed is not None and parsed[1]:
+                    arguments.append([parsed[0], True, index + 1])
+            if depth == 0 or index + 1 >= len(lines):
+                break
+            index += 1
+            text = lines[index]
+        commands.append([match.group(1).lower(), arguments])
+        index += 1
+    return commands
+
+
+class CmakeSourceIndex:
+    """
+    Source lists of all CMakeLists.txt of the project. Files are identified by their path relative to the
+    project folder with '/' separators.
+    """
+
+    def __init__(self, path: str = default_index_path, root: str = project_dir):
+        self.path = path
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.files: dict[str, list] = {}        # CMakeLists.txt -> [mtime_ns, size, hash, commands]
+        self.dirty = False
+        self.parsedCount = 0
+        self._entries: list[ListEntry] | None = None
+        self._owners: dict[str, list[str]] | None = None
+        self._kinds: dict[str, str] = {}        # target -> STATIC, SHARED, INTERFACE, EXECUTABLE, ...
+        self._links: dict[str, list[str]] = {}  # target -> libraries it links
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != INDEX_FORMAT_VERSION or data.get("root") != self.root:
+            return
+        self.files = data.get("files", {})
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        data = {"format": INDEX_FORMAT_VERSION, "root": self.root, "files": self.files}
+        write_if_changed(self.path, json.dumps(data, sort_keys=True), encoding="utf-8", newline="\n")
+        self.dirty = False
+
+    def key(self, path: str) -> str:
+        return os.path.relpath(os.path.normpath(os.path.join(self.root, path)), self.root).replace(os.sep, "/")
+
+    def abspath(self, key: str) -> str:
+        return os.path.normpath(os.path.join(self.root, key))
+
+    def update(self) -> bool:
+        """
+        Brings the index up to date with the CMakeLists.txt on disk. Returns True if any of them changed.
+        """
+        self.parsedCount = 0
+        found = []
+        for root in SOURCE_ROOTS:
+            for subdir, _, files in os.walk(os.path.join(self.root, root)):
+                if "CMakeLists.txt" in files:
+                    found.append(self.key(os.path.join(subdir, "CMakeLists.txt")))
+
+        changed = False
+        for key in [key for key in self.files if key not in found]:
+            del self.files[key]
+            changed = True
+        for key in found:
+            path = self.abspath(key)
+            st = os.stat(path)
+            entry = self.files.get(key)
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                continue
+            with open(path, 'rb') as file:
+                contentHash = hash_content(file.read())
+            if entry is not None and entry[2] == contentHash:
+                entry[0], entry[1] = st.st_mtime_ns, st.st_size
+                self.dirty = True
+                continue
+            self.files[key] = [st.st_mtime_ns, st.st_size, contentHash, parse_commands(read_source(path).lines())]
+            self.parsedCount += 1
+            changed = True
+
+        if changed:
+            self.dirty = True
+            self._entries = None
+            self._owners = None
+        return changed
+
+    # Queries
+
+    def _resolve(self, cmakeKey: str, variables: dict[str, dict[str, list]], argument: list, depth: int = 0) -> list[list]:
+        """
+        Returns the source arguments that an argument stands for, expanding ${VAR} with the variables of the
+        same CMakeLists.txt or of the folders above it.
+        """
+        text = argument[0]
+        match = RE_VARIABLE.match(text)
+        if match is None:
+            return [argument]
+        if depth > 8:
+            return []
+        folder = os.path.dirname(cmakeKey)
+        while True:
+            scope = variables.get(folder, {})
+            if match.group(1) in scope:
+                result = []
+                for value in scope[match.group(1)]:
+                    result.extend(self._resolve(cmakeKey, variables, value, depth + 1))
+                return result
+            if not folder:
+                return []
+            folder = os.path.dirname(folder)
+
+    def _build(self) -> None:
+        variables: dict[str, dict[str, list]] = {}         # folder -> variable -> arguments
+        for cmakeKey, entry in self.files.items():
+            scope = variables.setdefault(os.path.dirname(cmakeKey), {})
+            for name, arguments in entry[3]:
+                if name == "set" and arguments:
+                    scope[arguments[0][0]] = [[*a, arguments[0][0]] for a in arguments[1:]]
+                elif name == "list" and len(arguments) > 1 and arguments[0][0].upper() == "APPEND":
+                    scope.setdefault(arguments[1][0], []).extend([*a, arguments[1][0]] for a in arguments[2:])
+
+        entries: dict[tuple, ListEntry] = {}
+        kinds: dict[str, str] = {}
+        sources: dict[str, set[str]] = {}
+        links: dict[str, list[str]] = {}
+        for cmakeKey, entry in self.files.items():
+            folder = os.path.dirname(cmakeKey)
+            for name, arguments in entry[3]:
+                if not arguments:
+                    continue
+                resolvedName = self._resolve(cmakeKey, variables, arguments[0])
+                target = resolvedName[0][0] if resolvedName else arguments[0][0]
+                if name == "add_library":
+                    kinds[target] = next((a[0] for a in arguments[1:2] if a[0] in COMMAND_KEYWORDS), "STATIC")
+                elif name == "add_executable":
+                    kinds[target] = "EXECUTABLE"
+                elif name == "target_link_libraries":
+                    links.setdefault(target, []).extend(a[0] for a in arguments[1:] if a[0] not in COMMAND_KEYWORDS)
+                    continue
+                if name in ("set", "list"):
+                    listName = arguments[0][0] if name == "set" else arguments[1][0] if len(arguments) > 1 else ""
+                    values = arguments[1:] if name == "set" else arguments[2:]
+                    values = [[*a, listName] for a in values]
+                else:
+                    values = []
+                    for argument in arguments[1:]:
+                        values.extend(self._resolve(cmakeKey, variables, [*argument, target]))
+                for value in values:
+                    text, commented, line, listName = value[0], value[1], value[2], value[3] if len(value) > 3 else target
+                    text = text.replace("${CMAKE_CURRENT_SOURCE_DIR}/", "")
+                    if text in COMMAND_KEYWORDS or "$" in text or "." not in os.path.basename(text):
+                        continue
+                    path = self.key(os.path.join(folder, text))
+                    if name not in ("set", "list") and not commented:
+                        sources.setdefault(target, set()).add(path)
+                    if name in ("set", "list") or not commented:
+                        entries.setdefault((path, cmakeKey, line), ListEntry(path, cmakeKey, line, commented, listName))
+
+        self._kinds = kinds
+        self._links = links
+
+        # Sources of INTERFACE libraries are compiled by the targets that link them.
+        owners: dict[str, set[str]] = {}
+        for target, files in sources.items():
+            builders = {target}
+            if kinds.get(target) == "INTERFACE":
+                builders = set(self._consumers(target)) or {target}
+            for path in files:
+                owners.setdefault(path, set()).update(builders)
+
+        self._entries = sorted(entries.values())
+        self._owners = {path: sorted(targets) for path, targets in owners.items()}
+
+    def _consumers(self, target: str) -> list[str]:
+        consumers = set()
+        pending = [t for t, libraries in self._links.items() if target in libraries]
+        seen = set(pending)
+        while pending:
+            consumer = pending.pop()
+            if self._kinds.get(consumer) != "INTERFACE":
+                consumers.add(consumer)
+                continue
+            for t, libraries in self._links.items():
+                if consumer in libraries and t not in seen:
+                    seen.add(t)
+                    pending.append(t)
+        return sorted(consumers)
+
+    def entries(self) -> list[ListEntry]:
+        if self._entries is None:
+            self._build()
+        return self._entries
+
+    def owners_of(self, path: str) -> list[str]:
+        """
+        Returns the targets that compile a file, or the INTERFACE libraries that list it if no target links them.
+        """
+        if self._owners is None:
+            self._build()
+        return self._owners.get(self.key(path), [])
+
+    def kind_of(self, target: str) -> str | None:
+        """
+        Returns the kind of a target, like STATIC, INTERFACE or EXECUTABLE, or None if no CMakeLists.txt adds it.
+        """
+        if self._owners is None:
+            self._build()
+        return self._kinds.get(target)
+
+    def consumers_of(self, target: str) -> list[str]:
+        """
+        Returns the targets that link a target and compile sources, through any INTERFACE libraries in between.
+        """
+        if self._owners is None:
+            self._build()
+        return self._consumers(target)
+
+    def commented_entries(self, existing: bool = False) -> list[ListEntry]:
+        """
+        Returns the commented out entries. With existing, only those of files that exist on disk.
+        """
+        return [e for e in self.entries() if e.commented and (not existing or os.path.isfile(self.abspath(e.path)))]
+
+    def missing_entries(self) -> list[ListEntry]:
+        """
+        Returns the entries that are not commented out, but whose file does not exist.
+        """
+        return [e for e in self.entries() if not e.commented and not os.path.isfile(self.abspath(e.path))]
+
+    def unlisted_files(self, roots: list[str]) -> list[str]:
+        """
+        Returns the source files below the roots that no source list names, not even commented out.
+        """
+        listed = {e.path.casefold() for e in self.entries()}
+        unlisted = []
+        for root in roots:
+            for subdir, _, files in os.walk(self.abspath(root)):
+                for file in files:
+                    if file.lower().endswith(SOURCE_EXTENSIONS):
+                        key = self.key(os.path.join(subdir, file))
+                        if key.casefold() not in listed:
+                            unlisted.append(key)
+        return sorted(unlisted)
+
+
+def load_source_index(path: str = default_index_path, quiet: bool = True) -> CmakeSourceIndex:
+    """
+    Returns the source index, brought up to date with the CMakeLists.txt on disk.
+    """
+    index = CmakeSourceIndex(path)
+    changed = index.update()
+    index.save()
+    if not quiet:
+        state = "updated" if changed else "up to date"
+        print(f"Source index {state}: {len(index.files)} CMakeLists.txt, {index.parsedCount} parsed.")
+    return index
+
+
+def print_entries(entries: list[ListEntry]) -> None:
+    for entry in entries:
+        print(f"{entry.cmakeFile}:{entry.line}: {entry.path} ({entry.listName})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the source lists of the CMakeLists.txt of the project.")
+    parser.add_argument("--index", default=default_index_path,
+                        help=f"Path of the stored index (default: {default_index_path})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("update", help="Bring the stored index up to date")
+
+    ownersParser = subparsers.add_parser("owners", help="List the targets that compile FILE")
+    ownersParser.add_argument("files", nargs="+", metavar="FILE")
+
+    commentedParser = subparsers.add_parser("commented", help="List the commented out entries")
+    commentedParser.add_argument("--existing", action="store_true", help="Only list entries of files that exist")
+    commentedParser.add_argument("--under", action="append", default=[], metavar="PATH", help="Only list files below PATH")
+
+    missingParser = subparsers.add_parser("missing", help="List the entries of files that do not exist")
+    missingParser.add_argument("--under", action="append", default=[], metavar="PATH", help="Only list files below PATH")
+
+    unlistedParser = subparsers.add_parser("unlisted", help="List the source files that no source list names")
+    unlistedParser.add_argument("--under", action="append", default=[], metavar="PATH",
+                                help=f"Folder to search (default: {', '.join(SOURCE_ROOTS[:3])})")
+
+    args = parser.parse_args()
+    index = load_source_index(args.index, quiet=False)
+
+    def is_below(path: str) -> bool:
+        return not args.under or any(path.startswith(index.key(p).rstrip("/") + "/") for p in args.under)
+
+    if args.command == "owners":
+        for path in args.files:
+            owners = index.owners_of(path)
+            print(f"{index.key(path)}: {', '.join(owners) if owners else 'no target'}")
+
+    elif args.command == "commented":
+        entries = [e for e in index.commented_entries(args.existing) if is_below(e.path)]
+        print_entries(entries)
+        print(f"{len(entries)} commented out entr{'y' if len(entries) == 1 else 'ies'}.")
+
+    elif args.command == "missing":
+        entries = [e for e in index.missing_entries() if is_below(e.path)]
+        print_entries(entries)
+        print(f"{len(entries)} entr{'y' if len(entries) == 1 else 'ies'} of missing files.")
+
+    elif args.command == "unlisted":
+        files = index.unlisted_files(args.under or SOURCE_ROOTS[:3])
+        for path in files:
+            print(f"  {path}")
+        print(f"{len(files)} unlisted file(s).")
+
+
+if __name__ == "__main__":
+    main()
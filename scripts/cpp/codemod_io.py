@@ -0,0 +1,238 @@
+# Created with python 3.11.4
+
+# This module provides the file reading and writing helpers shared by the codemod scripts.
+# Files are only written when their content actually changed, so that running a no-op
+# cleanup does not touch the timestamps of the source files and force a full rebuild.
+
+import codecs
+import difflib
+import mmap
+import os
+import re
+import tempfile
+from typing import NamedTuple
+
+
+class SourceText(NamedTuple):
+    text: str       # Decoded text with '\n' line breaks
+    encoding: str   # Encoding of the file. 'utf-8-sig' if the file starts with a byte order mark
+    newline: str    # Line break style of the file, '\r\n', '\r' or '\n'. The most common one if the file mixes them
+    lineEndings: tuple[str, ...] | None = None  # Original line break of every line if the file mixes them, else None
+
+    def lines(self) -> list[str]:
+        """
+        Returns the lines of the text including their line breaks. Splits at line feeds only, like file.readlines() does.
+        """
+        return RE_LINE.findall(self.text)
+
+
+RE_LINE = re.compile(r'[^\n]*\n|[^\n]+')
+RE_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+# Line break style stored in the format cache for files that mix several styles
+MIXED_NEWLINES = "mixed"
+
+# Encodings tried in order for files without a byte order mark. latin-1 decodes any byte sequence.
+FALLBACK_ENCODINGS = ("utf-8", "cp1252", "latin-1")
+
+UTF16_BOMS = (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def bom_encoding(data: bytes) -> str | None:
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if data.startswith(UTF16_BOMS):
+        return "utf-16"
+    return None
+
+
+def decode_source(data: bytes, encoding: str | None = None) -> tuple[str, str]:
+    """
+    Decode data with the given encoding, or with the first encoding that fits if no encoding is given
+    or the given one does not fit. Returns (text, encoding).
+    """
+    if encoding is not None:
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            pass
+    bomEncoding = bom_encoding(data)
+    if bomEncoding is not None:
+        return data.decode(bomEncoding), bomEncoding
+    for fallback in FALLBACK_ENCODINGS[:-1]:
+        try:
+            return data.decode(fallback), fallback
+        except UnicodeDecodeError:
+            continue
+    return data.decode(FALLBACK_ENCODINGS[-1]), FALLBACK_ENCODINGS[-1]
+
+
+def split_line_endings(text: str) -> tuple[str, str, tuple[str, ...] | None]:
+    """
+    Converts all line breaks of text to '\n'. A lone carriage return counts as a line break, like in text mode files.
+    Returns (converted text, line break style, line break of every line if the text mixes styles, else None).
+    """
+    if "\r" not in text:
+        return text, "\n", None
+    lineEndings = RE_LINE_BREAK.findall(text)
+    counts: dict[str, int] = {}
+    for lineEnding in lineEndings:
+        counts[lineEnding] = counts.get(lineEnding, 0) + 1
+    newline = max(counts, key=counts.get)
+    if len(counts) == 1:
+        return text.replace(newline, "\n"), newline, None
+    return RE_LINE_BREAK.sub("\n", text), newline, tuple(lineEndings)
+
+
+def file_contains(path: str, needles: list[bytes]) -> bool:
+    """
+    Returns True if the raw bytes of the file contain any of the needles, without decoding the file.
+    The file is memory mapped, so files without a match are never copied into Python objects.
+    Files with a UTF-16 byte order mark always count as a possible match, because ASCII needles
+    cannot be searched in their bytes.
+    """
+    with open(path, 'rb') as file:
+        try:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return False # Empty files cannot be mapped
+        with view:
+            if view[:2] in UTF16_BOMS:
+                return True
+            return any(view.find(needle) >= 0 for needle in needles)
+
+
+def read_source(path: str, formatCache=None) -> SourceText:
+    """
+    Read a source file, detecting its encoding and line break style so that it can be written back the same way.
+    If a format cache (a CodemodManifest) is given, the encoding and line break style sniffed on an earlier run
+    for the same content are reused, and newly sniffed ones are stored in it.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    cached = formatCache.get_source_format(path, data) if formatCache is not None else None
+    if cached is not None:
+        text, encoding = decode_source(data, cached[0])
+        if encoding == cached[0] and cached[1] != MIXED_NEWLINES:
+            if cached[1] != "\n":
+                text = text.replace(cached[1], "\n")
+            return SourceText(text, encoding, cached[1])
+    else:
+        text, encoding = decode_source(data)
+
+    text, newline, lineEndings = split_line_endings(text)
+    if formatCache is not None:
+        formatCache.set_source_format(path, encoding, newline if lineEndings is None else MIXED_NEWLINES, data)
+    return SourceText(text, encoding, newline, lineEndings)
+
+
+def restore_line_endings(text: str, source: SourceText) -> str:
+    """
+    Returns text with the original line break of every line that is unchanged from the source, which mixes
+    line break styles. Changed and new lines get the most common line break of the source.
+    """
+    oldLines = source.text.split("\n")
+    newLines = text.split("\n")
+    newEndings = [source.newline] * (len(newLines) - 1)
+    matcher = difflib.SequenceMatcher(None, oldLines, newLines, autojunk=False)
+    for tag, oldBegin, oldEnd, newBegin, newEnd in matcher.get_opcodes():
+        if tag != "equal":
+            continue
+        for offset in range(oldEnd - oldBegin):
+            oldIndex = oldBegin + offset
+            newIndex = newBegin + offset
+            if oldIndex < len(source.lineEndings) and newIndex < len(newEndings):
+                newEndings[newIndex] = source.lineEndings[oldIndex]
+    parts = []
+    for index, line in enumerate(newLines):
+        parts.append(line)
+        if index < len(newEndings):
+            parts.append(newEndings[index])
+    return "".join(parts)
+
+
+def encode_source(text: str, source: SourceText) -> bytes:
+    """
+    Encode text with the encoding and line break style of the source it was read from.
+    """
+    if source.lineEndings is not None:
+        return restore_line_endings(text, source).encode(source.encoding)
+    return encode_text(text, source.encoding, source.newline)
+
+
+def write_source_if_changed(path: str, text: str, source: SourceText) -> bool:
+    """
+    Write text with the encoding and line break style of the source it was read from, only if the content changed.
+    Lines of a file with mixed line break styles keep their own line break if they are unchanged.
+    Unchanged text is recognized without encoding it or reading the file again.
+    Returns True if the file was written.
+    """
+    if text == source.text:
+        return False
+    return write_bytes_if_changed(path, encode_source(text, source))
+
+
+def encode_text(text: str, encoding: str = "cp1252", newline: str | None = None, errors: str = "strict") -> bytes:
+    """
+    Encode text the same way a text mode file opened with the given newline argument would write it.
+    """
+    if newline is None:
+        newline = os.linesep
+    if newline not in ("", "\n"):
+        text = text.replace("\n", newline)
+    return text.encode(encoding, errors)
+
+
+def write_bytes_if_changed(path: str, data: bytes) -> bool:
+    """
+    Write data to path only if it differs from the current file content.
+    The write goes through a temporary file in the same folder that then replaces the
+    original file, so an interrupted run never leaves a half written source file behind.
+    Returns True if the file was written.
+    """
+    try:
+        with open(path, 'rb') as file:
+            if file.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    folder, name = os.path.split(os.path.abspath(path))
+    fd, tempPath = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        if os.path.exists(path):
+            os.chmod(tempPath, os.stat(path).st_mode & 0o7777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tempPath, 0o666 & ~umask)
+        os.replace(tempPath, path)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+    return True
+
+
+def write_if_changed(path: str, text: str, encoding: str = "cp1252", newline: str | None = None, errors: str = "strict") -> bool:
+    """
+    Write text to path only if the encoded result differs from the current file content.
+    Returns True if the file was written.
+    """
+    return write_bytes_if_changed(path, encode_text(text, encoding, newline, errors))
+
+
+def write_lines_if_changed(path: str, lines: list[str], encoding: str = "cp1252", newline: str | None = None) -> bool:
+    """
+    Write lines to path only if the encoded result differs from the current file content.
+    Returns True if the file was written.
+    """
+    return write_if_changed(path, "".join(lines), encoding, newline)
+
+
+def print_change_summary(changedCount: int, totalCount: int) -> None:
+    print(f"Changed {changedCount} of {totalCount} file(s).")
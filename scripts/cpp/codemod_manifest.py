@@ -0,0 +1,155 @@
+# Created with python 3.11.4
+
+# This module provides a persisted manifest that remembers which codemod transforms are known
+# to be no-ops on which file contents. A file is only processed again if its content changed or
+# the version of the transform changed. Bump the version of a transform whenever its output changes.
+# The manifest also caches the encoding and line break style sniffed for each content.
+
+import hashlib
+import json
+import os
+
+from codemod_io import write_if_changed
+
+MANIFEST_FORMAT_VERSION = 2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+default_manifest_path = os.path.join(current_dir, ".codemod_manifest.json")
+
+
+def hash_content(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class CodemodManifest:
+    """
+    Maps content hashes to the transforms (with their versions) that are known to leave such content unchanged.
+    A stat cache maps file paths to (mtime, size, hash) so that unmodified files do not need to be read again.
+    """
+
+    def __init__(self, path: str = default_manifest_path):
+        self.path = path
+        self.clean: dict[str, dict[str, list]] = {}
+        self.stats: dict[str, list] = {}
+        self.formats: dict[str, list] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != MANIFEST_FORMAT_VERSION:
+            return
+        self.clean = data.get("clean", {})
+        self.stats = data.get("stats", {})
+        self.formats = data.get("formats", {})
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        # Drop the entries of contents that no file has anymore.
+        liveHashes = {entry[2] for entry in self.stats.values()}
+        self.clean = {h: transforms for h, transforms in self.clean.items() if h in liveHashes}
+        self.formats = {h: sourceFormat for h, sourceFormat in self.formats.items() if h in liveHashes}
+        data = {
+            "format": MANIFEST_FORMAT_VERSION,
+            "clean": self.clean,
+            "stats": self.stats,
+            "formats": self.formats,
+        }
+        write_if_changed(self.path, json.dumps(data, sort_keys=True), encoding="utf-8", newline="\n")
+        self.dirty = False
+
+    def get_hash(self, path: str, data: bytes | None = None) -> str:
+        """
+        Returns the content hash of a file. Reuses the cached hash if the file size and mtime did not change.
+        If the caller already read the file, its content can be given as data so that it is not read again.
+        """
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        entry = self.stats.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        if data is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+        contentHash = hash_content(data)
+        self.stats[key] = [st.st_mtime_ns, st.st_size, contentHash]
+        self.dirty = True
+        return contentHash
+
+    def is_clean(self, contentHash: str, transform: str, version: int) -> bool:
+        entry = self.clean.get(contentHash, {}).get(transform)
+        return entry is not None and entry[0] == version
+
+    def get_note(self, contentHash: str, transform: str) -> str:
+        """
+        Returns the note that was recorded together with the clean state, for example the reason why nothing changed.
+        """
+        entry = self.clean.get(contentHash, {}).get(transform)
+        return entry[1] if entry is not None else ""
+
+    def mark_clean(self, contentHash: str, transform: str, version: int, note: str = "") -> None:
+        self.clean.setdefault(contentHash, {})[transform] = [version, note]
+        self.dirty = True
+
+    def get_source_format(self, path: str, data: bytes | None = None) -> tuple[str, str] | None:
+        """
+        Returns the (encoding, newline) sniffed earlier for the current content of a file, or None.
+        data is the content of the file if the caller already read it.
+        """
+        entry = self.formats.get(self.get_hash(path, data))
+        return (entry[0], entry[1]) if entry is not None else None
+
+    def set_source_format(self, path: str, encoding: str, newline: str, data: bytes | None = None) -> None:
+        contentHash = self.get_hash(path, data)
+        if self.formats.get(contentHash) != [encoding, newline]:
+            self.formats[contentHash] = [encoding, newline]
+            self.dirty = True
+
+
+class NullManifest(CodemodManifest):
+    """
+    Manifest that never skips anything and never persists. Used when the manifest is disabled.
+    """
+
+    def __init__(self):
+        self.path = ""
+        self.clean = {}
+        self.stats = {}
+        self.formats = {}
+        self.dirty = False
+
+    def get_hash(self, path: str, data: bytes | None = None) -> str:
+        return ""
+
+    def is_clean(self, contentHash: str, transform: str, version: int) -> bool:
+        return False
+
+    def mark_clean(self, contentHash: str, transform: str, version: int, note: str = "") -> None:
+        pass
+
+    def get_source_format(self, path: str, data: bytes | None = None) -> tuple[str, str] | None:
+        return None
+
+    def set_source_format(self, path: str, encoding: str, newline: str, data: bytes | None = None) -> None:
+        pass
+
+    def save(self) -> None:
+        pass
+
+
+def add_manifest_arguments(parser) -> None:
+    parser.add_argument("--manifest", default=default_manifest_path,
+                        help=f"Path of the manifest of files known to be clean (default: {default_manifest_path})")
+    parser.add_argument("--no-manifest", action="store_true",
+                        help="Process all files, ignoring and not updating the manifest")
+
+
+def open_manifest(args) -> CodemodManifest:
+    if args.no_manifest:
+        return NullManifest()
+    return CodemodManifest(args.manifest)
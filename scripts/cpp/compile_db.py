@@ -0,0 +1,200 @@
+# Created with python 3.11.4
+
+# This module reads the compilation database (compile_commands.json) that CMake writes with
+# CMAKE_EXPORT_COMPILE_COMMANDS=ON, which all presets enable. It extracts the include paths,
+# forced includes and macro definitions of every translation unit, for MSVC and GCC style command lines.
+
+import glob
+import json
+import os
+import re
+from typing import NamedTuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.normpath(os.path.join(current_dir, "..", ".."))
+
+# Options that take a path as the next argument or directly attached to them.
+INCLUDE_DIR_OPTIONS = ("-I", "/I", "-isystem", "-iquote", "-idirafter", "/external:I", "-external:I", "-imsvc")
+FORCED_INCLUDE_OPTIONS = ("-include", "/FI", "-FI")
+DEFINE_OPTIONS = ("-D", "/D")
+OUTPUT_OPTIONS = ("-o", "/Fo", "-Fo")
+
+# Drivers that accept options starting with '/'. For any other driver, such arguments are absolute paths.
+MSVC_DRIVERS = ("cl", "clang-cl")
+
+# CMake writes the objects of a target to <build>/<folder>/CMakeFiles/<target>.dir/
+RE_TARGET_DIR = re.compile(r'CMakeFiles[/\\]([^/\\]+)\.dir[/\\]')
+
+
+class CompileCommand(NamedTuple):
+    file: str                   # Absolute, normalized path of the translation unit
+    directory: str              # Working directory of the compiler
+    includeDirs: tuple          # Absolute, normalized include directories in search order
+    forcedIncludes: tuple       # Absolute paths of forced includes (-include, /FI), for example precompiled headers
+    defines: tuple              # Macro definitions as "NAME" or "NAME=VALUE"
+    arguments: tuple            # Full argument list of the compiler call
+    output: str = ""            # Object file, relative to directory, or "" if the command does not name it
+
+
+def add_compile_db_arguments(parser) -> None:
+    parser.add_argument("--compile-commands", metavar="FILE",
+                        help="Path of compile_commands.json (default: the most recent one in build/*/)")
+
+
+def find_compile_commands(path: str | None = None) -> str | None:
+    """
+    Returns the given compile_commands.json or, if no path is given, the most recently written one of the builds
+    in the build folder of the project. Returns None if there is none.
+    """
+    if path:
+        if os.path.isdir(path):
+            path = os.path.join(path, "compile_commands.json")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"compile_commands.json not found: {path}")
+        return os.path.abspath(path)
+
+    candidates = glob.glob(os.path.join(project_dir, "build", "*", "compile_commands.json"))
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def _split_command(command: str) -> list[str]:
+    """
+    Splits a command line at unquoted whitespace and removes the quotes, like the Windows command line parser.
+    Backslashes are kept, because commands written for Windows use them as path separators, except that \\"
+    stands for a literal quote.
+    """
+    arguments = []
+    current = []
+    inQuotes = False
+    hasArgument = False
+    index = 0
+    while index < len(command):
+        ch = command[index]
+        if ch == '\\' and command.startswith('"', index + 1):
+            current.append('"')
+            hasArgument = True
+            index += 2
+            continue
+        if ch == '"':
+            inQuotes = not inQuotes
+            hasArgument = True
+        elif ch.isspace() and not inQuotes:
+            if hasArgument:
+                arguments.append("".join(current))
+                current = []
+                hasArgument = False
+        else:
+            current.append(ch)
+            hasArgument = True
+        index += 1
+    if hasArgument:
+        arguments.append("".join(current))
+    return arguments
+
+
+def _is_msvc_driver(arguments: list[str]) -> bool:
+    if not arguments:
+        return False
+    name = os.path.basename(arguments[0].replace("\\", "/")).lower()
+    if name.endswith(".exe"):
+        name = name[:-len(".exe")]
+    return name in MSVC_DRIVERS
+
+
+def _option_value(arguments: list[str], index: int, options: tuple, msvc: bool) -> tuple[str | None, int]:
+    """
+    Returns (value, number of consumed arguments) if arguments[index] is one of the options, otherwise (None, 0).
+    Options starting with '/' only count for MSVC style drivers.
+    """
+    argument = arguments[index]
+    for option in options:
+        if option.startswith("/") and not msvc:
+            continue
+        if argument == option:
+            if index + 1 < len(arguments):
+                return arguments[index + 1], 2
+            return None, 1
+        if argument.startswith(option):
+            return argument[len(option):], 1
+    return None, 0
+
+
+def _absolute(path: str, directory: str) -> str:
+    return os.path.normpath(os.path.join(directory, path))
+
+
+def parse_compile_command(entry: dict) -> CompileCommand:
+    directory = entry.get("directory", "")
+    if "arguments" in entry:
+        arguments = list(entry["arguments"])
+    else:
+        arguments = _split_command(entry["command"])
+
+    includeDirs = []
+    forcedIncludes = []
+    defines = []
+    output = entry.get("output", "")
+    msvc = _is_msvc_driver(arguments)
+    index = 1
+    while index < len(arguments):
+        value, consumed = _option_value(arguments, index, INCLUDE_DIR_OPTIONS, msvc)
+        if consumed:
+            if value:
+                includeDirs.append(_absolute(value, directory))
+            index += consumed
+            continue
+        value, consumed = _option_value(arguments, index, FORCED_INCLUDE_OPTIONS, msvc)
+        if consumed:
+            if value:
+                forcedIncludes.append(_absolute(value, directory))
+            index += consumed
+            continue
+        value, consumed = _option_value(arguments, index, DEFINE_OPTIONS, msvc)
+        if consumed:
+            if value:
+                defines.append(value)
+            index += consumed
+            continue
+        value, consumed = _option_value(arguments, index, OUTPUT_OPTIONS, msvc)
+        if consumed:
+            if value and not output:
+                output = value
+            index += consumed
+            continue
+        index += 1
+
+    return CompileCommand(
+        file=_absolute(entry["file"], directory),
+        directory=directory,
+        includeDirs=tuple(dict.fromkeys(includeDirs)),
+        forcedIncludes=tuple(forcedIncludes),
+        defines=tuple(defines),
+        arguments=tuple(arguments),
+        output=output,
+    )
+
+
+def command_target(command: CompileCommand) -> str | None:
+    """
+    Returns the name of the CMake target that the translation unit of a command belongs to, taken from the
+    object file path, or None if the command does not name an object file of a CMake target.
+    """
+    match = RE_TARGET_DIR.search(command.output)
+    return match.group(1) if match else None
+
+
+def load_compile_db(path: str) -> list[CompileCommand]:
+    """
+    Returns the compile commands of a compile_commands.json. Multi-config generators list a translation unit
+    once per configuration; only the first entry of each file is kept.
+    """
+    with open(path, 'r', encoding="utf-8") as file:
+        entries = json.load(file)
+
+    commands: dict[str, CompileCommand] = {}
+    for entry in entries:
+        command = parse_compile_command(entry)
+        commands.setdefault(command.file, command)
+    return list(commands.values())
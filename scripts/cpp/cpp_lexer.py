@@ -0,0 +1,237 @@
+# Created with python 3.11.4
+
+# This module provides a small C++ lexer shared by the codemod scripts.
+# It splits a text into code, comment, string literal and preprocessor tokens, so that the scripts
+# do not misfire on text inside of comments and strings. Lexing results are cached by content,
+# so that every transform of a pipeline consumes the same token stream of an unchanged file.
+
+import re
+from bisect import bisect_right
+from enum import Enum
+from functools import lru_cache
+from itertools import accumulate
+from typing import NamedTuple
+
+
+class TokenKind(Enum):
+    CODE = 0
+    COMMENT = 1
+    STRING = 2
+    PREPROCESSOR = 3
+
+
+class Token(NamedTuple):
+    kind: TokenKind
+    begin: int
+    end: int
+
+
+class LexedLine(NamedTuple):
+    text: str           # Original line, including its line break
+    code: str           # Line with the contents of comments and string literals replaced by spaces
+    commentBegin: int   # Index of the first comment that begins on this line, or -1
+    directive: str      # Name of the preprocessor directive that begins on this line (for example "if", "endif"), or ""
+
+
+# Finds the next token that is not plain code. Directives are only recognized at the beginning of a line.
+# String prefixes like L or u8 are left in the code token in front of the string literal.
+RE_SPECIAL = re.compile(r'//|/\*|R"|"|\'|^[ \t]*#', re.MULTILINE)
+RE_IN_DIRECTIVE = re.compile(r'//|/\*|R"|"|\'')
+RE_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*(?:"|$)', re.MULTILINE | re.DOTALL)
+RE_CHAR = re.compile(r"'(?:[^'\\\n]|\\.)*(?:'|$)", re.MULTILINE | re.DOTALL)
+RE_RAW_STRING_BEGIN = re.compile(r'R"([^()\\\s]{0,16})\(')
+RAW_STRING_PREFIXES = {"", "L", "u", "U", "u8"}
+RE_DIRECTIVE_NAME = re.compile(r'[ \t]*#[ \t]*([A-Za-z_]*)')
+RE_LINE = re.compile(r'[^\n]*\n|[^\n]+')
+
+
+def _mask(piece: str) -> str:
+    if piece.endswith('\r'):
+        return ' ' * (len(piece) - 1) + '\r'
+    return ' ' * len(piece)
+
+
+def _logical_line_end(text: str, pos: int) -> int:
+    """
+    Returns the index of the line break that ends the logical line containing pos, honoring backslash continuations.
+    """
+    while True:
+        end = text.find('\n', pos)
+        if end < 0:
+            return len(text)
+        k = end - 1
+        if k >= 0 and text[k] == '\r':
+            k -= 1
+        if k >= 0 and text[k] == '\\':
+            pos = end + 1
+            continue
+        return end
+
+
+def _is_identifier_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def _identifier_before(text: str, pos: int) -> str:
+    begin = pos
+    while begin > 0 and _is_identifier_char(text[begin - 1]):
+        begin -= 1
+    return text[begin:pos]
+
+
+def _special_token_end(text: str, begin: int, found: str) -> tuple[TokenKind, int]:
+    if found == '//':
+        return TokenKind.COMMENT, _logical_line_end(text, begin)
+    if found == '/*':
+        end = text.find('*/', begin + 2)
+        return TokenKind.COMMENT, (end + 2 if end >= 0 else len(text))
+    if found == "'":
+        return TokenKind.STRING, RE_CHAR.match(text, begin).end()
+    if found == 'R"':
+        raw = RE_RAW_STRING_BEGIN.match(text, begin)
+        if raw is not None and _identifier_before(text, begin) in RAW_STRING_PREFIXES:
+            end = text.find(')' + raw.group(1) + '"', raw.end())
+            return TokenKind.STRING, (end + len(raw.group(1)) + 2 if end >= 0 else len(text))
+        # Not a raw string. The R belongs to an identifier.
+        return TokenKind.CODE, begin + 1
+    return TokenKind.STRING, RE_STRING.match(text, begin).end()
+
+
+def tokenize(text: str) -> list[Token]:
+    """
+    Splits text into consecutive tokens that cover the whole text.
+    A preprocessor directive begins with a PREPROCESSOR token at the beginning of a line.
+    """
+    tokens: list[Token] = []
+    codeBegin = 0
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        match = RE_SPECIAL.search(text, pos)
+        if match is None:
+            break
+
+        begin = match.start()
+        found = match.group(0)
+
+        if found.endswith('#'):
+            if codeBegin < begin:
+                tokens.append(Token(TokenKind.CODE, codeBegin, begin))
+            pos = _tokenize_directive(text, begin, tokens)
+            codeBegin = pos
+            continue
+
+        kind, end = _special_token_end(text, begin, found)
+        if kind == TokenKind.CODE:
+            pos = end
+            continue
+
+        if codeBegin < begin:
+            tokens.append(Token(TokenKind.CODE, codeBegin, begin))
+        tokens.append(Token(kind, begin, end))
+        pos = end
+        codeBegin = pos
+
+    if codeBegin < length:
+        tokens.append(Token(TokenKind.CODE, codeBegin, length))
+
+    return tokens
+
+
+def _tokenize_directive(text: str, begin: int, tokens: list[Token]) -> int:
+    """
+    Tokenizes a preprocessor directive starting at begin. Returns the end of the directive (its line break).
+    """
+    lineEnd = _logical_line_end(text, begin)
+    partBegin = begin
+    pos = begin
+    while pos < lineEnd:
+        match = RE_IN_DIRECTIVE.search(text, pos, lineEnd)
+        if match is None:
+            break
+        kind, end = _special_token_end(text, match.start(), match.group(0))
+        if kind == TokenKind.CODE:
+            pos = end
+            continue
+        if partBegin < match.start():
+            tokens.append(Token(TokenKind.PREPROCESSOR, partBegin, match.start()))
+        tokens.append(Token(kind, match.start(), end))
+        pos = end
+        partBegin = pos
+        # A block comment can continue the directive on the following lines.
+        if pos > lineEnd:
+            lineEnd = _logical_line_end(text, pos)
+
+    if partBegin < lineEnd:
+        tokens.append(Token(TokenKind.PREPROCESSOR, partBegin, lineEnd))
+    return max(lineEnd, partBegin)
+
+
+class LexedText:
+    """
+    Token stream of a text together with a line based view of it.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self._lines: list[LexedLine] | None = None
+
+    @property
+    def lines(self) -> list[LexedLine]:
+        if self._lines is None:
+            self._lines = self._build_lines()
+        return self._lines
+
+    def _build_lines(self) -> list[LexedLine]:
+        text = self.text
+        codeParts = []
+        commentBegins: list[int] = []
+        directiveBegins: list[int] = []
+        for token in self.tokens:
+            if token.kind == TokenKind.COMMENT or token.kind == TokenKind.STRING:
+                part = text[token.begin:token.end]
+                if '\n' in part:
+                    codeParts.append('\n'.join(_mask(piece) for piece in part.split('\n')))
+                else:
+                    codeParts.append(' ' * len(part))
+                if token.kind == TokenKind.COMMENT:
+                    commentBegins.append(token.begin)
+            else:
+                codeParts.append(text[token.begin:token.end])
+                if token.kind == TokenKind.PREPROCESSOR and (token.begin == 0 or text[token.begin - 1] == '\n'):
+                    directiveBegins.append(token.begin)
+
+        # Split at line feeds only, like file.readlines() does.
+        textLines = RE_LINE.findall(text)
+        codeLines = RE_LINE.findall("".join(codeParts))
+        lineBegins = [0]
+        lineBegins.extend(accumulate(map(len, textLines)))
+
+        lineComments = [-1] * len(textLines)
+        for begin in commentBegins:
+            lineIndex = bisect_right(lineBegins, begin) - 1
+            if lineComments[lineIndex] < 0:
+                lineComments[lineIndex] = begin - lineBegins[lineIndex]
+
+        lineDirectives = [""] * len(textLines)
+        for begin in directiveBegins:
+            match = RE_DIRECTIVE_NAME.match(text, begin)
+            if match is not None:
+                lineDirectives[bisect_right(lineBegins, begin) - 1] = match.group(1) or "#"
+
+        return list(map(LexedLine, textLines, codeLines, lineComments, lineDirectives))
+
+
+@lru_cache(maxsize=64)
+def lex(text: str) -> LexedText:
+    """
+    Returns the lexed form of text. Results are cached by content, so transforms running one after another
+    on an unchanged text share the same token stream.
+    """
+    return LexedText(text)
+
+
+def lex_lines(lines: list[str]) -> list[LexedLine]:
+    return lex("".join(lines)).lines
@@ -0,0 +1,108 @@
+# Created with python 3.11.4
+
+# This module provides the file selection shared by the codemod scripts.
+# By default all files tracked by git (plus untracked, not ignored files) below the given roots are selected.
+# The selection can be narrowed to the files changed since a git revision, to the staged files or to a file list,
+# which allows running the scripts as fast pre-commit hooks on just the touched files.
+
+import os
+import subprocess
+import sys
+
+
+def add_file_selection_arguments(parser) -> None:
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--changed-since", metavar="REV",
+                       help="Only process files changed since the git revision REV, or in the revision range REV (for example main..HEAD)")
+    group.add_argument("--staged", action="store_true",
+                       help="Only process files with staged changes")
+    group.add_argument("--files-from", metavar="FILE",
+                       help="Only process the files listed in FILE, one per line. Use - to read from stdin")
+
+
+def _run_git(cwd: str, args: list[str]) -> list[str] | None:
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return [entry for entry in result.stdout.decode("utf-8", errors="surrogateescape").split("\0") if entry]
+
+
+def find_git_root(path: str) -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=path, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return os.path.normpath(result.stdout.strip())
+
+
+def _is_below(path: str, roots: list[str]) -> bool:
+    for root in roots:
+        if path == root or path.startswith(root + os.sep):
+            return True
+    return False
+
+
+def _has_extension(path: str, extensions: tuple[str, ...]) -> bool:
+    return path.lower().endswith(extensions)
+
+
+def _walk_files(roots: list[str]) -> list[str]:
+    paths = []
+    for root in roots:
+        for subdir, _, files in os.walk(root):
+            for file in files:
+                paths.append(os.path.join(subdir, file))
+    return paths
+
+
+def _list_candidates(args, roots: list[str]) -> list[str]:
+    if args is not None and args.files_from:
+        if args.files_from == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(args.files_from, 'r', encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        return [os.path.abspath(line.strip()) for line in lines if line.strip()]
+
+    changedSince = args.changed_since if args is not None else None
+    staged = args.staged if args is not None else False
+
+    gitRoot = find_git_root(roots[0]) if roots else None
+    if gitRoot is None:
+        if changedSince or staged:
+            raise RuntimeError("--changed-since and --staged require a git repository")
+        return _walk_files(roots)
+
+    if changedSince:
+        gitFiles = _run_git(gitRoot, ["diff", "--name-only", "--diff-filter=d", "-z", changedSince, "--"])
+    elif staged:
+        gitFiles = _run_git(gitRoot, ["diff", "--name-only", "--diff-filter=d", "-z", "--cached", "--"])
+    else:
+        gitFiles = _run_git(gitRoot, ["ls-files", "--cached", "--others", "--exclude-standard", "-z", "--", *roots])
+
+    if gitFiles is None:
+        raise RuntimeError("git failed to list the files to process")
+
+    return [os.path.join(gitRoot, os.path.normpath(path)) for path in gitFiles]
+
+
+def select_files(args, roots: list[str], extensions: list[str]) -> list[str]:
+    """
+    Returns the sorted absolute paths of the existing files below roots with one of the given extensions,
+    narrowed down by the file selection arguments. If args is None, all files are selected.
+    """
+    roots = [os.path.normpath(os.path.abspath(root)) for root in roots]
+    extensions = tuple(ext.lower() for ext in extensions)
+
+    fileNames = set()
+    for path in _list_candidates(args, roots):
+        path = os.path.normpath(path)
+        if _has_extension(path, extensions) and _is_below(path, roots) and os.path.isfile(path):
+            fileNames.add(path)
+
+    return sorted(fileNames)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+fix_includes_case.py
+
+Fixes the file name case of include directives of the source files found in SRC_DIR, as necessary.
+It also fixes slashes ( \\ -> / ). Python port of the former fixInludesCase.sh.
+
+Details:
+The script tries to find the included file in the include paths: first relative to the directory of the
+source file, then in the specified include paths. First it tries a case-sensitive search in all paths.
+If that fails, it tries a case-insensitive search in all include paths (except for the nofix paths).
+If that succeeds, it fixes the file name in the include directive as necessary. If it fails, no change is done.
+Slashes are fixed either way, if necessary ( \\ -> / ).
+
+All files below SRC_DIR and the include paths are indexed once up front, so every directive is resolved
+with dictionary lookups. Files are processed in parallel.
+
+Usage:
+  python fix_includes_case.py [-I PATH]... [-N PATH]... [--ignore INCLUDE]... SRC_DIR...
+  python fix_includes_case.py --check -I Core/Libraries/Include Core
+
+With --check, no file is changed and the exit code is 1 if any include directive needs a fix.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from codemod_io import read_source, write_source_if_changed
+
+SOURCE_EXTENSIONS = (".c", ".cpp", ".h")
+
+RE_INCLUDE = re.compile(r'^([ \t]*#[ \t]*include[ \t]*["<])(.*[.][hH])([">].*)$')
+
+
+class FileIndex(NamedTuple):
+    exact: frozenset            # Normalized paths of all indexed files
+    folded: dict                # Case-folded normalized path -> actual path, for the files of the fixable paths
+
+
+class FixResult(NamedTuple):
+    path: str
+    messages: list
+    changed: bool
+
+
+def walk_files(root: str) -> list[str]:
+    paths = []
+    for subdir, _, files in os.walk(root):
+        for file in files:
+            paths.append(os.path.normpath(os.path.join(subdir, file)))
+    return paths
+
+
+def build_index(srcDirs: list[str], includePaths: list[str], includePathsNofix: list[str]) -> FileIndex:
+    """
+    Indexes the files below the source folders and the include paths. Files below the nofix paths are only
+    used to check that an include exists, not to fix its case.
+    """
+    fixable: dict[str, None] = {}
+    for root in (*srcDirs, *includePaths):
+        fixable.update(dict.fromkeys(walk_files(root)))
+    exact = set(fixable)
+    for root in includePathsNofix:
+        exact.update(walk_files(root))
+
+    folded: dict[str, str] = {}
+    for path in fixable:
+        folded.setdefault(os.path.normcase(path).casefold(), path)
+    return FileIndex(frozenset(exact), folded)
+
+
+_index: FileIndex | None = None
+_options: argparse.Namespace | None = None
+
+
+def _init_worker(index: FileIndex, options: argparse.Namespace) -> None:
+    global _index, _options
+    _index = index
+    _options = options
+
+
+def _candidate(base: str, include: str) -> str:
+    return os.path.normpath(os.path.join(base, include))
+
+
+def fix_include(fileDir: str, includeOrig: str, messages: list[str], fileName: str) -> str:
+    """
+    Returns the fixed spelling of an include, or includeOrig if it needs no fix or cannot be fixed.
+    """
+    include = re.sub(r'\\+', '/', includeOrig)
+
+    if include.casefold() in _options.ignoredIncludes:
+        return includeOrig
+
+    searchPaths = (fileDir, *_options.includePaths, *_options.includePathsNofix)
+    if any(_candidate(path, include) in _index.exact for path in searchPaths):
+        if include != includeOrig:
+            messages.append(f"Srcfile: {fileName}\norig: {includeOrig}\nfix: {include}\n")
+        return include
+
+    messages.append(f"Srcfile: {fileName}\nmissing: {include}")
+    for path in (fileDir, *_options.includePaths):
+        actual = _index.folded.get(os.path.normcase(_candidate(path, include)).casefold())
+        if actual is None:
+            continue
+        fixed = os.path.relpath(actual, path).replace(os.sep, "/")
+        # Only accept a fix that changes nothing but the case, for example not a different number of ../
+        if fixed.casefold() != include.casefold():
+            continue
+        messages[-1] += f"\nfix: {fixed}\n"
+        return fixed
+
+    messages[-1] += "\n"
+    if include != includeOrig:
+        messages.append(f"Srcfile: {fileName}\norig: {includeOrig}\nfix: {include}\n")
+    return include
+
+
+def fix_file(fileName: str) -> FixResult:
+    messages: list[str] = []
+    source = read_source(fileName)
+    if "include" not in source.text:
+        return FixResult(fileName, messages, False)
+
+    fileDir = os.path.dirname(fileName)
+    lines = source.lines()
+    for index, line in enumerate(lines):
+        match = RE_INCLUDE.match(line)
+        if match is None:
+            continue
+        includeOrig = match.group(2)
+        fixed = fix_include(fileDir, includeOrig, messages, fileName)
+        if fixed != includeOrig:
+            lines[index] = match.group(1) + fixed + match.group(3) + line[match.end():]
+
+    changed = False
+    if not _options.check:
+        changed = write_source_if_changed(fileName, "".join(lines), source)
+    return FixResult(fileName, messages, changed)
+
+
+def find_source_files(srcDirs: list[str]) -> list[str]:
+    fileNames = set()
+    for root in srcDirs:
+        for path in walk_files(root):
+            if path.lower().endswith(SOURCE_EXTENSIONS):
+                fileNames.add(path)
+    return sorted(fileNames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fix the file name case and the slashes of include directives.")
+    parser.add_argument("srcDirs", nargs="+", metavar="SRC_DIR", help="Folder with the source files to fix")
+    parser.add_argument("-I", "--include-path", dest="includePaths", action="append", default=[], metavar="PATH",
+                        help="Include path, where to search included files. Also used to fix the file name case as necessary. Can be given more than once")
+    parser.add_argument("-N", "--include-paths-nofix", dest="includePathsNofix", action="append", default=[], metavar="PATH",
+                        help="Like --include-path, but files here are not considered when trying to fix the case, only when checking that a file exists. Can be given more than once")
+    parser.add_argument("--ignore", dest="ignoredIncludes", action="append", default=[], metavar="INCLUDE",
+                        help="Include to leave alone, compared case-insensitively (for example windows.h). Can be given more than once")
+    parser.add_argument("--check", action="store_true",
+                        help="Do not change any file. Exit with code 1 if any include directive needs a fix")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of parallel processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    args.srcDirs = [os.path.normpath(os.path.abspath(path)) for path in args.srcDirs]
+    args.includePaths = [os.path.normpath(os.path.abspath(path)) for path in args.includePaths]
+    args.includePathsNofix = [os.path.normpath(os.path.abspath(path)) for path in args.includePathsNofix]
+    args.ignoredIncludes = {include.replace("\\", "/").casefold() for include in args.ignoredIncludes}
+
+    print("SRC_DIR:\n" + "\n".join(args.srcDirs))
+    if args.includePaths:
+        print("INCLUDE PATHS:\n" + "\n".join(args.includePaths))
+    if args.includePathsNofix:
+        print("INCLUDE PATHS NOFIX:\n" + "\n".join(args.includePathsNofix))
+    print()
+
+    index = build_index(args.srcDirs, args.includePaths, args.includePathsNofix)
+    fileNames = find_source_files(args.srcDirs)
+
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(index, args)) as executor:
+            results = list(executor.map(fix_file, fileNames, chunksize=32))
+    else:
+        _init_worker(index, args)
+        results = [fix_file(fileName) for fileName in fileNames]
+
+    fixCount = 0
+    changedCount = 0
+    for result in results:
+        for message in result.messages:
+            print(message)
+            if "\nfix: " in message:
+                fixCount += 1
+        if result.changed:
+            changedCount += 1
+
+    if args.check:
+        print(f"{fixCount} include directive(s) need a fix.")
+        sys.exit(1 if fixCount else 0)
+    print(f"Fixed {fixCount} include directive(s) in {changedCount} of {len(fileNames)} file(s).")
+
+
+if __name__ == "__main__":
+    main()
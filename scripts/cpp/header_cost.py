@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+header_cost.py
+
+Ranks the headers of the project by the amount of text they make the compiler parse over a full build.
+
+For every header, the include graph (see include_graph.py) gives:
+  - TUs:        the number of translation units that include the header, directly or indirectly
+  - size:       the size of the header itself
+  - closure:    the size of the header plus everything it includes, directly or indirectly
+  - cost:       TUs x closure, the text parsed across the whole build because of this header
+
+A header with a high cost and a large closure is a candidate for forward declarations or for
+splitting. A header with a high cost but a small closure mostly costs through its own size.
+The numbers assume that every header is parsed once per translation unit, like '#pragma once' does.
+
+Usage:
+  python header_cost.py report [--top 50] [--under GeneralsMD/Code/GameEngine/Include/Common] [--json report.json]
+  python header_cost.py diff OLD NEW [--top 50]
+
+OLD and NEW of a diff are each a report written with --json, a git revision, or WORKTREE for the files on disk.
+Revisions are analyzed with the include paths of the current compile_commands.json.
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import json
+import os
+import subprocess
+import tarfile
+import tempfile
+from typing import NamedTuple
+
+from compile_db import CompileCommand, find_compile_commands, load_compile_db, project_dir
+from include_graph import SOURCE_ROOTS, IncludeGraph, add_include_graph_arguments, load_include_graph
+
+WORKTREE = "WORKTREE"
+
+
+class HeaderCost(NamedTuple):
+    tus: int
+    size: int
+    closureFiles: int
+    closureSize: int
+
+    @property
+    def cost(self) -> int:
+        return self.tus * self.closureSize
+
+
+def file_size(graph: IncludeGraph, key: str, sizes: dict[str, int]) -> int:
+    size = sizes.get(key)
+    if size is None:
+        entry = graph.files.get(key)
+        if entry is not None:
+            size = entry[1]
+        else:
+            try:
+                size = os.path.getsize(graph.abspath(key))
+            except OSError:
+                size = 0
+        sizes[key] = size
+    return size
+
+
+def compute_costs(graph: IncludeGraph, includeExternal: bool = False) -> tuple[dict[str, HeaderCost], int]:
+    """
+    Returns the cost of every header that at least one translation unit includes, and the total size of
+    the text parsed by all translation units.
+    """
+    sizes: dict[str, int] = {}
+    tuCounts: dict[str, int] = {}
+    totalSize = 0
+    for tu in graph.translationUnits:
+        closure = graph.closure(tu)
+        totalSize += file_size(graph, tu, sizes) + sum(file_size(graph, key, sizes) for key in closure)
+        for key in closure:
+            tuCounts[key] = tuCounts.get(key, 0) + 1
+
+    translationUnits = set(graph.translationUnits)
+    costs = {}
+    for key, tus in tuCounts.items():
+        if key in translationUnits or (not includeExternal and not graph.is_internal(key)):
+            continue
+        closure = graph.closure(key)
+        size = file_size(graph, key, sizes)
+        costs[key] = HeaderCost(tus, size, len(closure), size + sum(file_size(graph, k, sizes) for k in closure))
+    return costs, totalSize
+
+
+def costs_to_json(costs: dict[str, HeaderCost], totalSize: int, source: str) -> dict:
+    return {
+        "source": source,
+        "totalSize": totalSize,
+        "headers": {key: list(cost) for key, cost in costs.items()},
+    }
+
+
+def costs_from_json(data: dict) -> tuple[dict[str, HeaderCost], int]:
+    return {key: HeaderCost(*values) for key, values in data["headers"].items()}, data["totalSize"]
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return ""
+
+
+def is_below(key: str, prefixes: list[str]) -> bool:
+    return not prefixes or any(key == p or key.startswith(p.rstrip("/") + "/") for p in prefixes)
+
+
+def print_report(costs: dict[str, HeaderCost], totalSize: int, top: int, under: list[str]) -> None:
+    ranked = sorted(((key, cost) for key, cost in costs.items() if is_below(key, under)),
+                    key=lambda item: item[1].cost, reverse=True)
+    print(f"Total text parsed by all translation units: {format_size(totalSize)}")
+    print(f"{'Rank':>4}  {'Cost':>10}  {'TUs':>5}  {'Size':>9}  {'Closure':>9}  {'Files':>5}  Header")
+    for rank, (key, cost) in enumerate(ranked[:top], 1):
+        print(f"{rank:>4}  {format_size(cost.cost):>10}  {cost.tus:>5}  {format_size(cost.size):>9}  "
+              f"{format_size(cost.closureSize):>9}  {cost.closureFiles:>5}  {key}")
+
+
+def print_diff(old: dict[str, HeaderCost], oldTotal: int, new: dict[str, HeaderCost], newTotal: int,
+               top: int, under: list[str]) -> None:
+    print(f"Total text parsed by all translation units: {format_size(oldTotal)} -> {format_size(newTotal)} "
+          f"({'+' if newTotal >= oldTotal else ''}{format_size(newTotal - oldTotal)})")
+    empty = HeaderCost(0, 0, 0, 0)
+    rows = []
+    for key in old.keys() | new.keys():
+        if not is_below(key, under):
+            continue
+        before = old.get(key, empty)
+        after = new.get(key, empty)
+        delta = after.cost - before.cost
+        if delta != 0:
+            rows.append((key, before, after, delta))
+    rows.sort(key=lambda row: abs(row[3]), reverse=True)
+
+    print(f"{'Delta':>10}  {'Cost':>21}  {'TUs':>11}  {'Closure':>21}  Header")
+    for key, before, after, delta in rows[:top]:
+        state = " (new)" if key not in old else " (removed)" if key not in new else ""
+        print(f"{format_size(delta):>10}  {format_size(before.cost):>9} -> {format_size(after.cost):>9}  "
+              f"{before.tus:>4} -> {after.tus:>4}  {format_size(before.closureSize):>9} -> {format_size(after.closureSize):>9}  {key}{state}")
+    print(f"{len(rows)} header(s) changed cost.")
+
+
+def export_revision(revision: str, folder: str) -> None:
+    """
+    Writes the source folders of a git revision to folder.
+    """
+    result = subprocess.run(["git", "archive", "--format=tar", revision, "--", *SOURCE_ROOTS],
+                            cwd=project_dir, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git archive {revision} failed: {result.stderr.decode(errors='replace').strip()}")
+    with tarfile.open(fileobj=io.BytesIO(result.stdout)) as archive:
+        archive.extractall(folder)
+
+
+def remap_command(command: CompileCommand, root: str) -> CompileCommand:
+    def remap(path: str) -> str:
+        if path == project_dir or path.startswith(project_dir + os.sep):
+            return os.path.join(root, os.path.relpath(path, project_dir))
+        return path
+    return command._replace(
+        file=remap(command.file),
+        includeDirs=tuple(remap(path) for path in command.includeDirs),
+        forcedIncludes=tuple(remap(path) for path in command.forcedIncludes),
+    )
+
+
+def load_costs(source: str, args) -> tuple[dict[str, HeaderCost], int]:
+    """
+    Returns the costs of a report file, a git revision or the worktree.
+    """
+    if os.path.isfile(source):
+        with open(source, 'r', encoding="utf-8") as file:
+            return costs_from_json(json.load(file))
+
+    if source == WORKTREE:
+        return compute_costs(load_include_graph(args, quiet=True), args.all)
+
+    compileCommandsPath = find_compile_commands(args.compile_commands)
+    commands = load_compile_db(compileCommandsPath) if compileCommandsPath else []
+    with tempfile.TemporaryDirectory(prefix="header_cost_") as folder:
+        export_revision(source, folder)
+        graph = IncludeGraph(os.path.join(folder, ".include_graph.json"), root=folder)
+        graph.update([remap_command(command, folder) for command in commands])
+        return compute_costs(graph, args.all)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank headers by the text they make the compiler parse over a full build.")
+    # Options of both commands, accepted after the command name
+    commonParser = argparse.ArgumentParser(add_help=False)
+    add_include_graph_arguments(commonParser)
+    commonParser.add_argument("--top", type=int, default=50, help="Number of headers to list (default: 50)")
+    commonParser.add_argument("--under", action="append", default=[], metavar="PATH",
+                              help="Only list headers below PATH, relative to the project folder. Can be given more than once")
+    commonParser.add_argument("--all", action="store_true", help="Also list headers outside of the project folder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reportParser = subparsers.add_parser("report", parents=[commonParser], help="Rank the headers of the worktree")
+    reportParser.add_argument("--json", metavar="FILE", help="Also write the full report to FILE, for a later diff")
+
+    diffParser = subparsers.add_parser("diff", parents=[commonParser], help="Compare the header costs of two reports or revisions")
+    diffParser.add_argument("old", help="Report file, git revision or WORKTREE")
+    diffParser.add_argument("new", nargs="?", default=WORKTREE, help="Report file, git revision or WORKTREE (default: WORKTREE)")
+
+    args = parser.parse_args()
+
+    if args.command == "report":
+        graph = load_include_graph(args)
+        costs, totalSize = compute_costs(graph, args.all)
+        print_report(costs, totalSize, args.top, args.under)
+        if args.json:
+            with open(args.json, 'w', encoding="utf-8") as file:
+                json.dump(costs_to_json(costs, totalSize, WORKTREE), file, indent=1, sort_keys=True)
+
+    elif args.command == "diff":
+        old, oldTotal = load_costs(args.old, args)
+        new, newTotal = load_costs(args.new, args)
+        print_diff(old, oldTotal, new, newTotal, args.top, args.under)
+
+
+if __name__ == "__main__":
+    main()
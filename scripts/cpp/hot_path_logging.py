@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+hot_path_logging.py
+
+Finds calls of the logging macros of refactor_debug_log_newline.py in code that runs every frame.
+
+Per frame code is:
+  - the update() methods of UpdateModule, SubsystemInterface and State subclasses, the clientUpdate() methods
+    of ClientUpdateModule subclasses and the doDrawModule() methods of DrawModule subclasses.
+  - loops in any function of the GameLogic and GameClient source folders.
+
+Every call is listed with its function, whether it sits in a loop, and whether a release build compiles it in.
+The latter is told from the #define of the macro that is active in the release configuration, following the
+debug switches of Debug.h, for example DEBUG_LOG is compiled out unless DEBUG_LOGGING is defined.
+Assertion macros like DEBUG_ASSERTCRASH only log when they fail and are skipped unless --include-checks is given.
+
+Usage:
+  python hot_path_logging.py [--release-only] [--include-checks] [--macro NAME] [--json report.json]
+                             [--changed-since REV | --staged | --files-from FILE]
+"""
+
+import argparse
+import json
+import os
+import re
+from bisect import bisect_right
+from typing import NamedTuple
+
+from codemod_io import file_contains, read_source
+from compile_db import project_dir
+from cpp_lexer import TokenKind, lex
+from file_selection import add_file_selection_arguments, select_files
+from preprocessor_index import build_index
+from refactor_debug_log_newline import LOG_MACROS
+from text_matcher import MultiPatternMatcher
+
+SOURCE_ROOTS = ["Core", "Generals", "GeneralsMD"]
+
+# Method name -> base classes whose overrides of the method run every frame
+HOT_METHODS = {
+    "update": ("UpdateModule", "SubsystemInterface", "State"),
+    "clientUpdate": ("ClientUpdateModule",),
+    "doDrawModule": ("DrawModule",),
+}
+RE_LOOP_FOLDER = re.compile(r'/(GameLogic|GameClient)/')
+
+# Macros that only log when a check fails
+CHECK_MACROS = ("DEBUG_CRASH", "DEBUG_ASSERTLOG", "DEBUG_ASSERTCRASH", "RELEASE_CRASH", "RELEASE_CRASHLOCALIZED", "WWASSERT_PRINT")
+
+# Macros defined by the compile definitions of cmake/config-build.cmake in the release configuration
+RELEASE_DEFINES = {"RTS_RELEASE", "NDEBUG", "_WIN32", "_MSC_VER", "__cplusplus"}
+CONFIG_HEADERS = ["Core/GameEngine/Include/Common/Debug.h"]
+
+RE_CLASS_HEAD = re.compile(r'\b(?:class|struct)\s+(?:\w+\s+)*?(\w+)\s*(?:final\s*)?:([^{;()]*)\{')
+RE_TEMPLATE_ARGUMENTS = re.compile(r'<[^<>]*>')
+RE_FUNCTION_NAME = re.compile(r'(?:(\w+)\s*::\s*)?(~?\w+)$')
+RE_LOOP = re.compile(r'\b(?:(for|while)\s*\(|do\b)')
+RE_MACRO_DEFINITION = re.compile(r'\s*#\s*define\s+(\w+)(\([^)]*\))?(.*)', re.DOTALL)
+RE_EMPTY_BODY = re.compile(r'\s*(?:\(\s*\(\s*void\s*\)\s*0\s*\)|\(\s*void\s*\)\s*0|\{\s*\})?\s*')
+NOT_FUNCTIONS = {"if", "for", "while", "switch", "catch", "return", "sizeof"}
+
+
+class LogCall(NamedTuple):
+    path: str           # Relative to the project folder
+    line: int           # 1 based
+    macro: str
+    function: str       # Class::method or function name
+    hotBase: str        # Base class that makes the function run every frame, or "" for a loop in a regular function
+    inLoop: bool
+    release: str        # "compiled in", "compiled out" or "unknown"
+    code: str           # Source line of the call
+
+
+class FunctionSpan(NamedTuple):
+    headBegin: int      # Position of the function head
+    begin: int          # Position of the opening brace of the body
+    end: int            # Position of the closing brace of the body
+    className: str      # Class of a Class::method definition, or ""
+    name: str
+
+
+def masked_code(text: str) -> str:
+    """
+    Returns the text with comments, string literals and preprocessor directives replaced by spaces.
+    Only the first branch of each conditional block is kept, so that alternative function heads like
+    #ifdef A / void f(int a) { / #else / void f() { / #endif do not unbalance the braces.
+    """
+    parts = []
+    for token in lex(text).tokens:
+        piece = text[token.begin:token.end]
+        parts.append(piece if token.kind == TokenKind.CODE else re.sub(r'[^\r\n]', ' ', piece))
+    code = "".join(parts)
+    index = build_index(text)
+    if not index.blocks:
+        return code
+    lines = code.splitlines(keepends=True)
+    for block in index.iter_blocks():
+        for branch in block.branches[1:]:
+            for lineIndex in range(branch.line, branch.endLine or len(lines)):
+                lines[lineIndex] = re.sub(r'[^\r\n]', ' ', lines[lineIndex])
+    return "".join(lines)
+
+
+def match_brackets(code: str) -> dict[int, int]:
+    """
+    Returns the position of the matching closing bracket of every opening brace and parenthesis.
+    """
+    matches = {}
+    stack = []
+    for match in re.finditer(r'[{}()]', code):
+        ch = match.group(0)
+        if ch in "{(":
+            stack.append(match.start())
+        elif stack:
+            matches[stack.pop()] = match.start()
+    return matches
+
+
+def find_functions(code: str, brackets: dict[int, int]):
+    """
+    Yields the function definitions at file and namespace level. Class bodies are skipped.
+    """
+    pos = 0
+    containers = []     # End positions of the namespace and extern blocks around pos
+    while True:
+        brace = code.find("{", pos)
+        while containers and (brace < 0 or containers[-1] < brace):
+            containers.pop()
+        if brace < 0:
+            return
+        close = brackets.get(brace, len(code))
+        boundary = max(code.rfind(";", 0, brace), code.rfind("}", 0, brace), code.rfind("{", 0, brace))
+        head = code[boundary + 1:brace].strip()
+        if re.search(r'\bnamespace\b[\s\w]*$|\bextern\s*$', head):
+            containers.append(close)
+            pos = brace + 1
+            continue
+        pos = close + 1
+        paren = head.find("(")
+        if paren < 0 or "=" in head[:paren] or re.search(r'\b(?:class|struct|union|enum)\b', head[:paren]):
+            continue
+        match = RE_FUNCTION_NAME.search(head[:paren].rstrip())
+        if match is None or match.group(2) in NOT_FUNCTIONS:
+            continue
+        yield FunctionSpan(boundary + 1, brace, close, match.group(1) or "", match.group(2))
+
+
+def find_loops(code: str, brackets: dict[int, int], begin: int, end: int) -> list[tuple[int, int]]:
+    """
+    Returns the body spans of the loops in code[begin:end].
+    """
+    loops = []
+    for match in RE_LOOP.finditer(code, begin, end):
+        if match.group(1):
+            paren = match.end() - 1
+            bodyBegin = brackets.get(paren, end) + 1
+        else:
+            bodyBegin = match.end()
+        while bodyBegin < end and code[bodyBegin].isspace():
+            bodyBegin += 1
+        if bodyBegin >= end or code[bodyBegin] == ";":
+            continue    # Tail of a do-while loop or an empty loop
+        if code[bodyBegin] == "{":
+            loops.append((bodyBegin, brackets.get(bodyBegin, end)))
+            continue
+        # A single statement, possibly with a block of its own
+        semicolon = code.find(";", bodyBegin, end)
+        brace = code.find("{", bodyBegin, end)
+        if 0 <= brace < semicolon or semicolon < 0 <= brace:
+            loops.append((bodyBegin, brackets.get(brace, end)))
+        else:
+            loops.append((bodyBegin, semicolon if semicolon >= 0 else end))
+    return loops
+
+
+def line_begins(text: str) -> list[int]:
+    """
+    Returns the positions where the lines of the text begin. Lines are split at line feeds only, like the lexer does.
+    """
+    return [0] + [match.end() for match in re.finditer(r'\n', text)]
+
+
+def line_of(lineBegins: list[int], pos: int) -> int:
+    """
+    Returns the 0 based line index of a position, given the line_begins() of the text.
+    """
+    return bisect_right(lineBegins, pos) - 1
+
+
+def find_class_bases(roots: list[str]) -> dict[str, set[str]]:
+    bases: dict[str, set[str]] = {}
+    for root in roots:
+        for subdir, _, files in os.walk(root):
+            for file in files:
+                if not file.lower().endswith((".h", ".cpp")):
+                    continue
+                # The raw text is good enough here, a class head in a comment only adds a harmless relation
+                with open(os.path.join(subdir, file), 'rb') as f:
+                    data = f.read()
+                if b":" not in data:
+                    continue
+                for match in RE_CLASS_HEAD.finditer(data.decode("cp1252", errors="replace")):
+                    names = bases.setdefault(match.group(1), set())
+                    for base in RE_TEMPLATE_ARGUMENTS.sub("", match.group(2)).split(","):
+                        words = re.findall(r'\w+', base)
+                        if words:
+                            names.add(words[-1])
+    return bases
+
+
+class PerFrameClasses:
+    """
+    Tells the methods that run every frame from the class hierarchy of the project.
+    """
+
+    def __init__(self, root: str = project_dir):
+        self.bases = find_class_bases([os.path.join(root, folder) for folder in SOURCE_ROOTS])
+        self._hotBases: dict[tuple[str, str], str] = {}
+
+    def hot_base(self, className: str, method: str) -> str:
+        """
+        Returns the base class that makes className::method run every frame, or "".
+        """
+        targets = HOT_METHODS.get(method)
+        if not targets or not className:
+            return ""
+        key = (className, method)
+        if key not in self._hotBases:
+            found = ""
+            pending = [className]
+            seen = set()
+            while pending and not found:
+                name = pending.pop()
+                if name in seen:
+                    continue
+                seen.add(name)
+                if name in targets:
+                    found = name
+                pending.extend(self.bases.get(name, ()))
+            self._hotBases[key] = found
+        return self._hotBases[key]
+
+
+class HotPathAnalyzer:
+    def __init__(self, macros: list[str], root: str = project_dir):
+        self.root = root
+        self.macros = macros
+        self.matcher = MultiPatternMatcher(macros, wholeIdentifiers=True)
+        self.perFrame = PerFrameClasses(root)
+        self.releaseDefines = self._config_defines(RELEASE_DEFINES)
+        self.definitions = self._find_definitions()
+        self._status: dict[tuple[str, str], str] = {}
+
+    # Release configuration
+
+    def _config_defines(self, defines: set[str]) -> set[str]:
+        for header in CONFIG_HEADERS:
+            _, defines = build_index(read_source(os.path.join(self.root, header)).text).active_lines(defines)
+        return defines
+
+    def _find_definitions(self) -> dict[str, list[str]]:
+        """
+        Returns the files that define each macro, excluding the tools, which bring their own logging.
+        """
+        definitions: dict[str, list[str]] = {}
+        needles = [f"define {macro}".encode() for macro in self.macros]
+        for folder in SOURCE_ROOTS:
+            for subdir, _, files in os.walk(os.path.join(self.root, folder)):
+                if "/Tools/" in subdir.replace(os.sep, "/") + "/":
+                    continue
+                for file in files:
+                    path = os.path.join(subdir, file)
+                    if not file.lower().endswith((".h", ".cpp")) or not file_contains(path, needles):
+                        continue
+                    relPath = os.path.relpath(path, self.root).replace(os.sep, "/")
+                    for line in read_source(path).lines():
+                        match = RE_MACRO_DEFINITION.match(line)
+                        if match is not None and match.group(1) in self.macros:
+                            definitions.setdefault(match.group(1), [])
+                            if relPath not in definitions[match.group(1)]:
+                                definitions[match.group(1)].append(relPath)
+        return definitions
+
+    def release_status(self, macro: str, path: str, depth: int = 0) -> str:
+        """
+        Returns whether a release build compiles in a macro used in path. A #define in path itself takes
+        precedence over the shared ones in headers.
+        """
+        sites = self.definitions.get(macro, [])
+        sites = [path] if path in sites else [site for site in sites if site.endswith(".h")]
+        key = (macro, sites[0] if len(sites) == 1 else "")
+        if key in self._status:
+            return self._status[key]
+        status = "unknown"
+        for site in sites:
+            text = read_source(os.path.join(self.root, site)).text
+            index = build_index(text)
+            active, _ = index.active_lines(self.releaseDefines)
+            for lineIndex, lexedLine in enumerate(index.lines):
+                if lexedLine.directive != "define" or not active[lineIndex]:
+                    continue
+                match = RE_MACRO_DEFINITION.match(lexedLine.code)
+                if match is None or match.group(1) != macro:
+                    continue
+                body = match.group(3)
+                nextIndex = lineIndex
+                while body.rstrip("\r\n").endswith("\\") and nextIndex + 1 < len(index.lines):
+                    nextIndex += 1
+                    body = body.rstrip("\r\n")[:-1] + index.lines[nextIndex].code
+                if RE_EMPTY_BODY.fullmatch(body):
+                    status = "compiled out"
+                else:
+                    inner = self.matcher.search(body)
+                    if inner is not None and inner.text != macro and depth < 4:
+                        status = self.release_status(inner.text, site, depth + 1)
+                    else:
+                        status = "compiled in"
+        self._status[key] = status
+        return status
+
+    # Call sites
+
+    def analyze_file(self, path: str) -> list[LogCall]:
+        text = read_source(path).text
+        code = masked_code(text)
+        if self.matcher.search(code) is None:
+            return []
+        relPath = os.path.relpath(path, self.root).replace(os.sep, "/")
+        loopFolder = RE_LOOP_FOLDER.search(relPath) is not None
+        brackets = match_brackets(code)
+        lines = text.split("\n")
+        lineBegins = line_begins(text)
+
+        calls = []
+        for function in find_functions(code, brackets):
+            begin, end = function.begin, function.end
+            hotBase = self.perFrame.hot_base(function.className, function.name)
+            if not hotBase and not loopFolder:
+                continue
+            loops = find_loops(code, brackets, begin, end)
+            for match in self.matcher.finditer(code[:end], begin):
+                if not re.match(r'\s*\(', code[match.end:]):
+                    continue
+                inLoop = any(b <= match.start < e for b, e in loops)
+                if not hotBase and not inLoop:
+                    continue
+                line = line_of(lineBegins, match.start)
+                name = f"{function.className}::{function.name}" if function.className else function.name
+                calls.append(LogCall(relPath, line + 1, match.text, name, hotBase, inLoop,
+                                     self.release_status(match.text, relPath), lines[line].strip()))
+        return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find logging macro calls in code that runs every frame.")
+    parser.add_argument("--macro", action="append", default=[],
+                        help="Additional logging macro to look for (can be used multiple times)")
+    parser.add_argument("--include-checks", action="store_true",
+                        help=f"Also list assertion macros ({', '.join(CHECK_MACROS[:3])}, ...)")
+    parser.add_argument("--release-only", action="store_true", help="Only list calls that release builds compile in")
+    parser.add_argument("--json", metavar="FILE", help="Write the calls to FILE")
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
+    macros = [m for m in LOG_MACROS + args.macro if args.include_checks or m not in CHECK_MACROS]
+    analyzer = HotPathAnalyzer(macros)
+    fileNames = select_files(args, [os.path.join(project_dir, folder) for folder in SOURCE_ROOTS], [".cpp", ".inl"])
+    needles = [macro.encode("ascii") for macro in macros]
+
+    calls = []
+    for fileName in fileNames:
+        if file_contains(fileName, needles):
+            calls.extend(analyzer.analyze_file(fileName))
+    if args.release_only:
+        calls = [call for call in calls if call.release == "compiled in"]
+
+    for call in calls:
+        where = f"{call.function} ({call.hotBase})" if call.hotBase else call.function
+        loop = " in loop" if call.inLoop else ""
+        print(f"{call.path}:{call.line}: {call.macro} in {where}{loop}, release: {call.release}")
+        print(f"    {call.code}")
+
+    print()
+    print(f"{len(calls)} call(s) in per frame code, {sum(1 for c in calls if c.release == 'compiled in')} compiled into release builds.")
+    for macro in sorted({call.macro for call in calls}):
+        macroCalls = [call for call in calls if call.macro == macro]
+        states = sorted({call.release for call in macroCalls})
+        print(f"  {macro:<20} {len(macroCalls):>5}  release: {', '.join(states)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding="utf-8") as file:
+            json.dump([call._asdict() for call in calls], file, indent=1)
+        print(f"Wrote {len(calls)} call(s) to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+# Created with python 3.11.4
+
+# This module maintains a persistent index of the #include graph of Core, Generals and GeneralsMD.
+# Every include directive is resolved against the include paths of the translation units in
+# compile_commands.json, the way the compiler searches them. The parsed directives are stored per
+# file together with its content hash, so an update only reparses files that changed, and the
+# resolved graph is reused as is if neither the files nor the compilation database changed.
+#
+# Usage:
+#   python include_graph.py update
+#   python include_graph.py includers Core/Libraries/Include/Lib/BaseType.h --transitive
+#   python include_graph.py includes GeneralsMD/Code/GameEngine/Include/Common/GameCommon.h --transitive
+#   python include_graph.py unresolved [--all]
+#
+# Other scripts use load_include_graph() to query the graph.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from typing import Iterable, NamedTuple
+
+from codemod_io import decode_source, write_if_changed
+from codemod_manifest import hash_content
+from compile_db import CompileCommand, add_compile_db_arguments, find_compile_commands, load_compile_db, project_dir
+from cpp_lexer import lex
+from file_selection import select_files
+
+GRAPH_FORMAT_VERSION = 1
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+default_graph_path = os.path.join(current_dir, ".include_graph.json")
+
+SOURCE_ROOTS = ["Core", "Generals", "GeneralsMD", "Dependencies"]
+SOURCE_EXTENSIONS = [".h", ".hpp", ".inl", ".c", ".cpp", ".cc", ".cxx"]
+TRANSLATION_UNIT_EXTENSIONS = (".c", ".cpp", ".cc", ".cxx")
+
+RE_INCLUDE = re.compile(r'[ \t]*#[ \t]*include[ \t]*([<"])([^">\r\n]*)[">]')
+
+
+class IncludeDirective(NamedTuple):
+    line: int       # 1 based line number
+    angled: bool    # True for #include <...>, False for #include "..."
+    spelled: str    # File name as written in the directive
+
+
+def parse_include_directives(text: str) -> list[IncludeDirective]:
+    """
+    Returns the include directives of a text. Directives inside of comments and string literals are ignored.
+    """
+    if "include" not in text:
+        return []
+    directives = []
+    for index, line in enumerate(lex(text).lines):
+        if line.directive != "include":
+            continue
+        match = RE_INCLUDE.match(line.text)
+        if match is not None:
+            directives.append(IncludeDirective(index + 1, match.group(1) == "<", match.group(2).strip()))
+    return directives
+
+
+class IncludeResolver:
+    """
+    Resolves include directives like the compiler does: quoted includes are searched in the folder of the
+    including file first, then both forms are searched in the include directories in order.
+    Lookups are cached, so resolving the same directive for many files costs one dict access.
+    """
+
+    def __init__(self):
+        self._isFile: dict[str, bool] = {}
+        self._cache: dict[tuple, str | None] = {}
+
+    def is_file(self, path: str) -> bool:
+        result = self._isFile.get(path)
+        if result is None:
+            result = os.path.isfile(path)
+            self._isFile[path] = result
+        return result
+
+    def resolve(self, includerDir: str, directive: IncludeDirective, includeDirs: tuple) -> str | None:
+        spelled = directive.spelled.replace("\\", "/")
+        key = ("" if directive.angled else includerDir, spelled, includeDirs)
+        if key in self._cache:
+            return self._cache[key]
+
+        resolved = None
+        if os.path.isabs(spelled):
+            if self.is_file(spelled):
+                resolved = os.path.normpath(spelled)
+        else:
+            searchDirs = includeDirs if directive.angled else (includerDir, *includeDirs)
+            for searchDir in searchDirs:
+                candidate = os.path.normpath(os.path.join(searchDir, spelled))
+                if self.is_file(candidate):
+                    resolved = candidate
+                    break
+
+        self._cache[key] = resolved
+        return resolved
+
+
+class IncludeGraph:
+    """
+    Directed graph of the resolved includes. Files are identified by their path relative to the project
+    folder with '/' separators, or by their absolute path if they are outside of the project folder.
+    Files outside of the project folder, like system or SDK headers, are leaves of the graph.
+    """
+
+    def __init__(self, path: str = default_graph_path, root: str = project_dir):
+        self.path = path
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.compileCommands: dict = {}
+        self.fingerprint = ""
+        self.files: dict[str, list] = {}                    # file -> [mtime_ns, size, hash, directives]
+        self.translationUnits: list[str] = []
+        self.edges: dict[str, list[str]] = {}               # file -> included files
+        self.unresolved: dict[str, list[IncludeDirective]] = {}
+        self.dirty = False
+        self.parsedCount = 0
+        self._includers: dict[str, list[str]] | None = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != GRAPH_FORMAT_VERSION or data.get("root") != self.root:
+            return
+        self.compileCommands = data.get("compileCommands", {})
+        self.fingerprint = data.get("fingerprint", "")
+        self.files = {name: [entry[0], entry[1], entry[2], [IncludeDirective(*d) for d in entry[3]]]
+                      for name, entry in data.get("files", {}).items()}
+        self.translationUnits = data.get("translationUnits", [])
+        self.edges = data.get("edges", {})
+        self.unresolved = {name: [IncludeDirective(*d) for d in directives]
+                           for name, directives in data.get("unresolved", {}).items()}
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        data = {
+            "format": GRAPH_FORMAT_VERSION,
+            "root": self.root,
+            "compileCommands": self.compileCommands,
+            "fingerprint": self.fingerprint,
+            "files": self.files,
+            "translationUnits": self.translationUnits,
+            "edges": self.edges,
+            "unresolved": self.unresolved,
+        }
+        write_if_changed(self.path, json.dumps(data, sort_keys=True), encoding="utf-8", newline="\n")
+        self.dirty = False
+
+    def key(self, path: str) -> str:
+        """
+        Returns the graph key of a file path. Relative paths are taken relative to the project folder.
+        """
+        path = os.path.normpath(os.path.join(self.root, path))
+        if path.startswith(self.root + os.sep):
+            return os.path.relpath(path, self.root).replace(os.sep, "/")
+        return path
+
+    def abspath(self, key: str) -> str:
+        return os.path.normpath(os.path.join(self.root, key))
+
+    def is_internal(self, key: str) -> bool:
+        return not os.path.isabs(key)
+
+    # Parsing
+
+    def _directives(self, key: str) -> list[IncludeDirective] | None:
+        """
+        Returns the include directives of a project file, reparsing it only if its size, mtime and content hash changed.
+        Returns None if the file does not exist.
+        """
+        path = self.abspath(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        entry = self.files.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[3]
+
+        with open(path, 'rb') as file:
+            data = file.read()
+        contentHash = hash_content(data)
+        if entry is not None and entry[2] == contentHash:
+            entry[0], entry[1] = st.st_mtime_ns, st.st_size
+        else:
+            text, _ = decode_source(data)
+            entry = [st.st_mtime_ns, st.st_size, contentHash, parse_include_directives(text)]
+            self.files[key] = entry
+            self.parsedCount += 1
+        self.dirty = True
+        return entry[3]
+
+    # Building
+
+    def update(self, commands: list[CompileCommand], compileCommandsPath: str | None = None) -> bool:
+        """
+        Brings the graph up to date with the files on disk and the given compile commands.
+        Returns True if the graph was resolved again, False if the stored graph was still valid.
+        """
+        self.parsedCount = 0
+        self._includers = None
+
+        sourceFiles = [self.key(path) for path in select_files(None, [os.path.join(self.root, r) for r in SOURCE_ROOTS], SOURCE_EXTENSIONS)]
+        commandFiles = [self.key(command.file) for command in commands]
+        reachable = dict.fromkeys(f for f in (*sourceFiles, *commandFiles) if self.is_internal(f))
+
+        # Parse (or reuse) every file first. The fingerprint covers the contents of all files and the compile commands.
+        fingerprint = hashlib.sha1()
+        for key in dict.fromkeys([*reachable, *self.files]):
+            if self._directives(key) is not None:
+                fingerprint.update(f"{key}\0{self.files[key][2]}\0".encode("utf-8", errors="surrogateescape"))
+        if compileCommandsPath is not None:
+            with open(compileCommandsPath, 'rb') as file:
+                compileCommandsHash = hash_content(file.read())
+            self.compileCommands = {"path": compileCommandsPath, "hash": compileCommandsHash}
+        else:
+            self.compileCommands = {}
+        fingerprint.update(json.dumps(self.compileCommands, sort_keys=True).encode("utf-8"))
+
+        # Drop files that no longer exist
+        for key in [key for key in self.files if not os.path.isfile(self.abspath(key))]:
+            del self.files[key]
+            self.dirty = True
+
+        fingerprint = fingerprint.hexdigest()
+        if fingerprint == self.fingerprint and self.edges:
+            return False
+
+        self._resolve(commands, sourceFiles)
+        self.fingerprint = fingerprint
+        self.dirty = True
+        return True
+
+    def _resolve(self, commands: list[CompileCommand], sourceFiles: list[str]) -> None:
+        resolver = IncludeResolver()
+        edges: dict[str, dict[str, None]] = {}
+        resolvedLines: dict[str, set[int]] = {}
+        visited: set[tuple[str, tuple]] = set()
+        queue: deque[tuple[str, tuple]] = deque()
+
+        def visit(key: str, includeDirs: tuple) -> None:
+            if self.is_internal(key) and (key, includeDirs) not in visited:
+                visited.add((key, includeDirs))
+                queue.append((key, includeDirs))
+
+        # Every file is resolved with the include paths of each translation unit that reaches it.
+        allIncludeDirs: dict[str, None] = {}
+        translationUnits = []
+        for command in commands:
+            key = self.key(command.file)
+            translationUnits.append(key)
+            allIncludeDirs.update(dict.fromkeys(command.includeDirs))
+            for forced in command.forcedIncludes:
+                forcedKey = self.key(forced)
+                edges.setdefault(key, {})[forcedKey] = None
+                visit(forcedKey, command.includeDirs)
+            visit(key, command.includeDirs)
+
+        # Files that no translation unit reaches, for example sources of targets missing from the
+        # compilation database, are resolved with the include paths of all translation units.
+        fallbackDirs = tuple(allIncludeDirs)
+        if not commands:
+            translationUnits = [key for key in sourceFiles if key.lower().endswith(TRANSLATION_UNIT_EXTENSIONS)]
+
+        while True:
+            while queue:
+                key, includeDirs = queue.popleft()
+                directives = self._directives(key)
+                if not directives:
+                    continue
+                includerDir = os.path.dirname(self.abspath(key))
+                fileEdges = edges.setdefault(key, {})
+                fileResolvedLines = resolvedLines.setdefault(key, set())
+                for directive in directives:
+                    resolved = resolver.resolve(includerDir, directive, includeDirs)
+                    if resolved is None:
+                        continue
+                    target = self.key(resolved)
+                    fileEdges[target] = None
+                    fileResolvedLines.add(directive.line)
+                    visit(target, includeDirs)
+
+            unreached = [key for key in sourceFiles if key not in edges]
+            if not unreached:
+                break
+            for key in unreached:
+                edges.setdefault(key, {})
+                visit(key, fallbackDirs)
+
+        self.translationUnits = sorted(translationUnits)
+        self.edges = {key: sorted(targets) for key, targets in sorted(edges.items())}
+        self.unresolved = {}
+        for key in self.edges:
+            if not self.is_internal(key) or key not in self.files:
+                continue
+            missing = [d for d in self.files[key][3] if d.line not in resolvedLines.get(key, ())]
+            if missing:
+                self.unresolved[key] = missing
+
+    # Queries
+
+    def includes_of(self, path: str) -> list[str]:
+        """
+        Returns the files directly included by a file.
+        """
+        return self.edges.get(self.key(path), [])
+
+    def includers(self) -> dict[str, list[str]]:
+        """
+        Returns the reversed graph: file -> files that directly include it.
+        """
+        if self._includers is None:
+            includers: dict[str, list[str]] = {}
+            for key, targets in self.edges.items():
+                for target in targets:
+                    includers.setdefault(target, []).append(key)
+            self._includers = includers
+        return self._includers
+
+    def includers_of(self, path: str, transitive: bool = False) -> set[str]:
+        """
+        Returns the files that include a file, directly or, if transitive is set, through other files.
+        """
+        key = self.key(path)
+        if not transitive:
+            return set(self.includers().get(key, []))
+        return _reachable(key, self.includers()) - {key}
+
+    def closure(self, path: str) -> set[str]:
+        """
+        Returns all files that a file includes directly or indirectly.
+        """
+        key = self.key(path)
+        return _reachable(key, self.edges) - {key}
+
+    def translation_units_including(self, path: str) -> set[str]:
+        """
+        Returns the translation units that include a file directly or indirectly.
+        """
+        return self.includers_of(path, transitive=True) & set(self.translationUnits)
+
+    def unresolved_includes(self, includeAngled: bool = False) -> dict[str, list[IncludeDirective]]:
+        """
+        Returns the directives that did not resolve to a file, by file. Angled includes are mostly system and
+        SDK headers that are not part of the include paths and are only returned if includeAngled is set.
+        """
+        result = {}
+        for key, directives in self.unresolved.items():
+            directives = [d for d in directives if includeAngled or not d.angled]
+            if directives:
+                result[key] = directives
+        return result
+
+
+def _reachable(start: str, graph: dict[str, list[str]]) -> set[str]:
+    seen = {start}
+    stack = [start]
+    while stack:
+        for target in graph.get(stack.pop(), ()):
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+    return seen
+
+
+def add_include_graph_arguments(parser) -> None:
+    add_compile_db_arguments(parser)
+    parser.add_argument("--graph", default=default_graph_path,
+                        help=f"Path of the stored include graph (default: {default_graph_path})")
+    parser.add_argument("--no-update", action="store_true",
+                        help="Query the stored graph as is, without checking the files for changes")
+
+
+def load_include_graph(args, quiet: bool = False) -> IncludeGraph:
+    """
+    Returns the include graph, brought up to date unless --no-update is given.
+    """
+    graph = IncludeGraph(args.graph)
+    if args.no_update and graph.edges:
+        return graph
+
+    compileCommandsPath = find_compile_commands(args.compile_commands)
+    if compileCommandsPath is None and not quiet:
+        print("No compile_commands.json found. Configure a build with CMake first, or pass --compile-commands.")
+        print("Resolving includes relative to the including files only.")
+    commands = load_compile_db(compileCommandsPath) if compileCommandsPath else []
+
+    resolved = graph.update(commands, compileCommandsPath)
+    graph.save()
+    if not quiet:
+        state = "resolved" if resolved else "up to date"
+        print(f"Include graph {state}: {len(graph.edges)} file(s), {graph.parsedCount} parsed.")
+    return graph
+
+
+def print_files(files: Iterable[str]) -> None:
+    for name in sorted(files):
+        print(f"  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the #include graph of the project.")
+    add_include_graph_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("update", help="Bring the stored graph up to date")
+
+    includersParser = subparsers.add_parser("includers", help="List the files that include FILE")
+    includersParser.add_argument("file")
+    includersParser.add_argument("--transitive", action="store_true", help="Also list indirect includers")
+    includersParser.add_argument("--tus", action="store_true", help="Only list translation units")
+
+    includesParser = subparsers.add_parser("includes", help="List the files that FILE includes")
+    includesParser.add_argument("file")
+    includesParser.add_argument("--transitive", action="store_true", help="List the transitive closure")
+
+    unresolvedParser = subparsers.add_parser("unresolved", help="List the include directives that did not resolve")
+    unresolvedParser.add_argument("--all", action="store_true", help="Also list unresolved #include <...> directives")
+
+    args = parser.parse_args()
+    graph = load_include_graph(args)
+
+    if args.command == "includers":
+        if args.tus:
+            files = graph.translation_units_including(args.file)
+        else:
+            files = graph.includers_of(args.file, args.transitive)
+        print(f"{len(files)} file(s) include {graph.key(args.file)}:")
+        print_files(files)
+
+    elif args.command == "includes":
+        files = graph.closure(args.file) if args.transitive else graph.includes_of(args.file)
+        print(f"{graph.key(args.file)} includes {len(files)} file(s):")
+        print_files(files)
+
+    elif args.command == "unresolved":
+        unresolved = graph.unresolved_includes(args.all)
+        count = 0
+        for key, directives in sorted(unresolved.items()):
+            for directive in directives:
+                begin, end = ("<", ">") if directive.angled else ('"', '"')
+                print(f"{key}:{directive.line}: {begin}{directive.spelled}{end}")
+                count += 1
+        print(f"{count} unresolved include(s) in {len(unresolved)} file(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+memory_pool_audit.py
+
+Cross-references the memory pool glued classes with the PoolSizes tables of both games.
+
+Classes get their pool with MEMORY_POOL_GLUE_WITH_USERLOOKUP_CREATE or W3DMPO_CODE. These pools are created
+with the initial and overflow sizes of the PoolSizeRec entry of the same name in
+Core/GameEngine/Source/Common/System/GameMemoryInitPools_<game>.inl, see userMemoryAdjustPoolSize() in
+GameMemoryInit.cpp. Classes below Core use the tables of both games. The audit reports:
+  - classes without an entry: the game hits a DEBUG_CRASH when the pool is created.
+  - entries without a class: dead table rows, or a pool that is created by name somewhere else.
+  - duplicate entries: the first one wins, the later ones are ignored.
+  - suspicious sizes: not positive, not a multiple of 4, or an overflow larger than the initial size.
+
+A runtime pool usage dump can be given to suggest right-sized values. The dump is the POOLINFO lines that
+MemoryPool::debugPoolInfoReport() writes to the debug log in MEMORYPOOL_DEBUG builds:
+  POOLINFO,  POOLNAME, BLKSZ, INIT, OVRFL, USED, TOTAL, PEAK
+With several dumps, for example of several long skirmishes, the highest peak of every pool is used.
+
+Usage:
+  python memory_pool_audit.py [--game GENERALS|ZEROHOUR] [--usage debug.log ...] [--headroom 0.25]
+                              [--write-ini MemoryPools.ini] [--apply]
+
+--write-ini writes the suggestions in the format of Data/INI/MemoryPools.ini, which overrides the table at
+startup without a rebuild. --apply writes them to the PoolSizes tables.
+"""
+
+import argparse
+import math
+import os
+import re
+from typing import NamedTuple
+
+from codemod_io import read_source, write_if_changed, write_source_if_changed
+from compile_db import project_dir
+from cpp_lexer import lex
+
+GAME_DIRS = {"GENERALS": "Generals", "ZEROHOUR": "GeneralsMD"}
+TABLE_DIR = "Core/GameEngine/Source/Common/System"
+TABLE_FILES = {"GENERALS": "GameMemoryInitPools_Generals.inl", "ZEROHOUR": "GameMemoryInitPools_GeneralsMD.inl"}
+SOURCE_ROOTS = ["Core", "Generals", "GeneralsMD"]
+SOURCE_EXTENSIONS = (".h", ".hpp", ".inl", ".cpp")
+
+# Macros whose pool sizes are looked up in the PoolSizes table
+LOOKUP_MACROS = ("MEMORY_POOL_GLUE_WITH_USERLOOKUP_CREATE", "W3DMPO_CODE")
+# Macros whose pool is created with explicit sizes, or found by name
+OTHER_MACROS = ("MEMORY_POOL_GLUE_WITH_EXPLICIT_CREATE", "MEMORY_POOL_GLUE")
+
+RE_GLUE = re.compile(r'\b(MEMORY_POOL_GLUE_WITH_USERLOOKUP_CREATE|MEMORY_POOL_GLUE_WITH_EXPLICIT_CREATE|MEMORY_POOL_GLUE|W3DMPO_CODE)'
+                     r'\s*\(\s*(\w+)\s*(?:,\s*"([^"]*)"\s*)?')
+RE_POOL_SIZE = re.compile(r'^(\s*\{\s*"([^"]*)"\s*,\s*)(-?\d+)(\s*,\s*)(-?\d+)')
+RE_POOL_INFO = re.compile(r'POOLINFO\s*,\s*([^,]+?)\s*,\s*(\d+)\s*,\s*(-?\d+)\s*,\s*(-?\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)')
+
+MEM_BOUND_ALIGNMENT = 4
+
+
+class PoolClass(NamedTuple):
+    name: str           # Class name
+    pool: str           # Pool name
+    macro: str
+    path: str           # Relative to the project folder
+    line: int           # 1 based
+    games: tuple        # Games that compile the class
+
+
+class PoolSize(NamedTuple):
+    pool: str
+    initial: int
+    overflow: int
+    line: int           # 1 based line in the table file
+
+
+class PoolUsage(NamedTuple):
+    pool: str
+    blockSize: int
+    initial: int
+    overflow: int
+    peak: int
+
+
+class Finding(NamedTuple):
+    game: str
+    kind: str           # "no entry", "no class", "duplicate", "size" or "usage"
+    pool: str
+    location: str
+    message: str
+
+
+def games_of(path: str) -> tuple:
+    for game, folder in GAME_DIRS.items():
+        if path.startswith(folder + "/"):
+            return (game,)
+    return tuple(GAME_DIRS)
+
+
+def round_up_mem_bound(count: int) -> int:
+    """
+    Mirrors roundUpMemBound() of GameMemoryInit.cpp.
+    """
+    if count < MEM_BOUND_ALIGNMENT:
+        return MEM_BOUND_ALIGNMENT
+    return (count + MEM_BOUND_ALIGNMENT - 1) & ~(MEM_BOUND_ALIGNMENT - 1)
+
+
+def find_pool_classes(root: str = project_dir) -> list[PoolClass]:
+    """
+    Returns the classes that use one of the pool glue macros. Macro definitions, comments and strings are skipped.
+    """
+    classes = []
+    for folder in SOURCE_ROOTS:
+        for subdir, _, files in os.walk(os.path.join(root, folder)):
+            for file in files:
+                if not file.lower().endswith(SOURCE_EXTENSIONS):
+                    continue
+                path = os.path.join(subdir, file)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if b"MEMORY_POOL_GLUE" not in data and b"W3DMPO_CODE" not in data:
+                    continue
+                relPath = os.path.relpath(path, root).replace(os.sep, "/")
+                for index, lexedLine in enumerate(lex(read_source(path).text).lines):
+                    if lexedLine.directive:
+                        continue
+                    for match in RE_GLUE.finditer(lexedLine.text):
+                        begin, end = match.span(1)
+                        if lexedLine.code[begin:end] != match.group(1) or match.group(2) == "ARGCLASS":
+                            continue
+                        # W3DMPO_CODE names the pool after the class
+                        pool = match.group(3) if match.group(3) is not None else match.group(2)
+                        classes.append(PoolClass(match.group(2), pool, match.group(1), relPath, index + 1, games_of(relPath)))
+    return classes
+
+
+def table_path(game: str, root: str = project_dir) -> str:
+    return os.path.join(root, TABLE_DIR, TABLE_FILES[game])
+
+
+def read_pool_sizes(game: str, root: str = project_dir) -> list[PoolSize]:
+    sizes = []
+    for index, lexedLine in enumerate(lex(read_source(table_path(game, root)).text).lines):
+        match = RE_POOL_SIZE.match(lexedLine.text)
+        if match is not None and not lexedLine.code[:match.start(2)].strip().startswith("/"):
+            sizes.append(PoolSize(match.group(2), int(match.group(3)), int(match.group(5)), index + 1))
+    return sizes
+
+
+def read_pool_usage(paths: list[str]) -> dict[str, PoolUsage]:
+    """
+    Returns the highest peak usage of every pool in the POOLINFO lines of the files.
+    """
+    usage: dict[str, PoolUsage] = {}
+    for path in paths:
+        with open(path, 'r', encoding="utf-8", errors="replace") as file:
+            for line in file:
+                match = RE_POOL_INFO.search(line)
+                if match is None:
+                    continue
+                pool = match.group(1).strip()
+                blockSize, initial, overflow, _, _, peak = (int(g) for g in match.groups()[1:])
+                known = usage.get(pool)
+                if known is None or known.peak < peak:
+                    usage[pool] = PoolUsage(pool, blockSize, initial, overflow, peak)
+    return usage
+
+
+def suggest_size(size: PoolSize, usage: PoolUsage, headroom: float, minWaste: int) -> tuple[int, int] | None:
+    """
+    Returns the suggested initial and overflow sizes of a pool, or None if the current ones are fine.
+    Pools that overflowed at peak grow, so the peak fits into the initial allocation plus headroom.
+    Pools whose peak left more than minWaste bytes of the initial allocation unused shrink to the same target.
+    """
+    target = round_up_mem_bound(math.ceil(usage.peak * (1.0 + headroom)))
+    overflowed = usage.peak > size.initial
+    wasted = (size.initial - target) * usage.blockSize
+    if not overflowed and wasted < minWaste:
+        return None
+    overflow = size.overflow
+    if overflow > target:
+        overflow = round_up_mem_bound(max(target // 8, 16))
+    if (target, overflow) == (size.initial, size.overflow):
+        return None
+    return target, overflow
+
+
+def audit(game: str, classes: list[PoolClass], sizes: list[PoolSize], usage: dict[str, PoolUsage],
+          headroom: float, minWaste: int) -> tuple[list[Finding], dict[str, tuple[int, int]]]:
+    """
+    Returns the findings of one game and the suggested sizes by pool name.
+    """
+    tableFile = f"{TABLE_DIR}/{TABLE_FILES[game]}"
+    findings = []
+    gameClasses = [c for c in classes if game in c.games]
+    lookupPools = {c.pool for c in gameClasses if c.macro in LOOKUP_MACROS}
+    otherPools = {c.pool for c in gameClasses if c.macro not in LOOKUP_MACROS}
+
+    entries: dict[str, PoolSize] = {}
+    for size in sizes:
+        location = f"{tableFile}:{size.line}"
+        first = entries.setdefault(size.pool, size)
+        if first is not size:
+            findings.append(Finding(game, "duplicate", size.pool, location,
+                                    f"duplicate entry, line {first.line} wins ({first.initial}, {first.overflow})"))
+            continue
+        if size.initial <= 0 or size.overflow < 0:
+            findings.append(Finding(game, "size", size.pool, location, f"illegal size ({size.initial}, {size.overflow})"))
+        elif size.initial % MEM_BOUND_ALIGNMENT or size.overflow % MEM_BOUND_ALIGNMENT:
+            findings.append(Finding(game, "size", size.pool, location,
+                                    f"({size.initial}, {size.overflow}) is not a multiple of {MEM_BOUND_ALIGNMENT}"))
+        elif size.overflow > size.initial:
+            findings.append(Finding(game, "size", size.pool, location,
+                                    f"overflow {size.overflow} is larger than initial {size.initial}"))
+        if size.pool not in lookupPools:
+            note = "pool is created with explicit sizes or found by name" if size.pool in otherPools else "no class uses this pool"
+            findings.append(Finding(game, "no class", size.pool, location, note))
+
+    reported = set()
+    for poolClass in gameClasses:
+        if poolClass.macro in LOOKUP_MACROS and poolClass.pool not in entries and poolClass.pool not in reported:
+            reported.add(poolClass.pool)
+            findings.append(Finding(game, "no entry", poolClass.pool, f"{poolClass.path}:{poolClass.line}",
+                                    f"{poolClass.name} has no PoolSizeRec entry"))
+
+    suggestions = {}
+    for pool, poolUsage in usage.items():
+        size = entries.get(pool)
+        if size is None:
+            continue
+        suggestion = suggest_size(size, poolUsage, headroom, minWaste)
+        if suggestion is not None:
+            suggestions[pool] = suggestion
+            state = "overflowed" if poolUsage.peak > size.initial else "underused"
+            findings.append(Finding(game, "usage", pool, f"{tableFile}:{size.line}",
+                                    f"{state}: peak {poolUsage.peak} of {size.initial} blocks of {poolUsage.blockSize} bytes, "
+                                    f"suggest ({suggestion[0]}, {suggestion[1]}) instead of ({size.initial}, {size.overflow})"))
+    return findings, suggestions
+
+
+def apply_suggestions(game: str, suggestions: dict[str, tuple[int, int]], root: str = project_dir) -> bool:
+    """
+    Writes suggested sizes to the first entry of each pool in the PoolSizes table of the game.
+    """
+    path = table_path(game, root)
+    source = read_source(path)
+    lines = source.lines()
+    done = set()
+    for index, line in enumerate(lines):
+        match = RE_POOL_SIZE.match(line)
+        if match is None or match.group(2) not in suggestions or match.group(2) in done:
+            continue
+        done.add(match.group(2))
+        initial, overflow = suggestions[match.group(2)]
+        lines[index] = f"{match.group(1)}{initial}{match.group(4)}{overflow}{line[match.end():]}"
+    return write_source_if_changed(path, "".join(lines), source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-reference memory pool glued classes with the PoolSizes tables.")
+    parser.add_argument("--game", choices=list(GAME_DIRS), action="append", help="Game to audit (default: both)")
+    parser.add_argument("--usage", nargs="+", default=[], metavar="FILE",
+                        help="Debug logs or files with the POOLINFO lines of a pool usage dump")
+    parser.add_argument("--headroom", type=float, default=0.25,
+                        help="Fraction above the peak to suggest as initial size (default: 0.25)")
+    parser.add_argument("--min-waste", type=int, default=16 * 1024,
+                        help="Unused bytes at peak above which a pool is suggested to shrink (default: 16384)")
+    parser.add_argument("--write-ini", metavar="FILE", help="Write the suggestions as a MemoryPools.ini to FILE")
+    parser.add_argument("--apply", action="store_true", help="Write the suggestions to the PoolSizes tables")
+    args = parser.parse_args()
+    if args.write_ini and len(args.game or GAME_DIRS) != 1:
+        parser.error("--write-ini needs a single --game, since every game reads its own MemoryPools.ini")
+
+    games = args.game or list(GAME_DIRS)
+    classes = find_pool_classes()
+    usage = read_pool_usage(args.usage)
+    if args.usage:
+        print(f"Read the usage of {len(usage)} pool(s).")
+
+    iniLines = []
+    for game in games:
+        sizes = read_pool_sizes(game)
+        findings, suggestions = audit(game, classes, sizes, usage, args.headroom, args.min_waste)
+        gameClasses = sum(1 for c in classes if game in c.games)
+        print(f"{game}: {gameClasses} pooled class(es), {len(sizes)} PoolSizeRec entries")
+        for kind in ("no entry", "no class", "duplicate", "size", "usage"):
+            for finding in (f for f in findings if f.kind == kind):
+                print(f"  {finding.location}: [{finding.kind}] {finding.pool}: {finding.message}")
+
+        if suggestions:
+            iniLines.append(f"; {game}\n")
+            iniLines.extend(f"{pool} {initial} {overflow}\n" for pool, (initial, overflow) in sorted(suggestions.items()))
+            if args.apply and apply_suggestions(game, suggestions):
+                print(f"  Wrote {len(suggestions)} suggestion(s) to {TABLE_FILES[game]}")
+
+    if args.write_ini:
+        write_if_changed(args.write_ini, "".join(iniLines), newline="\r\n")
+        print(f"Wrote {args.write_ini}")
+
+
+if __name__ == "__main__":
+    main()
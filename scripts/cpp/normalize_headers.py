@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+normalize_headers.py
+
+Normalize the include guards and '#pragma once' of .h files in a single pass per header.
+Replaces the former remove_mscver_from_pragma.py, replace_include_guards_with_pragma.py,
+remove_include_guards_pragma.py and harmonize_linebreaks_pragmaonce.py scripts.
+
+Steps (all enabled by default, select a subset with --steps):
+
+  msc_guard       Remove MSVC-only guards around '#pragma once':
+                    #if defined(_MSC_VER) / #ifdef _MSC_VER / #if _MSC_VER >= 1000
+                    #pragma once
+                    #endif
+
+  replace_guard   In files WITHOUT '#pragma once', replace a classic include guard
+                    #ifndef MACRO        OR     #if !defined(MACRO)
+                    #define MACRO               #define MACRO
+                    ... (substantive content) ...
+                    #endif
+                  with a single '#pragma once'.
+
+  remove_guard    In files WITH '#pragma once', remove the classic include guard.
+
+  pragma_spacing  Ensure exactly one blank line after '#pragma once', and exactly one
+                  blank line before it if there is any non-blank content above it.
+
+Guards are only touched if there is substantive content between the #define and its
+matching #endif, to avoid touching macro wrapper patterns like:
+    #ifndef ARRAY_SIZE
+    #define ARRAY_SIZE(x) ...
+    #endif
+
+Files keep their encoding, byte order mark and line break style.
+
+Output:
+- total .h files found
+- files changed, in total and per step
+- files without '#pragma once'
+"""
+
+from __future__ import annotations
+import argparse
+import re
+from pathlib import Path
+
+from codemod_io import read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+from preprocessor_index import ConditionalIndex, build_index
+
+STEPS = ["msc_guard", "replace_guard", "remove_guard", "pragma_spacing"]
+
+# Bump the version of a step whenever its output changes.
+STEP_VERSIONS = {
+    "msc_guard": 2,
+    "replace_guard": 2,
+    "remove_guard": 2,
+    "pragma_spacing": 2,
+}
+
+RE_PRAGMA_ONCE = re.compile(r'^\s*#\s*pragma\s+once\b', re.IGNORECASE)
+RE_PRAGMA_ONCE_LINE = re.compile(r'^\s*#\s*pragma\s+once\s*$', re.IGNORECASE)
+RE_BLANK = re.compile(r'^[ \t]*$')
+
+# Match any of the MSVC guard forms, given as "<directive> <condition>" of the conditional block.
+RE_MSC_IF = re.compile(
+    r'(?:'
+      r'if\s+defined\s*\(\s*_MSC_VER\s*\)'         # #if defined(_MSC_VER)
+      r'|ifdef\s+_MSC_VER'                         # #ifdef _MSC_VER
+      r'|if\s+_MSC_VER(?:\s*[<>!=]=?\s*\d+)?'      # #if _MSC_VER [op num]
+    r')',
+    re.IGNORECASE
+)
+
+# Search limits of the guard steps: (lines from the file start to search the guard in, lines between #if and #define)
+REPLACE_GUARD_WINDOW = (200, 12)
+REMOVE_GUARD_WINDOW = (150, 10)
+
+
+def is_blank(s: str) -> bool:
+    return s.strip() == ""
+
+def is_comment_or_blank(s: str) -> bool:
+    t = s.strip()
+    if not t:
+        return True
+    # Treat single-line comments and block-comment-only lines as non-substantive.
+    return t.startswith('//') or t.startswith('/*') or t.endswith('*/')
+
+def has_substantive_content(lines: list[str], start_idx: int, end_idx: int) -> bool:
+    """
+    Return True if there's at least one non-blank, non-comment-only line
+    between start_idx (inclusive) and end_idx (exclusive).
+    """
+    for k in range(start_idx, end_idx):
+        if not is_comment_or_blank(lines[k]):
+            return True
+    return False
+
+def find_msc_guards(index: ConditionalIndex, lines: list[str]) -> set[int]:
+    """
+    Returns the indices of the lines to remove for MSVC-only guards around '#pragma once':
+    the #if line, the #endif line and the blank lines in between. The pragma line is kept.
+    """
+    remove_idxs: set[int] = set()
+    for block in index.iter_blocks():
+        if len(block.branches) != 1 or block.endifLine is None:
+            continue
+        if not RE_MSC_IF.fullmatch(f"{block.directive} {block.condition}"):
+            continue
+
+        # require only '#pragma once' and blank lines inside of the block
+        body = range(block.ifLine + 1, block.endifLine)
+        pragma_idxs = [k for k in body if RE_PRAGMA_ONCE_LINE.match(lines[k])]
+        if len(pragma_idxs) != 1:
+            continue
+        if not all(RE_BLANK.match(lines[k]) for k in body if k != pragma_idxs[0]):
+            continue
+
+        remove_idxs.update(k for k in range(block.ifLine, block.endifLine + 1) if k != pragma_idxs[0])
+    return remove_idxs
+
+def find_guard_lines(index: ConditionalIndex, lines: list[str], window: tuple[int, int]) -> tuple[int, set[int], str | None]:
+    """
+    Locates the classic include guard.
+    Returns (i_if, indices of the guard lines to remove including tidy blank lines, reason_if_not_found).
+    """
+    found = index.find_include_guard(window[0], window[1], is_comment_or_blank)
+    if not found:
+        return -1, set(), "no classic guard detected"
+
+    i_if, i_define, macro, i_endif = found
+
+    # Ensure the region contains more than just the macro define
+    if not has_substantive_content(lines, i_define + 1, i_endif):
+        return -1, set(), "guard region has no content (macro wrapper)"
+
+    guard_idxs = {i_if, i_define, i_endif}
+    # Tidy: blank line immediately after the #define and before the #if
+    if i_define + 1 < len(lines) and is_blank(lines[i_define + 1]):
+        guard_idxs.add(i_define + 1)
+    if i_if - 1 >= 0 and is_blank(lines[i_if - 1]):
+        guard_idxs.add(i_if - 1)
+    # Tidy: blank line immediately before the #endif
+    if i_endif - 1 >= 0 and is_blank(lines[i_endif - 1]):
+        guard_idxs.add(i_endif - 1)
+
+    return i_if, guard_idxs, None
+
+def normalize_pragma_once_spacing(lines: list[str]) -> list[str]:
+    """
+    Enforce the spacing rules around every '#pragma once' line in a single pass.
+    """
+    new_lines: list[str] = []
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        if not RE_PRAGMA_ONCE_LINE.match(line):
+            new_lines.append(line)
+            i += 1
+            continue
+
+        # BEFORE: exactly one blank line if there is any non-blank content above, none otherwise
+        while new_lines and is_blank(new_lines[-1]):
+            new_lines.pop()
+        if new_lines:
+            new_lines.append("")
+        new_lines.append(line)
+
+        # AFTER: exactly one blank line
+        i += 1
+        while i < n and is_blank(lines[i]):
+            i += 1
+        new_lines.append("")
+
+    return new_lines
+
+def normalize_header(text: str, steps: list[str]) -> tuple[str, list[str], str | None]:
+    """
+    Apply the selected steps to the text of a header.
+    Returns (new_text, names of the steps that changed something, reason why the guard was not touched).
+    """
+    had_trailing_nl = text.endswith("\n")
+    lines = text.split("\n")
+    if had_trailing_nl:
+        lines.pop()
+
+    index = build_index(text)
+    changed_steps: list[str] = []
+    guard_reason: str | None = None
+    remove_idxs: set[int] = set()
+    replace_lines: dict[int, str] = {}
+
+    if "msc_guard" in steps:
+        msc_idxs = find_msc_guards(index, lines)
+        if msc_idxs:
+            remove_idxs |= msc_idxs
+            changed_steps.append("msc_guard")
+
+    has_pragma = any(RE_PRAGMA_ONCE.match(l) for l in lines)
+    guard_step = "remove_guard" if has_pragma else "replace_guard"
+    guard_changed = False
+    if guard_step in steps:
+        window = REMOVE_GUARD_WINDOW if has_pragma else REPLACE_GUARD_WINDOW
+        i_if, guard_idxs, guard_reason = find_guard_lines(index, lines, window)
+        if guard_idxs:
+            remove_idxs |= guard_idxs
+            if not has_pragma:
+                # The '#pragma once' takes the place of the opening guard line
+                remove_idxs.discard(i_if)
+                replace_lines[i_if] = "#pragma once"
+            guard_changed = True
+            changed_steps.append(guard_step)
+
+    if remove_idxs or replace_lines:
+        lines = [replace_lines.get(idx, ln) for idx, ln in enumerate(lines) if idx not in remove_idxs]
+
+    if guard_changed:
+        # Tidy leading/trailing blank lines
+        begin = 0
+        end = len(lines)
+        while begin < end and is_blank(lines[begin]):
+            begin += 1
+        while end > begin and is_blank(lines[end - 1]):
+            end -= 1
+        lines = lines[begin:end]
+
+    if "pragma_spacing" in steps:
+        spaced_lines = normalize_pragma_once_spacing(lines)
+        if spaced_lines != lines:
+            lines = spaced_lines
+            changed_steps.append("pragma_spacing")
+
+    new_text = "\n".join(lines) + ("\n" if had_trailing_nl else "")
+    return new_text, changed_steps, guard_reason
+
+def main():
+    ap = argparse.ArgumentParser(description="Normalize include guards and '#pragma once' of .h files in a single pass.")
+    ap.add_argument("directory", type=Path, help="Root directory to scan recursively")
+    ap.add_argument("--steps", default=",".join(STEPS),
+                    help=f"Comma separated list of the steps to run (default: {','.join(STEPS)})")
+    ap.add_argument("--verbose", "-v", action="store_true",
+                    help="List the reason for every header whose include guard was not touched")
+    add_manifest_arguments(ap)
+    add_file_selection_arguments(ap)
+    args = ap.parse_args()
+
+    root: Path = args.directory
+    if not root.exists() or not root.is_dir():
+        print(f"Error: {root} is not a directory")
+        raise SystemExit(2)
+
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        print(f"Error: unknown step(s) {', '.join(unknown)}. Known steps: {', '.join(STEPS)}")
+        raise SystemExit(2)
+
+    headers = [Path(p) for p in select_files(args, [str(root)], [".h"])]
+    manifest = open_manifest(args)
+    changed = 0
+    known_clean = 0
+    step_counts = {step: 0 for step in steps}
+    no_pragma: list[str] = []
+    guard_reasons: list[str] = []
+    failed: list[str] = []
+
+    for hdr in headers:
+        try:
+            content_hash = manifest.get_hash(str(hdr))
+            if all(manifest.is_clean(content_hash, step, STEP_VERSIONS[step]) for step in steps):
+                known_clean += 1
+                if manifest.get_note(content_hash, "pragma_spacing") == "no pragma":
+                    no_pragma.append(str(hdr))
+                continue
+            source = read_source(str(hdr), manifest)
+        except Exception as e:
+            failed.append(f"{hdr} (read-error: {e})")
+            continue
+
+        new_text, changed_steps, guard_reason = normalize_header(source.text, steps)
+        if guard_reason and args.verbose:
+            guard_reasons.append(f"{hdr} ({guard_reason})")
+        lacks_pragma = not any(RE_PRAGMA_ONCE.match(l) for l in new_text.split("\n"))
+        if lacks_pragma:
+            no_pragma.append(str(hdr))
+
+        try:
+            did_write = write_source_if_changed(str(hdr), new_text, source)
+        except Exception as e:
+            failed.append(f"{hdr} (write-error: {e})")
+            continue
+
+        if did_write:
+            changed += 1
+            for step in changed_steps:
+                step_counts[step] += 1
+        else:
+            for step in steps:
+                manifest.mark_clean(content_hash, step, STEP_VERSIONS[step], "no pragma" if lacks_pragma else "")
+
+    manifest.save()
+
+    print(f"Total .h files found: {len(headers)}")
+    print(f"Files changed:        {changed}")
+    for step in steps:
+        print(f"  {step + ':':<16}    {step_counts[step]}")
+    print(f"Files known clean:    {known_clean}")
+    if no_pragma:
+        print("Files without '#pragma once':")
+        for p in no_pragma:
+            print(f"  - {p}")
+    if guard_reasons:
+        print("Include guards not touched:")
+        for p in guard_reasons:
+            print(f"  - {p}")
+    if failed:
+        print("Failed:")
+        for p in failed:
+            print(f"  - {p}")
+
+if __name__ == "__main__":
+    main()
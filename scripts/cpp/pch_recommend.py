@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+pch_recommend.py
+
+Proposes the contents of target_precompile_headers for the CMake targets of the project.
+
+For every target, the translation units are taken from compile_commands.json (the object file path names
+the target) and their includes from the include graph (see include_graph.py). A header is worth
+precompiling if many translation units of the target include it, if it and the headers it includes are
+large, and if they rarely change, because every change to a precompiled header rebuilds the whole target.
+
+The model counts text parsed per full build of a target, like header_cost.py:
+  - saving:   each file of the precompiled set is no longer parsed by the TUs that include it, but parsed
+              once to build the precompiled header and loaded by every TU at --load-cost of its size
+  - churn:    each git commit of the --since period that touched a file of the precompiled set rebuilds
+              the TUs of the target that do not include it. This extra work is spread over --builds full
+              builds of the period and charged against the saving
+Headers are picked greedily by their net saving, until no header saves more than it costs.
+The parsed text is a rough stand-in for the frontend time of the compiler.
+
+Entries of the current declaration marked "Must be first" are kept first, and entries that do not resolve
+to a file of the graph, like <windows.h> without the Windows SDK, are kept as they are. Precompiled headers
+of INTERFACE targets apply to the targets that link them, so an INTERFACE target is analyzed with the
+translation units of all those targets, found from the target_link_libraries of cmake_sources.py.
+
+Usage:
+  python pch_recommend.py [TARGET]... [--min-coverage 0.3] [--max-headers 20] [--since "2 years ago"]
+  python pch_recommend.py g_gameengine z_gameengine --top 30
+
+Without targets, all targets that declare target_precompile_headers and have translation units are analyzed.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import subprocess
+from collections import Counter
+from typing import NamedTuple
+
+from cmake_sources import load_source_index
+from compile_db import CompileCommand, command_target, find_compile_commands, load_compile_db, project_dir
+from header_cost import file_size, format_size
+from include_graph import (SOURCE_ROOTS, IncludeDirective, IncludeGraph, IncludeResolver, _reachable,
+                           add_include_graph_arguments, load_include_graph)
+
+RE_PCH_BEGIN = re.compile(r'^\s*target_precompile_headers\(\s*([\w.+-]+)\s+(PRIVATE|PUBLIC|INTERFACE)\b(.*)$')
+RE_ENTRY = re.compile(r'^(\[\["(?P<quoted>[^"]+)"\]\]|<(?P<angled>[^>]+)>|"?(?P<path>[^"\s]+)"?)')
+
+
+class PchEntry(NamedTuple):
+    text: str           # Line of the declaration, without indentation
+    spelled: str        # Header as the entry names it
+    angled: bool        # <header>
+    isPath: bool        # A file path relative to the CMakeLists.txt, rather than an include name
+    pinned: bool        # Marked "Must be first"
+
+
+class PchDeclaration(NamedTuple):
+    target: str
+    scope: str
+    cmakeFile: str      # Path of the CMakeLists.txt, relative to the project folder
+    line: int           # 1 based line number of target_precompile_headers(
+    entries: list
+
+
+class Candidate(NamedTuple):
+    key: str
+    tus: int
+    closureSize: int
+    commits: int
+    saving: int
+
+
+class TargetModel:
+    """
+    The translation units of a target, how many of them include each file, and the git commits of each file.
+    """
+
+    def __init__(self, graph: IncludeGraph, commands: list[CompileCommand], churn: dict[str, set[int]],
+                 loadCost: float, builds: int):
+        self.graph = graph
+        self.commands = commands
+        self.churn = churn
+        self.loadCost = loadCost
+        self.builds = builds
+        self.sizes: dict[str, int] = {}
+        self.counts: Counter[str] = Counter()
+        self.totalSize = 0
+        for command in commands:
+            key = graph.key(command.file)
+            forced = {graph.key(path) for path in command.forcedIncludes}
+            closure = set()
+            for target in graph.edges.get(key, ()):
+                if target not in forced:
+                    closure |= _reachable(target, graph.edges)
+            self.counts.update(closure)
+            self.totalSize += self.size(key) + sum(self.size(k) for k in closure)
+
+    @property
+    def tuCount(self) -> int:
+        return len(self.commands)
+
+    def size(self, key: str) -> int:
+        return file_size(self.graph, key, self.sizes)
+
+    def contents(self, key: str) -> set[str]:
+        return _reachable(key, self.graph.edges)
+
+    def net_saving(self, files: set[str], chargedCommits: set[int], tus: int) -> tuple[int, set[int]]:
+        """
+        Returns the net saving per full build of adding files to the precompiled header, and the commits of
+        the files that are not charged yet.
+        """
+        saving = sum((self.counts[key] - 1 - self.tuCount * self.loadCost) * self.size(key) for key in files)
+        commits = set()
+        for key in files:
+            commits |= self.churn.get(key, set())
+        commits -= chargedCommits
+        averageSize = self.totalSize / self.tuCount
+        saving -= len(commits) * (self.tuCount - tus) * averageSize / self.builds
+        return int(saving), commits
+
+    def evaluate(self, headers: list[str]) -> int:
+        """
+        Returns the net saving per full build of precompiling the headers.
+        """
+        files = set()
+        for key in headers:
+            files |= self.contents(key)
+        tus = min((self.counts[key] for key in headers), default=self.tuCount)
+        return self.net_saving(files, set(), tus)[0]
+
+    def recommend(self, pinned: list[str], minCoverage: float, maxHeaders: int) -> list[Candidate]:
+        covered = set()
+        for key in pinned:
+            covered |= self.contents(key)
+        chargedCommits: set[int] = set()
+        for key in covered:
+            chargedCommits |= self.churn.get(key, set())
+
+        minTus = max(2, minCoverage * self.tuCount)
+        candidates = [key for key, count in self.counts.items()
+                      if count >= minTus and key in self.graph.edges and key not in covered
+                      and not key.lower().endswith((".c", ".cpp", ".cc", ".cxx"))]
+
+        chosen: list[Candidate] = []
+        while len(chosen) < maxHeaders:
+            best = None
+            for key in candidates:
+                if key in covered:
+                    continue
+                files = self.contents(key) - covered
+                saving, commits = self.net_saving(files, chargedCommits, self.counts[key])
+                if best is None or saving > best[0]:
+                    best = (saving, key, files, commits)
+            if best is None or best[0] <= 0:
+                break
+            saving, key, files, commits = best
+            covered |= files
+            chargedCommits |= commits
+            chosen.append(Candidate(key, self.counts[key], sum(self.size(k) for k in self.contents(key)),
+                                    len(commits), saving))
+        return chosen
+
+
+def load_churn(since: str) -> dict[str, set[int]]:
+    """
+    Returns the commits of the period that touched each file, as indices, by path relative to the project folder.
+    """
+    result = subprocess.run(["git", "log", f"--since={since}", "--format=%x00%H", "--name-only", "--", *SOURCE_ROOTS],
+                            cwd=project_dir, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if result.returncode != 0:
+        print(f"git log failed, ignoring churn: {result.stderr.strip()}")
+        return {}
+    churn: dict[str, set[int]] = {}
+    for index, commit in enumerate(result.stdout.split("\0")[1:]):
+        for path in commit.splitlines()[1:]:
+            if path:
+                churn.setdefault(path, set()).add(index)
+    return churn
+
+
+def parse_entry(text: str) -> PchEntry | None:
+    code = text.split("#", 1)[0].strip()
+    match = RE_ENTRY.match(code) if code else None
+    if match is None:
+        return None
+    pinned = "must be first" in text.lower()
+    if match.group("quoted"):
+        return PchEntry(text, match.group("quoted"), False, False, pinned)
+    if match.group("angled"):
+        return PchEntry(text, match.group("angled"), True, False, pinned)
+    return PchEntry(text, match.group("path"), False, True, pinned)
+
+
+def find_pch_declarations() -> dict[str, PchDeclaration]:
+    """
+    Returns the target_precompile_headers declarations of all CMakeLists.txt, by target.
+    Entries that are commented out are left out.
+    """
+    declarations = {}
+    for root in ["", *SOURCE_ROOTS]:
+        for subdir, dirs, files in os.walk(os.path.join(project_dir, root)):
+            if not root:
+                dirs.clear()
+            if "CMakeLists.txt" not in files:
+                continue
+            path = os.path.join(subdir, "CMakeLists.txt")
+            with open(path, 'r', encoding="utf-8", errors="replace") as file:
+                lines = file.read().splitlines()
+            index = 0
+            while index < len(lines):
+                match = RE_PCH_BEGIN.match(lines[index])
+                index += 1
+                if match is None:
+                    continue
+                target, scope, rest = match.groups()
+                declaration = PchDeclaration(target, scope, os.path.relpath(path, project_dir).replace(os.sep, "/"), index, [])
+                pending = [rest] if rest.strip() else []
+                while ")" not in (pending[-1].split("#", 1)[0] if pending else "") and index < len(lines):
+                    pending.append(lines[index])
+                    index += 1
+                for text in pending:
+                    text = text.strip()
+                    if text.split("#", 1)[0].rstrip().endswith(")"):
+                        text = text.replace(")", "", 1).strip()
+                    entry = parse_entry(text)
+                    if entry is not None:
+                        declaration.entries.append(entry)
+                declarations[target] = declaration
+    return declarations
+
+
+def resolve_entry(entry: PchEntry, declaration: PchDeclaration, includeDirs: tuple,
+                  graph: IncludeGraph, resolver: IncludeResolver) -> str | None:
+    if entry.isPath:
+        path = os.path.join(project_dir, os.path.dirname(declaration.cmakeFile), entry.spelled)
+        return graph.key(path) if os.path.isfile(path) else None
+    resolved = resolver.resolve("", IncludeDirective(0, True, entry.spelled), includeDirs)
+    return graph.key(resolved) if resolved else None
+
+
+def spell_header(key: str, model: TargetModel, includeDirs: tuple, resolver: IncludeResolver) -> str:
+    """
+    Returns the CMake entry of a header, using the most common spelling of its include directives that
+    resolves to it with the include paths of the target.
+    """
+    graph = model.graph
+    baseName = os.path.basename(key).lower()
+    spellings: Counter[str] = Counter()
+    for includer in graph.includers().get(key, ()):
+        entry = graph.files.get(includer)
+        if entry is None:
+            continue
+        for directive in entry[3]:
+            if os.path.basename(directive.spelled.replace("\\", "/")).lower() == baseName:
+                spellings[(directive.spelled.replace("\\", "/"), directive.angled)] += 1
+    for (spelled, angled), _ in spellings.most_common():
+        resolved = resolver.resolve("", IncludeDirective(0, True, spelled), includeDirs)
+        if resolved is not None and graph.key(resolved) == key:
+            return f"<{spelled}>" if angled and not graph.is_internal(key) else f'[["{spelled}"]]'
+    path = graph.abspath(key)
+    for includeDir in includeDirs:
+        if path.startswith(includeDir + os.sep):
+            spelled = os.path.relpath(path, includeDir).replace(os.sep, "/")
+            resolved = resolver.resolve("", IncludeDirective(0, True, spelled), includeDirs)
+            if resolved is not None and graph.key(resolved) == key:
+                return f'[["{spelled}"]]'
+    if graph.is_internal(key):
+        return f"${{PROJECT_SOURCE_DIR}}/{key}"
+    return f'[["{key}"]]'
+
+
+def order_headers(chosen: list[str], graph: IncludeGraph) -> list[str]:
+    """
+    Orders the headers so that a header comes after the chosen headers that it includes.
+    """
+    chosenSet = set(chosen)
+    ordered: dict[str, None] = {}
+
+    def emit(key: str, visiting: set[str]) -> None:
+        if key in ordered or key in visiting:
+            return
+        visiting.add(key)
+        for dependency in chosen:
+            if dependency != key and dependency in chosenSet and dependency in _reachable(key, graph.edges):
+                emit(dependency, visiting)
+        ordered[key] = None
+
+    for key in chosen:
+        emit(key, set())
+    return list(ordered)
+
+
+def report_target(target: str, commands: list[CompileCommand], declaration: PchDeclaration | None,
+                  graph: IncludeGraph, churn: dict[str, set[int]], args) -> None:
+    model = TargetModel(graph, commands, churn, args.load_cost, args.builds)
+    includeDirs = tuple(dict.fromkeys(path for command in commands for path in command.includeDirs))
+    resolver = IncludeResolver()
+
+    pinnedEntries = []
+    keptEntries = []
+    current = []
+    if declaration is not None:
+        for entry in declaration.entries:
+            key = resolve_entry(entry, declaration, includeDirs, graph, resolver)
+            if key is not None:
+                current.append(key)
+            if entry.pinned:
+                pinnedEntries.append((entry, key))
+            elif key is None:
+                keptEntries.append(entry)
+
+    pinned = [key for _, key in pinnedEntries if key is not None]
+    chosen = model.recommend(pinned, args.min_coverage, args.max_headers)
+
+    print(f"== {target}: {model.tuCount} translation unit(s), {format_size(model.totalSize)} of text parsed per full build")
+    if declaration is not None:
+        print(f"Declared in {declaration.cmakeFile}:{declaration.line}")
+    print(f"{'Rank':>4}  {'TUs':>9}  {'Closure':>9}  {'Commits':>7}  {'Saving':>10}  Header")
+    for rank, candidate in enumerate(chosen[:args.top], 1):
+        coverage = f"{candidate.tus * 100 // model.tuCount}%"
+        print(f"{rank:>4}  {candidate.tus:>4} {coverage:>4}  {format_size(candidate.closureSize):>9}  "
+              f"{candidate.commits:>7}  {format_size(candidate.saving):>10}  {candidate.key}")
+
+    currentSaving = model.evaluate(current) if current else 0
+    proposedSaving = model.evaluate([*pinned, *(c.key for c in chosen)])
+    total = max(model.totalSize, 1)
+    print(f"Estimated saving per full build: current {format_size(currentSaving)} ({currentSaving * 100 / total:.0f}%), "
+          f"proposed {format_size(proposedSaving)} ({proposedSaving * 100 / total:.0f}%) of the parsed text")
+
+    currentSet = set(current)
+    proposedKeys = order_headers([c.key for c in chosen], graph)
+    added = [key for key in proposedKeys if key not in currentSet]
+    removed = [key for key in current if key not in proposedKeys and key not in pinned]
+    if added or removed:
+        print(f"Adds {len(added)} and removes {len(removed)} header(s) of the current declaration.")
+    for key in removed:
+        print(f"  - {key}")
+
+    scope = declaration.scope if declaration is not None else "PRIVATE"
+    print()
+    print(f"target_precompile_headers({target} {scope}")
+    for entry, _ in pinnedEntries:
+        print(f"    {entry.text}")
+    for key in proposedKeys:
+        print(f"    {spell_header(key, model, includeDirs, resolver)}")
+    for entry in keptEntries:
+        print(f"    {entry.text}")
+    print(")")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose the precompiled headers of CMake targets from the include graph and git churn.")
+    add_include_graph_arguments(parser)
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help="CMake target to analyze (default: all targets that declare precompiled headers)")
+    parser.add_argument("--min-coverage", type=float, default=0.3,
+                        help="Minimum share of the translation units of a target that must include a header (default: 0.3)")
+    parser.add_argument("--max-headers", type=int, default=20, help="Maximum number of headers to propose per target (default: 20)")
+    parser.add_argument("--since", default="2 years ago", help="Period of the git history used for churn (default: '2 years ago')")
+    parser.add_argument("--builds", type=int, default=500,
+                        help="Number of full builds of a target over the --since period, to weigh churn against (default: 500)")
+    parser.add_argument("--load-cost", type=float, default=0.05,
+                        help="Cost of loading a precompiled header, as a share of parsing it (default: 0.05)")
+    parser.add_argument("--top", type=int, default=50, help="Number of proposed headers to list per target (default: 50)")
+    args = parser.parse_args()
+
+    compileCommandsPath = find_compile_commands(args.compile_commands)
+    if compileCommandsPath is None:
+        parser.error("No compile_commands.json found. Configure a build with CMake first, or pass --compile-commands.")
+
+    commandsByTarget: dict[str, list[CompileCommand]] = {}
+    for command in load_compile_db(compileCommandsPath):
+        target = command_target(command)
+        if target is not None:
+            commandsByTarget.setdefault(target, []).append(command)
+    if not commandsByTarget:
+        parser.error(f"{compileCommandsPath} does not name the object files of the commands. Generate it with Ninja or Makefiles.")
+
+    declarations = find_pch_declarations()
+
+    # INTERFACE targets compile nothing themselves; their translation units are those of their consumers.
+    sourceIndex = load_source_index()
+    for target in sorted({*args.targets, *declarations}):
+        if target not in commandsByTarget and sourceIndex.kind_of(target) == "INTERFACE":
+            commands = [c for consumer in sourceIndex.consumers_of(target) for c in commandsByTarget.get(consumer, [])]
+            if commands:
+                commandsByTarget[target] = commands
+
+    targets = args.targets or sorted(target for target in declarations if target in commandsByTarget)
+    graph = load_include_graph(args)
+    churn = load_churn(args.since)
+
+    for target in targets:
+        if target not in commandsByTarget:
+            print(f"== {target}: no translation units in {compileCommandsPath}, skipped.\n")
+            continue
+        report_target(target, commandsByTarget[target], declarations.get(target), graph, churn, args)
+
+
+if __name__ == "__main__":
+    main()
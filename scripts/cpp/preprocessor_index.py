@@ -0,0 +1,415 @@
+# Created with python 3.11.4
+
+# This module provides an index of the preprocessor conditional blocks of a file.
+# The nested #if/#ifdef/#ifndef ... #elif/#else ... #endif tree is built in a single linear pass over the
+# lexed lines, so directives inside of comments and string literals are not mistaken for real ones.
+# Include guard detection, dead block removal and condition rewriting are queries on this tree.
+# For a given set of defined macros, the index also tells which lines are compiled, following the #define and
+# #undef directives of the file itself.
+
+import re
+from functools import lru_cache
+from typing import Iterator
+
+from cpp_lexer import LexedLine, lex
+
+OPEN_DIRECTIVES = ("if", "ifdef", "ifndef")
+BRANCH_DIRECTIVES = ("elif", "else")
+
+RE_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*', re.ASCII)
+RE_NOT_DEFINED = re.compile(r'!\s*defined\s*\(\s*([A-Za-z_][A-Za-z0-9_]*)\s*\)', re.ASCII)
+RE_DEFINE = re.compile(r'^\s*#\s*define\s+([A-Za-z_][A-Za-z0-9_]*)\b.*$', re.ASCII)
+RE_DIRECTIVE_HEAD = re.compile(r'\s*#\s*[A-Za-z_]*')
+RE_DEFINED = re.compile(r'\bdefined\s*(?:\(\s*([A-Za-z_][A-Za-z0-9_]*)\s*\)|([A-Za-z_][A-Za-z0-9_]*))', re.ASCII)
+RE_CONDITION_IDENTIFIER = re.compile(r'(?<![A-Za-z0-9_])[A-Za-z_][A-Za-z0-9_]*', re.ASCII)
+RE_CONDITION_TOKEN = re.compile(r'\s*(?:(0[xX][0-9a-fA-F]+|\d+)|(\|\||&&|==|!=|<=|>=|<<|>>|[-+*/%<>&|^!~()?:]))', re.ASCII)
+RE_DEFINE_OR_UNDEF = re.compile(r'\s*#\s*(define|undef)\s+([A-Za-z_][A-Za-z0-9_]*)', re.ASCII)
+
+
+class ConditionalBranch:
+    """
+    One branch of a conditional block, for example the #if part or the #else part.
+    The branch spans the lines [line, endLine), where line holds its directive and endLine holds the
+    directive of the next branch or the #endif.
+    """
+
+    def __init__(self, directive: str, condition: str, line: int):
+        self.directive = directive
+        self.condition = condition
+        self.line = line
+        self.endLine: int | None = None
+        self.children: list["ConditionalBlock"] = []
+
+    def __repr__(self):
+        return f"ConditionalBranch(#{self.directive} {self.condition}, lines {self.line}-{self.endLine})"
+
+
+class ConditionalBlock:
+    """
+    A complete #if ... #endif block with all of its branches.
+    """
+
+    def __init__(self, parent: "ConditionalBlock | None", depth: int):
+        self.parent = parent
+        self.depth = depth
+        self.branches: list[ConditionalBranch] = []
+        self.endifLine: int | None = None
+
+    @property
+    def ifLine(self) -> int:
+        return self.branches[0].line
+
+    @property
+    def directive(self) -> str:
+        return self.branches[0].directive
+
+    @property
+    def condition(self) -> str:
+        return self.branches[0].condition
+
+    def has_else(self) -> bool:
+        return any(branch.directive == "else" for branch in self.branches)
+
+    def iter_blocks(self) -> Iterator["ConditionalBlock"]:
+        yield self
+        for branch in self.branches:
+            for child in branch.children:
+                yield from child.iter_blocks()
+
+    def __repr__(self):
+        return f"ConditionalBlock(#{self.directive} {self.condition}, lines {self.ifLine}-{self.endifLine})"
+
+
+def _and(a: bool | None, b: bool | None) -> bool | None:
+    if a is False or b is False:
+        return False
+    return True if a and b else None
+
+
+def _or(a: bool | None, b: bool | None) -> bool | None:
+    if a or b:
+        return True
+    return False if a is False and b is False else None
+
+
+def _not(a: bool | None) -> bool | None:
+    return None if a is None else not a
+
+
+# Binary operators of #if expressions by C precedence, higher binds tighter.
+BINARY_PRECEDENCE = {
+    "*": 10, "/": 10, "%": 10,
+    "+": 9, "-": 9,
+    "<<": 8, ">>": 8,
+    "<": 7, ">": 7, "<=": 7, ">=": 7,
+    "==": 6, "!=": 6,
+    "&": 5,
+    "^": 4,
+    "|": 3,
+    "&&": 2,
+    "||": 1,
+}
+
+
+def _tokenize_condition(expr: str) -> list[int | str] | None:
+    tokens: list[int | str] = []
+    pos = 0
+    end = len(expr.rstrip())
+    while pos < end:
+        match = RE_CONDITION_TOKEN.match(expr, pos)
+        if match is None:
+            return None
+        number, operator = match.groups()
+        if number is not None:
+            tokens.append(int(number, 16) if number[:2] in ("0x", "0X") else int(number, 8) if number[0] == "0" else int(number))
+        else:
+            tokens.append(operator)
+        pos = match.end()
+    return tokens
+
+
+def _apply_binary(operator: str, a: int, b: int) -> int:
+    if operator in ("/", "%"):
+        if b == 0:
+            raise ZeroDivisionError
+        # C truncates toward zero
+        quotient = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        return quotient if operator == "/" else a - quotient * b
+    if operator == "*": return a * b
+    if operator == "+": return a + b
+    if operator == "-": return a - b
+    if operator == "<<": return a << b
+    if operator == ">>": return a >> b
+    if operator == "<": return int(a < b)
+    if operator == ">": return int(a > b)
+    if operator == "<=": return int(a <= b)
+    if operator == ">=": return int(a >= b)
+    if operator == "==": return int(a == b)
+    if operator == "!=": return int(a != b)
+    if operator == "&": return a & b
+    if operator == "^": return a ^ b
+    if operator == "|": return a | b
+    if operator == "&&": return int(bool(a) and bool(b))
+    return int(bool(a) or bool(b))
+
+
+class _ConditionParser:
+    """
+    Evaluates the integer expression of an #if with the precedence and the integer arithmetic of C.
+    Raises ValueError for anything that is not a valid expression.
+    """
+
+    def __init__(self, tokens: list[int | str]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> int | str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> int | str:
+        token = self.peek()
+        if token is None:
+            raise ValueError("unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self) -> int:
+        value = self.conditional()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected token {self.peek()!r}")
+        return value
+
+    def conditional(self) -> int:
+        value = self.binary(1)
+        if self.peek() == "?":
+            self.take()
+            whenTrue = self.conditional()
+            if self.take() != ":":
+                raise ValueError("expected ':'")
+            whenFalse = self.conditional()
+            return whenTrue if value else whenFalse
+        return value
+
+    def binary(self, minPrecedence: int) -> int:
+        value = self.unary()
+        while True:
+            operator = self.peek()
+            precedence = BINARY_PRECEDENCE.get(operator) if isinstance(operator, str) else None
+            if precedence is None or precedence < minPrecedence:
+                return value
+            self.take()
+            value = _apply_binary(operator, value, self.binary(precedence + 1))
+
+    def unary(self) -> int:
+        token = self.take()
+        if isinstance(token, int):
+            return token
+        if token == "(":
+            value = self.conditional()
+            if self.take() != ")":
+                raise ValueError("expected ')'")
+            return value
+        if token == "!":
+            return int(not self.unary())
+        if token == "~":
+            return ~self.unary()
+        if token == "-":
+            return -self.unary()
+        if token == "+":
+            return self.unary()
+        raise ValueError(f"unexpected token {token!r}")
+
+
+def evaluate_condition(condition: str, defines: set[str]) -> bool | None:
+    """
+    Returns the value of an #if or #elif condition when the given macros are defined, or None if it cannot
+    be told. Defined macros count as 1 and undefined identifiers as 0, like the preprocessor does.
+    """
+    expr = RE_DEFINED.sub(lambda m: " 1 " if (m.group(1) or m.group(2)) in defines else " 0 ", condition)
+    expr = RE_CONDITION_IDENTIFIER.sub(lambda m: "1" if m.group(0) in defines else "0", expr)
+    # Function like macros turn into numbers followed by a parenthesis, which is not a valid expression.
+    # Invalid octal literals like 09 fail to tokenize.
+    try:
+        tokens = _tokenize_condition(expr)
+        if tokens is None:
+            return None
+        return bool(_ConditionParser(tokens).parse())
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def directive_condition(lines: list[LexedLine], index: int) -> tuple[str, int]:
+    """
+    Returns the normalized expression of the directive on line index, without comments,
+    and the index of the last line of the directive.
+    """
+    parts = []
+    last = index
+    while True:
+        code = lines[last].code.rstrip('\r\n')
+        continued = code.endswith('\\')
+        parts.append(code[:-1] if continued else code)
+        if not continued or last + 1 >= len(lines):
+            break
+        last += 1
+    text = " ".join(parts)
+    head = RE_DIRECTIVE_HEAD.match(text)
+    return " ".join(text[head.end():].split()), last
+
+
+class ConditionalIndex:
+    """
+    Nested conditional block tree of a text.
+    """
+
+    def __init__(self, text: str):
+        self.lines = lex(text).lines
+        self.blocks: list[ConditionalBlock] = []
+        self.unmatched: list[int] = []
+        self.unterminated: list[ConditionalBlock] = []
+        self._build()
+
+    def _build(self) -> None:
+        stack: list[ConditionalBlock] = []
+        lines = self.lines
+        for index, line in enumerate(lines):
+            directive = line.directive
+            if not directive:
+                continue
+
+            if directive in OPEN_DIRECTIVES:
+                condition, _ = directive_condition(lines, index)
+                parent = stack[-1] if stack else None
+                block = ConditionalBlock(parent, len(stack))
+                block.branches.append(ConditionalBranch(directive, condition, index))
+                if parent is not None:
+                    parent.branches[-1].children.append(block)
+                else:
+                    self.blocks.append(block)
+                stack.append(block)
+
+            elif directive in BRANCH_DIRECTIVES:
+                if not stack:
+                    self.unmatched.append(index)
+                    continue
+                block = stack[-1]
+                condition, _ = directive_condition(lines, index) if directive == "elif" else ("", index)
+                block.branches[-1].endLine = index
+                block.branches.append(ConditionalBranch(directive, condition, index))
+
+            elif directive == "endif":
+                if not stack:
+                    self.unmatched.append(index)
+                    continue
+                block = stack.pop()
+                block.branches[-1].endLine = index
+                block.endifLine = index
+
+        self.unterminated = stack
+
+    def iter_blocks(self) -> Iterator[ConditionalBlock]:
+        """
+        Iterates all blocks in the order of their #if lines.
+        """
+        for block in self.blocks:
+            yield from block.iter_blocks()
+
+    def active_lines(self, defines: set[str]) -> tuple[list[bool | None], set[str]]:
+        """
+        Returns for every line whether it is compiled when the given macros are defined (None if that depends
+        on a condition that cannot be evaluated), and the macros that are defined at the end of the text.
+        """
+        defines = set(defines)
+        result: list[bool | None] = []
+        stack: list[list] = []  # [active state of the parent, whether a branch was taken]
+        active: bool | None = True
+        for index, line in enumerate(self.lines):
+            directive = line.directive
+            if directive in OPEN_DIRECTIVES:
+                condition, _ = directive_condition(self.lines, index)
+                if directive == "if":
+                    value = evaluate_condition(condition, defines)
+                else:
+                    value = (condition in defines) == (directive == "ifdef")
+                stack.append([active, value])
+                active = _and(active, value)
+            elif directive in BRANCH_DIRECTIVES and stack:
+                parent, taken = stack[-1]
+                value = True if directive == "else" else evaluate_condition(directive_condition(self.lines, index)[0], defines)
+                stack[-1][1] = _or(taken, value)
+                active = _and(parent, _and(_not(taken), value))
+            elif directive == "endif" and stack:
+                active = stack.pop()[0]
+            elif directive in ("define", "undef") and active:
+                match = RE_DEFINE_OR_UNDEF.match(line.code)
+                if match is not None:
+                    if match.group(1) == "define":
+                        defines.add(match.group(2))
+                    else:
+                        defines.discard(match.group(2))
+            result.append(active)
+        return result, defines
+
+    def find_include_guard(self, searchWindow: int, defineLookahead: int, isCommentOrBlank) -> tuple[int, int, str, int] | None:
+        """
+        Locates a classic include guard with an #if line within the first searchWindow lines:
+            #ifndef MACRO        OR     #if !defined(MACRO)
+            #define MACRO               #define MACRO
+            ...                         ...
+            #endif                      #endif
+        The #define must follow within defineLookahead lines, only separated by lines for which isCommentOrBlank is True.
+        Returns (i_if, i_define, macro, i_endif) or None.
+        """
+        lines = self.lines
+        n = len(lines)
+        for block in self.iter_blocks():
+            i = block.ifLine
+            if i >= searchWindow:
+                break
+            if block.endifLine is None:
+                continue
+
+            macro = guard_macro(block.branches[0])
+            if macro is None:
+                continue
+
+            j = i + 1
+            maxLookahead = min(i + defineLookahead, n - 1)
+            foundDefineIndex = None
+            while j <= maxLookahead:
+                text = lines[j].text
+                if isCommentOrBlank(text):
+                    j += 1
+                    continue
+                mdef = RE_DEFINE.match(text)
+                if mdef and mdef.group(1) == macro:
+                    foundDefineIndex = j
+                break
+            if foundDefineIndex is None:
+                continue
+
+            return (i, foundDefineIndex, macro, block.endifLine)
+
+        return None
+
+
+def guard_macro(branch: ConditionalBranch) -> str | None:
+    """
+    Returns MACRO if the branch is '#ifndef MACRO' or '#if !defined(MACRO)', otherwise None.
+    """
+    if branch.directive == "ifndef":
+        if RE_IDENTIFIER.fullmatch(branch.condition):
+            return branch.condition
+    elif branch.directive == "if":
+        match = RE_NOT_DEFINED.fullmatch(branch.condition)
+        if match:
+            return match.group(1)
+    return None
+
+
+@lru_cache(maxsize=64)
+def build_index(text: str) -> ConditionalIndex:
+    """
+    Returns the conditional block index of text. Results are cached by content.
+    """
+    return ConditionalIndex(text)
@@ -3,10 +3,14 @@
 # This script applies basic formatting and cleanups to the various CPP files.
 # Just run it.
 
-import glob
+import argparse
 import os
 import re
 
+from codemod_io import file_contains, print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+
 
 def fix_string(line: str, typename: str) -> str:
     # Build a regex that allows arbitrary whitespace
@@ -16,6 +20,11 @@ def fix_string(line: str, typename: str) -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Remove redundant AsciiString and UnicodeString instantiations of string literals.")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
@@ -23,26 +32,29 @@ def main():
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
     utility_dir = os.path.join(root_dir, "Dependencies", "Utility")
-    fileNames = []
-    for ext in ["*.cpp", "*.h", "*.inl"]:
-        fileNames.extend(glob.glob(os.path.join(core_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generals_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(utility_dir, '**', ext), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir, utility_dir], [".cpp", ".h", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-
-        with open(fileName, 'w', encoding="cp1252") as file:
-            for line in lines:
-                line = fix_string(line, 'AsciiString')
-                line = fix_string(line, 'UnicodeString')
-                file.write(line)
+        # Only read the files that can contain a match
+        if not file_contains(fileName, [b"AsciiString", b"UnicodeString"]):
+            continue
+
+        source = read_source(fileName, manifest)
+        lines = source.lines()
+
+        newLines = []
+        for line in lines:
+            line = fix_string(line, 'AsciiString')
+            line = fix_string(line, 'UnicodeString')
+            newLines.append(line)
+
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
@@ -3,94 +3,126 @@
 # This script helps removing trailing CR LF characters from game debug log messages in the various CPP files.
 # Just run it.
 
-import glob
+import argparse
 import os
 
-
-def modifyLine(line: str) -> str:
-    searchWords = [
-        "DEBUG_LOG",
-        "DEBUG_LOG_LEVEL",
-        "DEBUG_CRASH",
-        "DEBUG_ASSERTLOG",
-        "DEBUG_ASSERTCRASH",
-        "RELEASE_CRASH",
-        "RELEASE_CRASHLOCALIZED",
-        "WWDEBUG_SAY",
-        "WWDEBUG_WARNING",
-        "WWRELEASE_SAY",
-        "WWRELEASE_WARNING",
-        "WWRELEASE_ERROR",
-        "WWASSERT_PRINT",
-        "WWDEBUG_ERROR",
-        "SNAPSHOT_SAY",
-        "SHATTER_DEBUG_SAY",
-        "DBGMSG",
-        ### "REALLY_VERBOSE_LOG",
-        "DOUBLE_DEBUG",
-        "PERF_LOG",
-        "CRCGEN_LOG",
-        "STATECHANGED_LOG",
-        "PING_LOG",
-        "BONEPOS_LOG",
-    ]
-
-    SEARCH_PATTERNS = [
-        r'\r\n"',
-        r'\n"',
-    ]
-
-    for searchWord in searchWords:
-        wordBegin = line.find(searchWord)
-        wordEnd = wordBegin + len(searchWord)
-
-        if wordBegin >= 0:
-            for searchPattern in SEARCH_PATTERNS:
-                searchPatternLen = len(searchPattern)
-                i = wordEnd
-                lookEnd = len(line) - searchPatternLen
-
-                while i < lookEnd:
-                    pattern = line[i:i+searchPatternLen]
-                    if pattern == searchPattern:
-                        lineCopy = line[:i] + '"' + line[i+searchPatternLen:]
-                        return lineCopy
-                    i += 1
-
-            break
-
-    return line
+from codemod_io import file_contains, print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+from text_matcher import MultiPatternMatcher
+
+
+LOG_MACROS = [
+    "DEBUG_LOG",
+    "DEBUG_LOG_LEVEL",
+    "DEBUG_CRASH",
+    "DEBUG_ASSERTLOG",
+    "DEBUG_ASSERTCRASH",
+    "RELEASE_CRASH",
+    "RELEASE_CRASHLOCALIZED",
+    "WWDEBUG_SAY",
+    "WWDEBUG_WARNING",
+    "WWRELEASE_SAY",
+    "WWRELEASE_WARNING",
+    "WWRELEASE_ERROR",
+    "WWASSERT_PRINT",
+    "WWDEBUG_ERROR",
+    "SNAPSHOT_SAY",
+    "SHATTER_DEBUG_SAY",
+    "DBGMSG",
+    ### "REALLY_VERBOSE_LOG",
+    "DOUBLE_DEBUG",
+    "PERF_LOG",
+    "CRCGEN_LOG",
+    "STATECHANGED_LOG",
+    "PING_LOG",
+    "BONEPOS_LOG",
+]
+
+# Ordered by preference. The first pattern found after a macro is removed.
+SEARCH_PATTERNS = [
+    r'\r\n"',
+    r'\n"',
+]
+
+
+def buildMatcher(macros: list[str] = LOG_MACROS) -> MultiPatternMatcher:
+    # Macros match whole identifiers only, so that for example DEBUG_LOG_RAW keeps its new line.
+    return MultiPatternMatcher({"macro": macros, "escape": SEARCH_PATTERNS}, wholeIdentifiers=True)
+
+
+DEFAULT_MATCHER = buildMatcher()
+
+
+def modifyLine(line: str, matcher: MultiPatternMatcher = DEFAULT_MATCHER) -> str:
+    # Collect the best escape pattern following each macro occurrence, up to the next macro occurrence.
+    removeSpans = []
+    best = None
+    afterMacro = False
+    for match in matcher.finditer(line):
+        if match.kind == "macro":
+            if best is not None:
+                removeSpans.append(best)
+            best = None
+            afterMacro = True
+        elif afterMacro:
+            priority = SEARCH_PATTERNS.index(match.text)
+            if best is None or priority < best[0]:
+                best = (priority, match.start, match.end)
+    if best is not None:
+        removeSpans.append(best)
+
+    if not removeSpans:
+        return line
+
+    lineCopy = ""
+    copyBegin = 0
+    for _, spanBegin, spanEnd in removeSpans:
+        lineCopy += line[copyBegin:spanBegin] + '"'
+        copyBegin = spanEnd
+    lineCopy += line[copyBegin:]
+    return lineCopy
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Remove trailing CR LF characters from game debug log messages.")
+    parser.add_argument("--macro", action="append", default=[],
+                        help="Additional logging macro to process (can be used multiple times)")
+    parser.add_argument("--no-default-macros", action="store_true",
+                        help="Only process the macros given with --macro")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
+    macros = args.macro if args.no_default_macros else LOG_MACROS + args.macro
+    matcher = buildMatcher(macros)
+    needles = [macro.encode("ascii") for macro in macros]
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
     core_dir = os.path.join(root_dir, "Core")
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
-    fileNames = []
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.inl'), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir], [".h", ".cpp", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-        with open(fileName, 'w', encoding="cp1252") as file:
-            for line in lines:
-                line = modifyLine(line)
-                file.write(line)
+        # Only read the files that can contain a match
+        if not file_contains(fileName, needles):
+            continue
+
+        source = read_source(fileName, manifest)
+        lines = source.lines()
+
+        newLines = [modifyLine(line, matcher) for line in lines]
+
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
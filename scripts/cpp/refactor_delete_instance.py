@@ -1,34 +1,43 @@
 # Created with python 3.11.4
 
-import glob
+import argparse
 import os
 
+from codemod_io import file_contains, print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from cpp_lexer import LexedLine, lex_lines
+from file_selection import add_file_selection_arguments, select_files
 
-def modifyLine(line: str) -> str:
-    if 'friend_deleteInstance()' in line:
+
+def modifyLine(lexedLine: LexedLine) -> str:
+    line = lexedLine.text
+    # Search the code only, not comments and string literals
+    code = lexedLine.code
+
+    if 'friend_deleteInstance()' in code:
         return line
 
-    deleteInstanceBegin = line.find('deleteInstance()')
+    deleteInstanceBegin = code.find('deleteInstance()')
     deleteInstanceEnd = deleteInstanceBegin + len('deleteInstance()')
     if deleteInstanceBegin >= 0:
         i = deleteInstanceBegin
 
         # Skip MemoryPoolObject::deleteInstance()
-        if i >= 2 and line[i-2:i] == '::':
+        if i >= 2 and code[i-2:i] == '::':
             return line
 
         # Skip void deleteInstance()
-        if i >= 5 and line[i-5:i] == 'void ':
+        if i >= 5 and code[i-5:i] == 'void ':
             return line
 
         # Skip void friend_deleteInstance()
-        if i >= 5 and line[i-5:i] == 'void ':
+        if i >= 5 and code[i-5:i] == 'void ':
             return line
 
         # Walk back to object end
         i -= 1
         while i >= 0:
-            ch = line[i]
+            ch = code[i]
             if ch != '>' and ch != '-' and not ch.isspace():
                 break
             i -= 1
@@ -36,7 +45,7 @@ def modifyLine(line: str) -> str:
 
         # Walk back to object begin
         while i >= 0:
-            ch = line[i]
+            ch = code[i]
             if ch.isspace() or ch == '{' or ch == '}':
                 break
             i -= 1
@@ -58,34 +67,36 @@ def modifyLine(line: str) -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Replace deleteInstance() calls with MemoryPoolObject::deleteInstance().")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
     core_dir = os.path.join(root_dir, "Core")
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
-    fileNames = []
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.inl'), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir], [".h", ".cpp", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-        with open(fileName, 'w', encoding="cp1252") as file:
-            for line in lines:
-                line = modifyLine(line)
-                file.write(line)
+        # Only read the files that can contain a match
+        if not file_contains(fileName, [b"deleteInstance()"]):
+            continue
+
+        source = read_source(fileName, manifest)
+        lines = source.lines()
+
+        newLines = [modifyLine(lexedLine) for lexedLine in lex_lines(lines)]
+
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
@@ -2,9 +2,14 @@
 
 # This script removes duplicate include directives from the codebase of Generals and GeneralsMD.
 
+import argparse
 import os
 import re
 
+from codemod_io import print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.join(current_dir, "..", "..")
 root_dir = os.path.normpath(root_dir)
@@ -12,30 +17,40 @@ core_dir = os.path.join(root_dir, "Core")
 generals_dir = os.path.join(root_dir, "Generals", "Code")
 generalsmd_dir = os.path.join(root_dir, "GeneralsMD", "Code")
 
-def remove_duplicate_includes_from_file(filepath):
+def remove_duplicate_includes_from_file(filepath, manifest):
     include_pattern = re.compile(r'^\s*#\s*include\s+[<"].+[>"].*$', re.MULTILINE)
     seen = set()
     output_lines = []
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = include_pattern.match(line)
-            if match:
-                normalized = line.strip()
-                if normalized in seen:
-                    continue  # Skip duplicate
-                seen.add(normalized)
-            output_lines.append(line)
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.writelines(output_lines)
-
-def process_directory(root_dir):
-    for subdir, _, files in os.walk(root_dir):
-        for file in files:
-            if file.endswith(('.cpp', '.h', '.hpp', '.c', '.inl')):
-                filepath = os.path.join(subdir, file)
-                remove_duplicate_includes_from_file(filepath)
-
-process_directory(generals_dir)
-process_directory(generalsmd_dir)
+    source = read_source(filepath, manifest)
+    for line in source.lines():
+        match = include_pattern.match(line)
+        if match:
+            normalized = line.strip()
+            if normalized in seen:
+                continue  # Skip duplicate
+            seen.add(normalized)
+        output_lines.append(line)
+
+    return write_source_if_changed(filepath, ''.join(output_lines), source)
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove duplicate include directives from the Generals and GeneralsMD code.")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
+    filepaths = select_files(args, [generals_dir, generalsmd_dir], ['.cpp', '.h', '.hpp', '.c', '.inl'])
+
+    manifest = open_manifest(args)
+    changed_count = 0
+    for filepath in filepaths:
+        if remove_duplicate_includes_from_file(filepath, manifest):
+            changed_count += 1
+
+    manifest.save()
+
+    print_change_summary(changed_count, len(filepaths))
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,13 @@
 # This script aims to find and remove superfluous trailing return words in functions.
 # Just run it.
 
-import glob
+import argparse
 import os
 
+from codemod_io import file_contains, print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+
 
 def apply_fix(line: str, nextLine: str) -> str:
     lineStripped = line.strip()
@@ -17,7 +21,33 @@ def apply_fix(line: str, nextLine: str) -> str:
     return line
 
 
+def apply_fixes(lines: list[str]) -> list[str]:
+    newLines = []
+    for index,line in enumerate(lines):
+        if index+1 < len(lines):
+            nextLineIndex = index + 1
+            nextLine = lines[nextLineIndex]
+            while (nextLine.isspace() or nextLine == "") and nextLineIndex+1 < len(lines):
+                nextLineIndex += 1
+                nextLine = lines[nextLineIndex]
+
+            line = apply_fix(line, nextLine)
+
+            if line == "":
+                while (newLines and newLines[-1].isspace()) or (newLines and newLines[-1] == ""):
+                    newLines.pop()
+
+        newLines.append(line)
+
+    return newLines
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Remove superfluous trailing return statements in functions.")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
@@ -25,40 +55,25 @@ def main():
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
     utility_dir = os.path.join(root_dir, "Dependencies", "Utility")
-    fileNames = []
-    for ext in ["*.cpp", "*.h", "*.inl"]:
-        fileNames.extend(glob.glob(os.path.join(core_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generals_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', ext), recursive=True))
-        fileNames.extend(glob.glob(os.path.join(utility_dir, '**', ext), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir, utility_dir], [".cpp", ".h", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-
-        with open(fileName, 'w', encoding="cp1252") as file:
-            newLines = []
-            for index,line in enumerate(lines):
-                if index+1 < len(lines):
-                    nextLineIndex = index + 1
-                    nextLine = lines[nextLineIndex]
-                    while (nextLine.isspace() or nextLine == "") and nextLineIndex+1 < len(lines):
-                        nextLineIndex += 1
-                        nextLine = lines[nextLineIndex]
-
-                    line = apply_fix(line, nextLine)
+        # Only read the files that can contain a match
+        if not file_contains(fileName, [b"return;", b"return ;"]):
+            continue
 
-                    if line == "":
-                        while (newLines and newLines[-1].isspace()) or (newLines and newLines[-1] == ""):
-                            newLines.pop()
+        source = read_source(fileName, manifest)
+        lines = source.lines()
 
-                newLines.append(line)
+        newLines = apply_fixes(lines)
 
-            file.writelines(newLines)
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
@@ -3,85 +3,97 @@
 # This script helps removing RTS_INTERNAL words from the various CPP files.
 # Just run it.
 
-import glob
+import argparse
 import os
+import re
+
+from codemod_io import file_contains, print_change_summary, read_source, write_source_if_changed
+from codemod_manifest import add_manifest_arguments, open_manifest
+from file_selection import add_file_selection_arguments, select_files
+from preprocessor_index import build_index
+from text_matcher import ReplaceTable
+
+
+REPLACE_TABLE = ReplaceTable({
+    "!defined(RTS_DEBUG) && !defined(RTS_INTERNAL)": "!defined(RTS_DEBUG)",
+    "!defined(RTS_INTERNAL) && !defined(RTS_DEBUG)": "!defined(RTS_DEBUG)",
+    "defined(RTS_DEBUG) || defined(RTS_INTERNAL)": "defined(RTS_DEBUG)",
+    "defined(RTS_INTERNAL) || defined(RTS_DEBUG)": "defined(RTS_DEBUG)",
+    "defined( RTS_INTERNAL ) || defined( RTS_DEBUG )": "defined(RTS_DEBUG)",
+    "defined RTS_DEBUG || defined RTS_INTERNAL": "defined(RTS_DEBUG)",
+    "RTS_DEBUG || RTS_INTERNAL": "RTS_DEBUG",
+})
 
 
 def modifyLine(line: str) -> str:
-    searchWords = [
-        "!defined(RTS_DEBUG) && !defined(RTS_INTERNAL)",
-        "!defined(RTS_INTERNAL) && !defined(RTS_DEBUG)",
-        "defined(RTS_DEBUG) || defined(RTS_INTERNAL)",
-        "defined(RTS_INTERNAL) || defined(RTS_DEBUG)",
-        "defined( RTS_INTERNAL ) || defined( RTS_DEBUG )",
-        "defined RTS_DEBUG || defined RTS_INTERNAL",
-        "RTS_DEBUG || RTS_INTERNAL",
-    ]
-
-    replaceWords = [
-        "!defined(RTS_DEBUG)",
-        "!defined(RTS_DEBUG)",
-        "defined(RTS_DEBUG)",
-        "defined(RTS_DEBUG)",
-        "defined(RTS_DEBUG)",
-        "defined(RTS_DEBUG)",
-        "RTS_DEBUG",
-    ]
-
-    for searchIdx, searchWord in enumerate(searchWords):
-        wordBegin = line.find(searchWord)
-        wordEnd = wordBegin + len(searchWord)
-        if wordBegin >= 0:
-            replaceWord = replaceWords[searchIdx]
-            lineCopy = line[:wordBegin] + replaceWord + line[wordEnd:]
-            return lineCopy
-
-    return line
+    return REPLACE_TABLE.replace(line)
+
+
+RE_RTS_INTERNAL_CONDITION = re.compile(r'ifdef RTS_INTERNAL|if defined\s*\(?\s*RTS_INTERNAL\s*\)?')
+RE_ELIF = re.compile(r'#\s*elif')
+
+
+def removeInternalBlocks(lines: list[str]) -> list[str]:
+    # RTS_INTERNAL is never defined. Drop the code of its #ifdef branches and keep the code of the other branches.
+    index = build_index("".join(lines))
+    removeIdxs = set()
+    replaceLines = {}
+
+    for block in index.iter_blocks():
+        if block.endifLine is None or block.ifLine in removeIdxs:
+            continue
+        if not RE_RTS_INTERNAL_CONDITION.fullmatch(f"{block.directive} {block.condition}"):
+            continue
+
+        firstBranch = block.branches[0]
+        removeIdxs.update(range(firstBranch.line, firstBranch.endLine))
+        if len(block.branches) == 1:
+            removeIdxs.add(block.endifLine)
+        elif block.branches[1].directive == "else":
+            removeIdxs.add(block.branches[1].line)
+            removeIdxs.add(block.endifLine)
+        else:
+            # The following #elif becomes the opening #if of the block
+            elifLine = block.branches[1].line
+            replaceLines[elifLine] = RE_ELIF.sub("#if", lines[elifLine], count=1)
+
+    return [replaceLines.get(idx, line) for idx, line in enumerate(lines) if idx not in removeIdxs]
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Remove RTS_INTERNAL from the preprocessor conditions.")
+    add_manifest_arguments(parser)
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.join(current_dir, "..", "..")
     root_dir = os.path.normpath(root_dir)
     core_dir = os.path.join(root_dir, "Core")
     generals_dir = os.path.join(root_dir, "Generals")
     generalsmd_dir = os.path.join(root_dir, "GeneralsMD")
-    fileNames = []
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(core_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generals_dir, '**', '*.inl'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.h'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.cpp'), recursive=True))
-    fileNames.extend(glob.glob(os.path.join(generalsmd_dir, '**', '*.inl'), recursive=True))
+    fileNames = select_files(args, [core_dir, generals_dir, generalsmd_dir], [".h", ".cpp", ".inl"])
 
+    manifest = open_manifest(args)
+    changedCount = 0
     for fileName in fileNames:
-        with open(fileName, 'r', encoding="cp1252") as file:
-            try:
-                lines = file.readlines()
-            except UnicodeDecodeError:
-                continue # Not good.
-        with open(fileName, 'w', encoding="cp1252") as file:
-            skipLine = 0
-            for line in lines:
-                # Skip RTS_INTERNAL ifdef blocks
-                if skipLine > 0:
-                    if "#if" in line:
-                        skipLine += 1
-                    elif "#endif" in line:
-                        skipLine -= 1
-                    continue
-                if skipLine > 0:
-                    continue
-                if line == "#ifdef RTS_INTERNAL\n" or line == "#if defined(RTS_INTERNAL)\n":
-                    skipLine += 1
-                    continue
-
-                line = modifyLine(line)
-                file.write(line)
+        # Only read the files that can contain a match
+        if not file_contains(fileName, [b"RTS_INTERNAL"]):
+            continue
+
+        source = read_source(fileName, manifest)
+        lines = source.lines()
+
+        newLines = []
+        for line in removeInternalBlocks(lines):
+            line = modifyLine(line)
+            newLines.append(line)
+
+        if write_source_if_changed(fileName, "".join(newLines), source):
+            changedCount += 1
 
+    manifest.save()
+    print_change_summary(changedCount, len(fileNames))
     return
 
 
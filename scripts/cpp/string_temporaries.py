@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+string_temporaries.py
+
+Finds AsciiString and UnicodeString work that allocates in hot code.
+
+Findings:
+  - construct:  an AsciiString(...) or UnicodeString(...) temporary.
+  - local:      a local string variable that is constructed on every pass.
+  - format:     a format() or format_va() call, which builds a new buffer.
+  - concat:     a concat() call, which grows the buffer.
+  - convert:    a translate() call between AsciiString and UnicodeString.
+  - by-value:   a string parameter passed by value instead of by const reference.
+The first five are listed when they are in a loop, or in a hot function: one that runs every frame as told by
+hot_path_logging.py, or one that takes at least 1% of the profile samples. Parameters passed by value are
+listed everywhere.
+
+Findings are ranked by score = weight of the kind * (1 + loop nesting depth) * heat of the function.
+The heat is 2 for functions that run every frame and 1 otherwise. With --profile, it is multiplied by
+1 + 100 * the share of the profile samples that the function takes, so a function with 5% of the samples
+counts 6 times. Profiles are read as folded stacks ("main;GameLogic::update;Foo::update 1234") or as CSV
+with a "name" column and a column of samples or times, as exported by most profilers.
+
+Usage:
+  python string_temporaries.py [--profile profile.folded] [--top 50] [--json report.json] [--include-tools]
+                               [--changed-since REV | --staged | --files-from FILE]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from typing import NamedTuple
+
+from codemod_io import file_contains, read_source
+from compile_db import project_dir
+from file_selection import add_file_selection_arguments, select_files
+from hot_path_logging import (SOURCE_ROOTS, PerFrameClasses, find_functions, find_loops, line_begins, line_of, masked_code,
+                              match_brackets)
+
+KIND_WEIGHTS = {"construct": 3, "local": 2, "format": 4, "concat": 3, "convert": 3, "by-value": 1}
+PER_FRAME_HEAT = 2.0
+
+RE_BODY_FINDING = re.compile(
+    r'(?P<construct>(?<![\w:.>])(?:AsciiString|UnicodeString)\s*\()'
+    r'|(?P<local>(?<![\w:])(?<!static )(?:const\s+)?(?:AsciiString|UnicodeString)\s+\w+\s*(?:=|\(|\{|;|,))'
+    r'|(?P<format>(?:\.|->)\s*format(?:_va)?\s*\()'
+    r'|(?P<concat>(?:\.|->)\s*concat\s*\()'
+    r'|(?P<convert>(?:\.|->)\s*translate\s*\()')
+RE_BY_VALUE = re.compile(r'[(,]\s*(?:const\s+)?(AsciiString|UnicodeString)\s+(\w+)\s*(?:=\s*[^,;()]*)?(?=[,)])')
+RE_PROFILE_NAME = re.compile(r'(\w+)::(~?\w+)\s*(?:\(|$)')
+RE_FOLDED_LINE = re.compile(r'^(.*\S)\s+(\d+(?:\.\d+)?)\s*$')
+PROFILE_COLUMNS = ("samples", "total", "inclusive", "total_ns", "time", "count", "self")
+
+
+class Finding(NamedTuple):
+    path: str           # Relative to the project folder
+    line: int           # 1 based
+    kind: str
+    function: str       # Class::method or function name
+    perFrame: bool
+    loopDepth: int
+    heat: float
+    score: float
+    code: str           # Source line
+
+
+def profile_key(name: str) -> str:
+    """
+    Returns the Class::method of a profiler function name like "UpdateSleepTime __thiscall Foo::update(void)".
+    """
+    matches = RE_PROFILE_NAME.findall(name)
+    if matches:
+        return "::".join(matches[-1])
+    return name.split("(")[0].strip().split(" ")[-1]
+
+
+def read_profile(path: str) -> dict[str, float]:
+    """
+    Returns the share of the samples that each function takes, including its callees.
+    """
+    totals: dict[str, float] = {}
+    total = 0.0
+    with open(path, 'r', encoding="utf-8", errors="replace", newline="") as file:
+        firstLine = file.readline()
+        file.seek(0)
+        folded = RE_FOLDED_LINE.match(firstLine) is not None and "," not in firstLine.split(" ")[-1]
+        if folded:
+            for line in file:
+                match = RE_FOLDED_LINE.match(line)
+                if match is None:
+                    continue
+                count = float(match.group(2))
+                total += count
+                # Every function of a stack gets the samples once, even if it recurses
+                for key in {profile_key(frame) for frame in match.group(1).split(";")}:
+                    totals[key] = totals.get(key, 0.0) + count
+        else:
+            reader = csv.DictReader(file)
+            columns = {name.lower().strip(): name for name in reader.fieldnames or []}
+            nameColumn = columns.get("name") or columns.get("function") or columns.get("zone")
+            valueColumn = next((columns[c] for c in PROFILE_COLUMNS if c in columns), None)
+            if nameColumn is None or valueColumn is None:
+                raise ValueError(f"{path}: expected a name column and one of {', '.join(PROFILE_COLUMNS)}")
+            for row in reader:
+                try:
+                    value = float(row[valueColumn])
+                except (TypeError, ValueError):
+                    continue
+                key = profile_key(row[nameColumn])
+                totals[key] = totals.get(key, 0.0) + value
+            # Inclusive times of nested functions add up to more than the total, so relate to the hottest one
+            total = max(totals.values(), default=0.0)
+    if total <= 0:
+        return {}
+    return {key: value / total for key, value in totals.items()}
+
+
+def enclosing_call_name(code: str, pos: int) -> str:
+    """
+    Returns the name of the function whose parameter list contains pos.
+    """
+    depth = 0
+    for index in range(pos, -1, -1):
+        ch = code[index]
+        if ch == ")":
+            depth += 1
+        elif ch == "(":
+            if depth == 0:
+                match = re.search(r'((?:\w+\s*::\s*)?~?\w+)\s*$', code[max(0, index - 200):index])
+                return re.sub(r'\s+', "", match.group(1)) if match else ""
+            depth -= 1
+    return ""
+
+
+class StringTemporaryAnalyzer:
+    def __init__(self, profile: dict[str, float] | None = None, root: str = project_dir):
+        self.root = root
+        self.profile = profile or {}
+        self.perFrame = PerFrameClasses(root)
+
+    def heat(self, className: str, name: str) -> tuple[bool, float]:
+        perFrame = bool(self.perFrame.hot_base(className, name))
+        heat = PER_FRAME_HEAT if perFrame else 1.0
+        if self.profile:
+            key = f"{className}::{name}" if className else name
+            heat *= 1.0 + 100.0 * self.profile.get(key, 0.0)
+        return perFrame, heat
+
+    def analyze_file(self, path: str) -> list[Finding]:
+        text = read_source(path).text
+        code = masked_code(text)
+        relPath = os.path.relpath(path, self.root).replace(os.sep, "/")
+        lineBegins = line_begins(text)
+        lines = text.split("\n")
+        brackets = match_brackets(code)
+        findings = []
+
+        def add(pos: int, kind: str, function: str, perFrame: bool, loopDepth: int, heat: float) -> None:
+            line = line_of(lineBegins, pos)
+            score = KIND_WEIGHTS[kind] * (1 + loopDepth) * heat
+            findings.append(Finding(relPath, line + 1, kind, function, perFrame, loopDepth, round(heat, 2), round(score, 2),
+                                    lines[line].strip()))
+
+        for function in find_functions(code, brackets):
+            perFrame, heat = self.heat(function.className, function.name)
+            name = f"{function.className}::{function.name}" if function.className else function.name
+            loops = find_loops(code, brackets, function.begin, function.end)
+            for match in RE_BODY_FINDING.finditer(code, function.begin, function.end):
+                loopDepth = sum(1 for begin, end in loops if begin <= match.start() < end)
+                if loopDepth or heat >= PER_FRAME_HEAT:
+                    add(match.start(), match.lastgroup, name, perFrame, loopDepth, heat)
+
+        for match in RE_BY_VALUE.finditer(code):
+            name = enclosing_call_name(code, match.start())
+            if not name or name.split("::")[-1] in ("if", "for", "while", "switch", "return"):
+                continue
+            className, _, method = name.rpartition("::")
+            perFrame, heat = self.heat(className, method)
+            add(match.start(1), "by-value", name, perFrame, 0, heat)
+        return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find AsciiString and UnicodeString allocations in hot code.")
+    parser.add_argument("--profile", metavar="FILE", help="Folded stacks or CSV profile to weigh the functions with")
+    parser.add_argument("--top", type=int, default=50, help="Number of findings to list (default: 50, 0 for all)")
+    parser.add_argument("--kind", action="append", choices=list(KIND_WEIGHTS), help="Only list findings of this kind")
+    parser.add_argument("--include-tools", action="store_true", help="Also analyze the tools")
+    parser.add_argument("--json", metavar="FILE", help="Write all findings to FILE")
+    add_file_selection_arguments(parser)
+    args = parser.parse_args()
+
+    profile = read_profile(args.profile) if args.profile else None
+    if profile is not None:
+        print(f"Read {len(profile)} function(s) from {args.profile}")
+    analyzer = StringTemporaryAnalyzer(profile)
+    fileNames = select_files(args, [os.path.join(project_dir, folder) for folder in SOURCE_ROOTS], [".cpp", ".h", ".inl"])
+
+    findings = []
+    for fileName in fileNames:
+        if not args.include_tools and "/Tools/" in fileName.replace(os.sep, "/"):
+            continue
+        if file_contains(fileName, [b"AsciiString", b"UnicodeString", b"format", b"concat", b"translate"]):
+            findings.extend(analyzer.analyze_file(fileName))
+    if args.kind:
+        findings = [f for f in findings if f.kind in args.kind]
+    findings.sort(key=lambda f: (-f.score, f.path, f.line))
+
+    print(f"{len(findings)} finding(s): " + ", ".join(
+        f"{sum(1 for f in findings if f.kind == kind)} {kind}" for kind in KIND_WEIGHTS))
+    listed = findings if args.top <= 0 else findings[:args.top]
+    print(f"{'Score':>7}  {'Kind':<9}  {'Loop':>4}  {'Heat':>6}  Location")
+    for finding in listed:
+        frame = ", per frame" if finding.perFrame else ""
+        print(f"{finding.score:>7g}  {finding.kind:<9}  {finding.loopDepth:>4}  {finding.heat:>6g}  "
+              f"{finding.path}:{finding.line} in {finding.function}{frame}")
+        print(f"{'':>34}{finding.code}")
+
+    if args.json:
+        with open(args.json, 'w', encoding="utf-8") as file:
+            json.dump([finding._asdict() for finding in findings], file, indent=1)
+        print(f"Wrote {len(findings)} finding(s) to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Created with python 3.11.4
+
+# This module provides a matcher that finds any of a set of literal strings in a single pass over a text.
+# It is built once per run and replaces the per word str.find loops of the codemod scripts.
+
+import re
+from typing import Iterator, NamedTuple
+
+
+class PatternMatch(NamedTuple):
+    start: int
+    end: int
+    text: str
+    kind: str
+
+
+def _is_identifier_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class MultiPatternMatcher:
+    """
+    Matches literal strings with one alternation regex. Longer strings take precedence over their prefixes.
+    The patterns are either a list of strings or a dict of kind -> list of strings.
+    If wholeIdentifiers is set, a pattern that begins or ends with an identifier character does not match
+    inside a longer identifier, for example DEBUG_LOG does not match in DEBUG_LOG_RAW or CRCDEBUG_LOG.
+
+    The regex deliberately consists of plain literals only. Word boundary assertions in the regex would
+    prevent the regex engine from quickly skipping to candidate positions, so they are checked afterwards.
+    """
+
+    def __init__(self, patterns: list[str] | dict[str, list[str]], wholeIdentifiers: bool = False):
+        if not isinstance(patterns, dict):
+            patterns = {"pattern": patterns}
+
+        self.kinds: dict[str, str] = {}
+        for kind, words in patterns.items():
+            for word in words:
+                if word:
+                    self.kinds.setdefault(word, kind)
+
+        self.wholeIdentifiers = wholeIdentifiers
+        words = sorted(self.kinds.keys(), key=len, reverse=True)
+        self.regex = re.compile("|".join(re.escape(word) for word in words) if words else r"(?!)")
+
+    def _accept(self, text: str, start: int, end: int) -> bool:
+        if not self.wholeIdentifiers:
+            return True
+        if start > 0 and _is_identifier_char(text[start]) and _is_identifier_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_identifier_char(text[end - 1]) and _is_identifier_char(text[end]):
+            return False
+        return True
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[PatternMatch]:
+        for match in self.regex.finditer(text, pos):
+            start, end = match.span()
+            if self._accept(text, start, end):
+                word = match.group(0)
+                yield PatternMatch(start, end, word, self.kinds[word])
+
+    def search(self, text: str, pos: int = 0) -> PatternMatch | None:
+        return next(self.finditer(text, pos), None)
+
+
+class ReplaceTable(MultiPatternMatcher):
+    """
+    Replaces every occurrence of the search strings of a table with their replacement strings in a single pass.
+    """
+
+    def __init__(self, table: dict[str, str], wholeIdentifiers: bool = False):
+        super().__init__(list(table.keys()), wholeIdentifiers)
+        self.table = table
+
+    def _replacement(self, match: re.Match) -> str:
+        start, end = match.span()
+        if self._accept(match.string, start, end):
+            return self.table[match.group(0)]
+        return match.group(0)
+
+    def replace(self, text: str) -> str:
+        return self.regex.sub(self._replacement, text)
@@ -2,10 +2,16 @@
 
 # This script helps with moving cpp files from Generals or GeneralsMD to Core
 
+import difflib
+import json
 import os
 import shutil
+import sys
 from enum import Enum
 
+from cmake_sources import CmakeListsFile
+from codemod_io import write_source_if_changed
+
 
 class Game(Enum):
     GENERALS = 0
@@ -44,31 +50,170 @@ def get_opposite_game(game: Game):
     assert(0)
 
 
+class CmakeBatch:
+    # Collects the CMakeLists.txt edits and file operations of many unify calls and applies them at once:
+    # every affected CMakeLists.txt is read and written once. All file operations are checked before
+    # anything changes, and everything is rolled back if applying fails. With dryRun, nothing is changed
+    # and the diff of the CMakeLists.txt and the file operations are printed instead.
+    #
+    #   with CmakeBatch(dryRun=True):
+    #       unify_file(Game.ZEROHOUR, "GameEngine/Include/Common/crc.h", Game.CORE, "GameEngine/Include/Common/crc.h")
+    #       unify_file(Game.ZEROHOUR, "GameEngine/Source/Common/crc.cpp", Game.CORE, "GameEngine/Source/Common/crc.cpp")
+
+    def __init__(self, dryRun: bool = False):
+        self.dryRun = dryRun
+        self.edits: dict[str, list[tuple[str, CmakeModifyType]]] = {}
+        self.fileOperations: list[tuple[str, str, str]] = []    # (operation, path, destination)
+
+    def __enter__(self):
+        global _batch
+        assert(_batch is None)
+        _batch = self
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        global _batch
+        _batch = None
+        if excType is None:
+            self.commit()
+        return False
+
+    def add_edit(self, cmakeFile: str, entry: str, type: CmakeModifyType):
+        self.edits.setdefault(os.path.normpath(cmakeFile), []).append((entry, type))
+
+    def add_file_operation(self, operation: str, path: str, destination: str = ""):
+        self.fileOperations.append((operation, os.path.normpath(path), os.path.normpath(destination) if destination else ""))
+
+    def check_file_operations(self):
+        existing = set()
+        removed = set()
+        for operation, path, destination in self.fileOperations:
+            if path in removed or (path not in existing and not os.path.isfile(path)):
+                raise FileNotFoundError(f"Cannot {operation} {path}: file not found")
+            removed.add(path)
+            existing.discard(path)
+            if destination:
+                if destination in existing or (destination not in removed and os.path.exists(destination)):
+                    raise FileExistsError(f"Cannot move {path}: {destination} already exists")
+                existing.add(destination)
+                removed.discard(destination)
+
+    def apply_edits(self) -> dict[str, CmakeListsFile]:
+        cmakeFiles = {}
+        for cmakeFile, edits in self.edits.items():
+            cmake = CmakeListsFile(cmakeFile)
+            for entry, type in edits:
+                if not cmake.find(entry):
+                    print(f"Warning: {entry} not found in {os.path.relpath(cmakeFile, root_dir)}")
+                elif type == CmakeModifyType.ADD_COMMENT:
+                    cmake.comment(entry)
+                else:
+                    cmake.uncomment(entry)
+            cmakeFiles[cmakeFile] = cmake
+        return cmakeFiles
+
+    def print_diff(self, cmakeFiles: dict[str, CmakeListsFile]):
+        for cmakeFile, cmake in cmakeFiles.items():
+            name = os.path.relpath(cmakeFile, root_dir).replace(os.sep, "/")
+            sys.stdout.writelines(difflib.unified_diff(cmake.source.lines(), cmake.lines, f"a/{name}", f"b/{name}", n=1))
+        for operation, path, destination in self.fileOperations:
+            target = f" -> {os.path.relpath(destination, root_dir)}" if destination else ""
+            print(f"{operation} {os.path.relpath(path, root_dir)}{target}")
+
+    def commit(self):
+        self.check_file_operations()
+        cmakeFiles = self.apply_edits()
+        if self.dryRun:
+            self.print_diff(cmakeFiles)
+            return
+
+        done: list[tuple[str, str, str, bytes | None, os.stat_result | None]] = []
+        createdDirs: list[str] = []
+        saved: list[CmakeListsFile] = []
+        try:
+            for operation, path, destination in self.fileOperations:
+                if operation == "delete":
+                    st = os.stat(path)
+                    with open(path, 'rb') as file:
+                        data = file.read()
+                    os.remove(path)
+                    done.append((operation, path, destination, data, st))
+                else:
+                    make_dirs(os.path.dirname(destination), createdDirs)
+                    shutil.move(path, destination)
+                    done.append((operation, path, destination, None, None))
+            for cmake in cmakeFiles.values():
+                saved.append(cmake)
+                cmake.save()
+        except BaseException:
+            for cmake in saved:
+                write_source_if_changed(cmake.path, cmake.source.text, cmake.source)
+            for operation, path, destination, data, st in reversed(done):
+                if operation == "delete":
+                    with open(path, 'wb') as file:
+                        file.write(data)
+                    os.chmod(path, st.st_mode & 0o7777)
+                    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+                else:
+                    shutil.move(destination, path)
+            # Deepest folders come last, remove them first
+            for folder in reversed(createdDirs):
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    pass
+            raise
+
+
+def make_dirs(folder: str, createdDirs: list[str]):
+    """
+    Creates folder and its missing parents like os.makedirs, and appends the created folders to createdDirs,
+    parents first.
+    """
+    missing = []
+    while folder and not os.path.isdir(folder):
+        missing.append(folder)
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+    for path in reversed(missing):
+        os.mkdir(path)
+        createdDirs.append(path)
+
+
+_batch: CmakeBatch | None = None
+
+
 def move_file(fromGame: Game, fromFile: str, toGame: Game, toFile: str):
     fromPath = os.path.join(get_game_path(fromGame), os.path.normpath(fromFile))
     toPath = os.path.join(get_game_path(toGame), os.path.normpath(toFile))
+    if _batch is not None:
+        _batch.add_file_operation("move", fromPath, toPath)
+        return
     os.makedirs(os.path.dirname(toPath), exist_ok=True)
     shutil.move(fromPath, toPath)
 
 
 def delete_file(game: Game, path: str):
-    os.remove(os.path.join(get_game_path(game), os.path.normpath(path)))
+    fullPath = os.path.join(get_game_path(game), os.path.normpath(path))
+    if _batch is not None:
+        _batch.add_file_operation("delete", fullPath)
+        return
+    os.remove(fullPath)
 
 
 def modify_cmakelists(cmakeFile: str, searchString: str, type: CmakeModifyType):
-    lines: list[str]
-    with open(cmakeFile, 'r', encoding="ascii") as file:
-        lines = file.readlines()
-
-    with open(cmakeFile, 'w', encoding="ascii") as file:
-        for index, line  in enumerate(lines):
-            if searchString in line:
-                if type == CmakeModifyType.ADD_COMMENT:
-                    lines[index] = "#" + line
-                else:
-                    lines[index] = line.replace("#", "", 1)
+    if _batch is not None:
+        _batch.add_edit(cmakeFile, searchString, type)
+        return
 
-        file.writelines(lines)
+    cmake = CmakeListsFile(cmakeFile)
+    if type == CmakeModifyType.ADD_COMMENT:
+        cmake.comment(searchString)
+    else:
+        cmake.uncomment(searchString)
+    cmake.save()
 
 
 def unify_file(fromGame: Game, fromFile: str, toGame: Game, toFile: str):
@@ -181,8 +326,30 @@ def unify_move_file_lib(fromGame: Game, fromFile: str, toGame: Game, toFile: str
     move_file(fromGame, fromFile, toGame, toFile)
 
 
+def run_plan(planFile: str, includeSimilar: bool = False, limit: int = 0, dryRun: bool = False):
+    # Runs the unify calls of a plan written by unify_planner.py --plan in one CmakeBatch. Similar files need
+    # a manual merge before they can be unified, so only identical files are unified unless includeSimilar is set.
+    with open(planFile, 'r', encoding="utf-8") as file:
+        candidates = json.load(file)
+
+    functions = {"unify_file": unify_file, "unify_file_lib": unify_file_lib}
+    count = 0
+    with CmakeBatch(dryRun):
+        for candidate in candidates:
+            if not candidate["function"] or candidate["note"]:
+                continue
+            if not candidate["identical"] and not includeSimilar:
+                continue
+            if limit and count >= limit:
+                break
+            functions[candidate["function"]](Game.ZEROHOUR, candidate["zeroHour"], Game.CORE, candidate["core"])
+            count += 1
+
+
 def main():
 
+    #run_plan(os.path.join(current_dir, "unify_plan.json"), limit=20)
+
     #unify_file(Game.ZEROHOUR, "GameEngine/Include/Common/crc.h", Game.CORE, "GameEngine/Include/Common/crc.h")
     #unify_file(Game.ZEROHOUR, "GameEngine/Include/Common/CRCDebug.h", Game.CORE, "GameEngine/Include/Common/CRCDebug.h")
     #unify_file(Game.ZEROHOUR, "GameEngine/Source/Common/crc.cpp", Game.CORE, "GameEngine/Source/Common/crc.cpp")
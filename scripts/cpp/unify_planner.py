@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+unify_planner.py
+
+Finds source files that Generals and GeneralsMD duplicate, and plans moving them to Core with unify_move_files.py.
+
+Every source file below Generals/Code and GeneralsMD/Code is normalized first: comments, including the
+license header, are dropped and whitespace is ignored, so only the code is compared.
+  - identical:  both files have the same normalized code, found by hash. unify_file can take either one.
+  - similar:    both files share most of their code, found with MinHash signatures and locality sensitive
+                hashing (LSH) over token shingles, then confirmed with the exact Jaccard similarity.
+                These need a manual merge first, and can also be files that were renamed or moved in one game.
+
+The plan is ranked: identical files first, translation units before headers, larger files first, because
+every unified translation unit is one less file to compile in a full build of both games.
+
+Usage:
+  python unify_planner.py [--threshold 0.8] [--top 50] [--plan unify_plan.json] [--print-calls]
+
+A plan written with --plan is run by run_plan() of unify_move_files.py. It only unifies identical files,
+unless similar files are allowed.
+"""
+
+from __future__ import annotations
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+from typing import NamedTuple
+
+from codemod_io import read_source
+from compile_db import project_dir
+from cpp_lexer import TokenKind, lex
+from header_cost import format_size
+
+GAME_DIRS = {"GENERALS": "Generals/Code", "ZEROHOUR": "GeneralsMD/Code"}
+CORE_DIR = "Core"
+SOURCE_EXTENSIONS = (".h", ".hpp", ".inl", ".c", ".cpp")
+TRANSLATION_UNIT_EXTENSIONS = (".c", ".cpp")
+
+RE_NORMALIZED_TOKEN = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|\w+|\S')
+
+SHINGLE_SIZE = 5
+SIGNATURE_BINS = 64
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_BINS // LSH_BANDS
+EMPTY_BIN = (1 << 64) - 1
+
+
+class NormalizedFile(NamedTuple):
+    path: str               # Path relative to the game folder, with '/' separators
+    size: int               # Size of the original file
+    tokens: list            # Code tokens without comments and whitespace
+    hash: str               # Hash of the normalized code
+    shingles: frozenset     # Hashes of the runs of SHINGLE_SIZE tokens
+    signature: tuple        # MinHash signature of the shingles
+
+
+class UnifyCandidate(NamedTuple):
+    generals: str
+    zeroHour: str
+    similarity: float       # Jaccard similarity of the shingles, 1.0 for identical code
+    identical: bool
+    size: int
+    function: str           # unify_move_files.py function that applies, or "" if the file needs to be moved by hand
+    core: str               # Destination, relative to Core
+    note: str
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """
+    Returns the code tokens of a text. Comments and whitespace, including line breaks, are dropped.
+    """
+    lexed = lex(text)
+    code = "".join(" " if t.kind == TokenKind.COMMENT else text[t.begin:t.end] for t in lexed.tokens)
+    return RE_NORMALIZED_TOKEN.findall(code)
+
+
+def minhash_signature(shingles: frozenset) -> tuple:
+    """
+    Returns a MinHash signature made with one permutation hashing: every shingle hash falls into one bin
+    by its low bits, and each bin keeps the lowest of its values. Empty bins take the value of the next bin.
+    """
+    bins = [EMPTY_BIN] * SIGNATURE_BINS
+    for value in shingles:
+        index = value % SIGNATURE_BINS
+        value //= SIGNATURE_BINS
+        if value < bins[index]:
+            bins[index] = value
+    if shingles:
+        for index in range(SIGNATURE_BINS):
+            offset = 1
+            while bins[index] == EMPTY_BIN:
+                source = bins[(index + offset) % SIGNATURE_BINS]
+                if source != EMPTY_BIN:
+                    bins[index] = source
+                offset += 1
+    return tuple(bins)
+
+
+def normalize_file(root: str, path: str) -> NormalizedFile:
+    fullPath = os.path.join(project_dir, root, path)
+    tokens = normalize_tokens(read_source(fullPath).text)
+    joined = "\n".join(tokens)
+    shingles = frozenset(
+        int.from_bytes(hashlib.blake2b("\n".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8", errors="surrogateescape"),
+                                       digest_size=8).digest(), "little")
+        for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))
+    ) if tokens else frozenset()
+    return NormalizedFile(path, os.path.getsize(fullPath), tokens,
+                          hashlib.sha1(joined.encode("utf-8", errors="surrogateescape")).hexdigest(),
+                          shingles, minhash_signature(shingles))
+
+
+def find_source_files(root: str) -> list[str]:
+    paths = []
+    top = os.path.join(project_dir, root)
+    for subdir, _, files in os.walk(top):
+        for file in files:
+            if file.lower().endswith(SOURCE_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(subdir, file), top).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_pairs(generals: dict[str, NormalizedFile], zeroHour: dict[str, NormalizedFile]) -> set[tuple[str, str]]:
+    """
+    Returns the pairs of a Generals and a GeneralsMD file that agree on all rows of at least one band of their signatures.
+    """
+    buckets: dict[tuple, tuple[list[str], list[str]]] = {}
+    for side, files in enumerate((generals, zeroHour)):
+        for path, normalized in files.items():
+            if not normalized.shingles:
+                continue
+            for band in range(LSH_BANDS):
+                key = (band, normalized.signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+                buckets.setdefault(key, ([], []))[side].append(path)
+    pairs = set()
+    for generalsPaths, zeroHourPaths in buckets.values():
+        for a in generalsPaths:
+            for b in zeroHourPaths:
+                pairs.add((a, b))
+    return pairs
+
+
+def cmake_entries(cmakeFile: str) -> set[str]:
+    """
+    Returns the entries of a CMakeLists.txt, including the commented out ones.
+    """
+    try:
+        with open(cmakeFile, 'r', encoding="utf-8", errors="replace") as file:
+            return {line.strip().lstrip("#").strip() for line in file}
+    except FileNotFoundError:
+        return set()
+
+
+def unify_function(path: str) -> tuple[str, str]:
+    """
+    Returns the unify_move_files.py function that moves a file to Core, and a note if there is none.
+    unify_file edits the CMakeLists.txt of the first folder, unify_file_lib the one of the folder of the file.
+    """
+    folder = path[:path.find("/")] if "/" in path else ""
+    directory = os.path.dirname(path)
+    for function, cmakeFolder in (("unify_file", folder), ("unify_file_lib", directory)):
+        if not cmakeFolder or (function == "unify_file_lib" and cmakeFolder == folder):
+            continue
+        entry = path[len(cmakeFolder) + 1:]
+        gameEntries = [cmake_entries(os.path.join(project_dir, root, cmakeFolder, "CMakeLists.txt")) for root in GAME_DIRS.values()]
+        if not all(entry in entries for entries in gameEntries):
+            continue
+        coreCmake = os.path.join(project_dir, CORE_DIR, cmakeFolder, "CMakeLists.txt")
+        if not os.path.isfile(coreCmake):
+            return "", f"Core/{cmakeFolder} has no CMakeLists.txt"
+        if entry not in cmake_entries(coreCmake):
+            return function, f"add {entry} to Core/{cmakeFolder}/CMakeLists.txt"
+        return function, ""
+    return "", "not listed in a CMakeLists.txt of both games"
+
+
+def plan(threshold: float) -> list[UnifyCandidate]:
+    generals = {path: normalize_file(GAME_DIRS["GENERALS"], path) for path in find_source_files(GAME_DIRS["GENERALS"])}
+    zeroHour = {path: normalize_file(GAME_DIRS["ZEROHOUR"], path) for path in find_source_files(GAME_DIRS["ZEROHOUR"])}
+
+    pairs = {(path, path) for path in generals.keys() & zeroHour.keys()}
+    pairs |= lsh_pairs(generals, zeroHour)
+
+    # Files with the same code are always paired, wherever they are.
+    byHash: dict[str, list[str]] = {}
+    for path, normalized in zeroHour.items():
+        byHash.setdefault(normalized.hash, []).append(path)
+    for path, normalized in generals.items():
+        for other in byHash.get(normalized.hash, []):
+            pairs.add((path, other))
+
+    candidates = []
+    for a, b in pairs:
+        left, right = generals[a], zeroHour[b]
+        identical = left.hash == right.hash
+        similarity = 1.0 if identical else jaccard(left.shingles, right.shingles)
+        if similarity < threshold:
+            continue
+        if a == b:
+            function, note = unify_function(a)
+            if os.path.exists(os.path.join(project_dir, CORE_DIR, a)):
+                function, note = "", "already exists in Core"
+        else:
+            function, note = "", "different paths, move by hand"
+        candidates.append(UnifyCandidate(a, b, similarity, identical, max(left.size, right.size), function, b, note))
+
+    # Of the pairs of one file, only keep the best one.
+    best: dict[str, UnifyCandidate] = {}
+    for candidate in sorted(candidates, key=lambda c: (c.identical, c.generals == c.zeroHour, c.similarity), reverse=True):
+        if candidate.generals not in best and all(c.zeroHour != candidate.zeroHour for c in best.values()):
+            best[candidate.generals] = candidate
+
+    def rank(candidate: UnifyCandidate):
+        return (not candidate.identical, not candidate.function, not candidate.core.lower().endswith(TRANSLATION_UNIT_EXTENSIONS),
+                -candidate.similarity, -candidate.size, candidate.core)
+    return sorted(best.values(), key=rank)
+
+
+def changed_lines(candidate: UnifyCandidate) -> int:
+    """
+    Returns the number of normalized lines that differ between the two files of a candidate.
+    """
+    def lines(root: str, path: str) -> list[str]:
+        text = read_source(os.path.join(project_dir, root, path)).text
+        return [" ".join(normalize_tokens(line)) for line in text.splitlines() if normalize_tokens(line)]
+    a = lines(GAME_DIRS["GENERALS"], candidate.generals)
+    b = lines(GAME_DIRS["ZEROHOUR"], candidate.zeroHour)
+    return sum(1 for line in difflib.unified_diff(a, b, n=0, lineterm="")
+               if line[:1] in "+-" and not line.startswith(("+++", "---")))
+
+
+def unify_call(candidate: UnifyCandidate) -> str:
+    return f'{candidate.function}(Game.ZEROHOUR, "{candidate.zeroHour}", Game.CORE, "{candidate.core}")'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find files that Generals and GeneralsMD duplicate and plan unifying them to Core.")
+    parser.add_argument("--threshold", type=float, default=0.8,
+                        help="Minimum Jaccard similarity of similar files (default: 0.8)")
+    parser.add_argument("--top", type=int, default=50, help="Number of candidates to list (default: 50, 0 for all)")
+    parser.add_argument("--plan", metavar="FILE", help="Write the plan for run_plan() of unify_move_files.py to FILE")
+    parser.add_argument("--print-calls", action="store_true", help="Print the unify_move_files.py calls of the identical files")
+    args = parser.parse_args()
+
+    candidates = plan(args.threshold)
+    identical = [c for c in candidates if c.identical]
+    ready = [c for c in identical if c.function and not c.note]
+    print(f"{len(identical)} identical and {len(candidates) - len(identical)} similar file(s), "
+          f"{len(ready)} identical file(s) can be unified right away ({format_size(sum(c.size for c in ready))}).")
+
+    listed = candidates if args.top <= 0 else candidates[:args.top]
+    print(f"{'Rank':>4}  {'Similar':>7}  {'Diff':>5}  {'Size':>9}  File")
+    for rank, candidate in enumerate(listed, 1):
+        diff = "-" if candidate.identical else str(changed_lines(candidate))
+        name = candidate.zeroHour if candidate.generals == candidate.zeroHour else f"{candidate.generals} <-> {candidate.zeroHour}"
+        note = f"  ({candidate.note})" if candidate.note else ""
+        print(f"{rank:>4}  {candidate.similarity:>7.1%}  {diff:>5}  {format_size(candidate.size):>9}  {name}{note}")
+
+    if args.print_calls:
+        print()
+        for candidate in ready:
+            print(f"    {unify_call(candidate)}")
+
+    if args.plan:
+        with open(args.plan, 'w', encoding="utf-8") as file:
+            json.dump([candidate._asdict() for candidate in candidates], file, indent=1)
+        print(f"Wrote {len(candidates)} candidate(s) to {args.plan}")
+
+
+if __name__ == "__main__":
+    main()
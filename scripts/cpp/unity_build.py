@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+unity_build.py
+
+Generates unity (jumbo) build batches for the CMake targets of the project, and verifies a unity build.
+
+A unity build compiles several source files of a target as one translation unit, so the headers that they
+share are parsed once per batch instead of once per file. This script writes the batches as UNITY_GROUP
+source properties to cmake/unity-batches.cmake, which CMake uses when RTS_BUILD_OPTION_UNITY is ON.
+CMake then writes the batch sources itself. Files without a batch are compiled on their own as before.
+
+generate:
+  The translation units of every target are taken from compile_commands.json. Files are only batched with
+  files that have the same compiler options, and each batch is filled with the files that share the most
+  headers with it, according to the include graph (see include_graph.py).
+  Every file is scanned for the names that would clash in a shared translation unit: static functions and
+  variables, const variables, names of anonymous namespaces, and types and typedefs defined in the file.
+  Macros that a file defines and does not undefine would also change the code of the files after it.
+  Two files that clash are never put into the same batch. Files that cannot share a translation unit at
+  all are left out: files that define macros before their first include, because the headers would already
+  be included by an earlier file of the batch, and files with a file scope 'using namespace'.
+
+verify:
+  Compares the external symbols defined by the object files of each target of a regular build and of a
+  unity build. Both must define the same strong external symbols. Requires nm or llvm-nm (which also reads
+  MSVC object files).
+
+Usage:
+  python unity_build.py generate [TARGET]... [--batch-size 8]
+  python unity_build.py verify build/win32 build/win32-unity [TARGET]...
+
+Enable the batches with:
+  cmake --preset win32 -DRTS_BUILD_OPTION_UNITY=ON
+"""
+
+from __future__ import annotations
+import argparse
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+from typing import NamedTuple
+
+from codemod_io import read_source, write_if_changed
+from compile_db import CompileCommand, command_target, find_compile_commands, load_compile_db, project_dir
+from cpp_lexer import TokenKind, lex
+from header_cost import file_size, format_size
+from include_graph import IncludeGraph, add_include_graph_arguments, load_include_graph
+
+default_batches_path = os.path.join(project_dir, "cmake", "unity-batches.cmake")
+
+RE_CODE_TOKEN = re.compile(r'[A-Za-z_]\w*|::|\S')
+RE_DIRECTIVE_NAME = re.compile(r'\s*#\s*(?:define|undef)\s+([A-Za-z_]\w*)')
+
+TYPE_KEYWORDS = {"class", "struct", "union", "enum"}
+# Identifiers that cannot be the name of a declaration.
+NON_NAMES = {"const", "volatile", "static", "inline", "extern", "unsigned", "signed", "operator", "__declspec",
+             "__cdecl", "__stdcall", "__fastcall", "WINAPI", "CALLBACK"}
+
+
+class UnitSymbols(NamedTuple):
+    localNames: frozenset       # Names with internal linkage, and types and typedefs defined in the file
+    names: frozenset            # All names declared at file scope, including localNames
+    macros: frozenset           # Macros defined by the file and not undefined again
+    identifiers: frozenset      # All identifiers used by the code of the file
+    blocker: str                # Why the file cannot be batched at all, or ""
+
+
+def declared_name(tokens: list[str]) -> str | None:
+    """
+    Returns the name declared by a statement at file scope, for example 'foo' in 'static int foo(int a)'.
+    Returns None for qualified names like 'Class::member', which are not new names.
+    """
+    end = len(tokens)
+    for index, token in enumerate(tokens):
+        if token in ("(", "=", "[", ";", ",", ":", "{"):
+            # A function pointer declares the name inside of the first parentheses: void (*name)(int)
+            if token == "(" and index + 2 < len(tokens) and tokens[index + 1] == "*" and _is_identifier(tokens[index + 2]):
+                return tokens[index + 2]
+            end = index
+            break
+    for index in range(end - 1, -1, -1):
+        token = tokens[index]
+        if _is_identifier(token) and token not in NON_NAMES:
+            if index > 0 and tokens[index - 1] == "::":
+                return None
+            return token
+    return None
+
+
+def _is_identifier(token: str) -> bool:
+    return token[0].isalpha() or token[0] == "_"
+
+
+def strip_template(statement: list[str]) -> list[str]:
+    """
+    Returns a statement without its leading template parameter list.
+    """
+    if statement[:2] != ["template", "<"]:
+        return statement
+    depth = 0
+    for index, token in enumerate(statement[1:], 1):
+        if token == "<":
+            depth += 1
+        elif token == ">":
+            depth -= 1
+            if depth == 0:
+                return statement[index + 1:]
+    return statement
+
+
+def enumerators(tokens: list[str], begin: int) -> list[str]:
+    """
+    Returns the names of the enumerators of the enum body that begins at tokens[begin].
+    """
+    names = []
+    depth = 0
+    expectName = True
+    for token in tokens[begin + 1:]:
+        if token in ("(", "{", "["):
+            depth += 1
+        elif token in (")", "}", "]"):
+            if depth == 0:
+                break
+            depth -= 1
+        elif token == "," and depth == 0:
+            expectName = True
+        elif expectName and depth == 0 and _is_identifier(token):
+            names.append(token)
+            expectName = False
+    return names
+
+
+def scan_code(code: str) -> tuple[set[str], set[str], bool]:
+    """
+    Returns the local names and all names declared at file scope, and whether a file scope 'using namespace' is found.
+    Bodies of functions and classes are skipped. Namespace and extern "C" blocks are file scope too.
+    """
+    tokens = RE_CODE_TOKEN.findall(code)
+    localNames: set[str] = set()
+    names: set[str] = set()
+    usingNamespace = False
+    scopes: list[bool] = []     # Open namespace blocks; True for anonymous namespaces
+    statement: list[str] = []
+    index = 0
+
+    def add(name: str | None, isLocal: bool) -> None:
+        if name is not None:
+            names.add(name)
+            if isLocal or any(scopes):
+                localNames.add(name)
+
+    def skip_block(pos: int) -> int:
+        depth = 0
+        while pos < len(tokens):
+            if tokens[pos] == "{":
+                depth += 1
+            elif tokens[pos] == "}":
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            pos += 1
+        return pos
+
+    while index < len(tokens):
+        token = tokens[index]
+        if token == ";":
+            if statement:
+                head = statement[0]
+                if head == "typedef":
+                    add(declared_name(statement[1:]), True)
+                elif head == "using" and len(statement) > 1 and statement[1] == "namespace":
+                    usingNamespace = usingNamespace or not scopes
+                elif head == "using" and "=" in statement:
+                    add(statement[1], True)
+                elif head not in ("template", "extern", "friend") and head not in TYPE_KEYWORDS:
+                    isStatic = "static" in statement
+                    isConst = ("const" in statement or "constexpr" in statement) and "(" not in statement
+                    add(declared_name(statement), isStatic or isConst)
+            statement = []
+            index += 1
+        elif token == "{":
+            if statement and statement[0] == "namespace":
+                scopes.append(len(statement) == 1)
+                statement = []
+                index += 1
+            elif statement[:1] == ["extern"] and len(statement) <= 2:
+                scopes.append(False)
+                statement = []
+                index += 1
+            else:
+                statement = strip_template(statement)
+                typeIndex = next((i for i, t in enumerate(statement) if t in TYPE_KEYWORDS), -1)
+                isType = typeIndex >= 0 and "(" not in statement[:typeIndex] and "=" not in statement
+                if isType:
+                    name = next((t for t in statement[typeIndex + 1:] if _is_identifier(t) and t not in NON_NAMES), None)
+                    add(name, True)
+                    if statement[typeIndex] == "enum":
+                        for enumerator in enumerators(tokens, index):
+                            add(enumerator, True)
+                elif statement and statement[0] not in ("template", "extern"):
+                    add(declared_name(statement), "static" in statement)
+                index = skip_block(index)
+                # A type definition can declare variables: struct Foo { ... } foo;
+                statement = (statement[:typeIndex + 1] if statement[0] == "typedef" else ["struct"]) if isType else []
+                if not isType and index < len(tokens) and tokens[index] == ";":
+                    index += 1
+        elif token == "}":
+            if scopes:
+                scopes.pop()
+            statement = []
+            index += 1
+        else:
+            statement.append(token)
+            index += 1
+    return localNames, names, usingNamespace
+
+
+def scan_translation_unit(path: str) -> UnitSymbols:
+    text = read_source(path).text
+    lexed = lex(text)
+    code = "".join(text[t.begin:t.end] if t.kind == TokenKind.CODE else " " for t in lexed.tokens)
+
+    macros: dict[str, None] = {}
+    blocker = ""
+    for line in lexed.lines:
+        if line.directive == "include":
+            if macros and not blocker:
+                blocker = f"defines {next(iter(macros))} before an include"
+        elif line.directive in ("define", "undef"):
+            match = RE_DIRECTIVE_NAME.match(line.code)
+            if match is None:
+                continue
+            if line.directive == "define":
+                macros[match.group(1)] = None
+            else:
+                macros.pop(match.group(1), None)
+
+    localNames, names, usingNamespace = scan_code(code)
+    if usingNamespace and not blocker:
+        blocker = "has a file scope 'using namespace'"
+    return UnitSymbols(frozenset(localNames), frozenset(names), frozenset(macros),
+                       frozenset(RE_CODE_TOKEN.findall(code)) - {"::"}, blocker)
+
+
+def clashes(a: UnitSymbols, b: UnitSymbols) -> set[str]:
+    """
+    Returns the names that keep two files from sharing a translation unit.
+    """
+    return ((a.localNames & b.names) | (b.localNames & a.names)
+            | (a.macros & (b.identifiers | b.macros)) | (b.macros & a.identifiers))
+
+
+def compile_options(command: CompileCommand) -> tuple:
+    """
+    Returns the compiler options of a command without the source and object file, to find files that can be batched.
+    """
+    skip = {command.file, os.path.basename(command.file), command.output}
+    options = []
+    arguments = command.arguments
+    index = 0
+    while index < len(arguments):
+        argument = arguments[index]
+        if argument in ("-o", "-c") or argument.startswith(("/Fo", "-Fo", "/Fd", "-Fd", "-MF", "-MT", "-MQ")):
+            index += 2 if argument in ("-o", "-MF", "-MT", "-MQ") else 1
+            continue
+        if argument not in skip and os.path.normpath(os.path.join(command.directory, argument)) != command.file:
+            options.append(argument)
+        index += 1
+    return tuple(options)
+
+
+class Batch(NamedTuple):
+    name: str
+    files: list
+
+
+def plan_target(target: str, commands: list[CompileCommand], graph: IncludeGraph, symbols: dict[str, UnitSymbols],
+                batchSize: int, sizes: dict[str, int]) -> tuple[list[Batch], dict[str, str], int, int]:
+    """
+    Returns the batches of a target, the files left out with the reason, and the parsed text of the target
+    before and after batching.
+    """
+    excluded: dict[str, str] = {}
+    groups: dict[tuple, list[str]] = {}
+    closures: dict[str, frozenset] = {}
+    before = 0
+    for command in commands:
+        key = graph.key(command.file)
+        closures[key] = frozenset(graph.closure(key))
+        before += file_size(graph, key, sizes) + sum(file_size(graph, k, sizes) for k in closures[key])
+        if symbols[key].blocker:
+            excluded[key] = symbols[key].blocker
+            continue
+        language = os.path.splitext(key)[1].lower() == ".c"
+        groups.setdefault((language, compile_options(command)), []).append(key)
+
+    batches: list[Batch] = []
+    after = sum(file_size(graph, key, sizes) + sum(file_size(graph, k, sizes) for k in closures[key]) for key in excluded)
+    for (isC, _), files in sorted(groups.items(), key=lambda item: item[1][0]):
+        remaining = sorted(files)
+        while remaining:
+            seed = remaining.pop(0)
+            members = [seed]
+            shared = set(closures[seed])
+            while len(members) < batchSize:
+                best = None
+                bestScore = -1
+                for key in remaining:
+                    if any(clashes(symbols[key], symbols[member]) for member in members):
+                        continue
+                    score = len(shared & closures[key])
+                    if score > bestScore:
+                        best, bestScore = key, score
+                if best is None:
+                    break
+                remaining.remove(best)
+                members.append(best)
+                shared |= closures[best]
+            after += sum(file_size(graph, key, sizes) for key in members) + sum(file_size(graph, k, sizes) for k in shared)
+            if len(members) == 1:
+                excluded[seed] = "no compatible file to batch with"
+                continue
+            suffix = "_c" if isC else ""
+            batches.append(Batch(f"{target}_{len(batches) + 1:03d}{suffix}", members))
+    return batches, excluded, before, after
+
+
+def batches_to_cmake(plans: dict[str, list[Batch]]) -> str:
+    lines = [
+        "# Generated by scripts/cpp/unity_build.py generate. Do not edit.",
+        "# Used when RTS_BUILD_OPTION_UNITY is ON, see cmake/unity.cmake.",
+        "",
+    ]
+    for target, batches in sorted(plans.items()):
+        if not batches:
+            continue
+        lines.append(f"if(TARGET {target})")
+        lines.append(f"    set_target_properties({target} PROPERTIES UNITY_BUILD ON UNITY_BUILD_MODE GROUP)")
+        for batch in batches:
+            lines.append("    set_source_files_properties(")
+            lines.extend(f"        ${{CMAKE_SOURCE_DIR}}/{key}" for key in batch.files)
+            lines.append(f"        TARGET_DIRECTORY {target}")
+            lines.append(f"        PROPERTIES UNITY_GROUP {batch.name}")
+            lines.append("    )")
+        lines.append("endif()")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate(args) -> None:
+    compileCommandsPath = find_compile_commands(args.compile_commands)
+    if compileCommandsPath is None:
+        sys.exit("No compile_commands.json found. Configure a build with CMake first, or pass --compile-commands.")
+
+    commandsByTarget: dict[str, list[CompileCommand]] = {}
+    for command in load_compile_db(compileCommandsPath):
+        target = command_target(command)
+        if target is not None and "unity_" not in os.path.basename(command.file):
+            commandsByTarget.setdefault(target, []).append(command)
+    if not commandsByTarget:
+        sys.exit(f"{compileCommandsPath} does not name the object files of the commands. Generate it with Ninja or Makefiles.")
+
+    graph = load_include_graph(args)
+    sizes: dict[str, int] = {}
+    plans: dict[str, list[Batch]] = {}
+    totalBefore = 0
+    totalAfter = 0
+    for target in args.targets or sorted(commandsByTarget):
+        commands = commandsByTarget.get(target)
+        if not commands:
+            print(f"{target}: no translation units in {compileCommandsPath}, skipped.")
+            continue
+        symbols = {graph.key(c.file): scan_translation_unit(c.file) for c in commands}
+        batches, excluded, before, after = plan_target(target, commands, graph, symbols, args.batch_size, sizes)
+        plans[target] = batches
+        totalBefore += before
+        totalAfter += after
+        batched = sum(len(batch.files) for batch in batches)
+        print(f"{target}: {batched} of {len(commands)} file(s) in {len(batches)} batch(es), "
+              f"parsed text {format_size(before)} -> {format_size(after)}")
+        if args.verbose:
+            for key, reason in sorted(excluded.items()):
+                print(f"  not batched: {key}: {reason}")
+
+    print(f"Total parsed text per full build: {format_size(totalBefore)} -> {format_size(totalAfter)}")
+    if write_if_changed(args.output, batches_to_cmake(plans), encoding="utf-8", newline="\n"):
+        print(f"Wrote {args.output}")
+    else:
+        print(f"{args.output} is up to date")
+
+
+def target_objects(buildDir: str, target: str) -> list[str]:
+    objects = []
+    for pattern in ("*.obj", "*.o"):
+        objects.extend(glob.glob(os.path.join(buildDir, "**", "CMakeFiles", f"{target}.dir", "**", pattern), recursive=True))
+    return objects
+
+
+def defined_symbols(nm: str, objects: list[str]) -> set[str]:
+    """
+    Returns the strong external symbols that the object files define. Weak symbols, like inline functions and
+    template instances, are left out because their placement depends on the batching.
+    """
+    symbols = set()
+    for begin in range(0, len(objects), 200):
+        result = subprocess.run([nm, "--defined-only", "--extern-only", "--portability", *objects[begin:begin + 200]],
+                                capture_output=True, text=True, errors="replace")
+        if result.returncode != 0:
+            raise RuntimeError(f"{nm} failed: {result.stderr.strip()}")
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[1] in ("T", "D", "B", "R", "S", "G", "C"):
+                symbols.add(parts[0])
+    return symbols
+
+
+def verify(args) -> None:
+    nm = args.nm or shutil.which("llvm-nm") or shutil.which("nm")
+    if nm is None:
+        sys.exit("nm or llvm-nm not found. Pass --nm.")
+
+    targets = args.targets
+    if not targets:
+        folders = glob.glob(os.path.join(args.unity_build, "**", "CMakeFiles", "*.dir"), recursive=True)
+        targets = sorted({os.path.basename(folder)[:-len(".dir")] for folder in folders})
+
+    failures = 0
+    for target in targets:
+        regularObjects = target_objects(args.regular_build, target)
+        unityObjects = target_objects(args.unity_build, target)
+        if not regularObjects or not unityObjects:
+            continue
+        regular = defined_symbols(nm, regularObjects)
+        unity = defined_symbols(nm, unityObjects)
+        missing = sorted(regular - unity)
+        extra = sorted(unity - regular)
+        if not missing and not extra:
+            print(f"{target}: {len(regular)} symbol(s) match")
+            continue
+        failures += 1
+        print(f"{target}: {len(missing)} symbol(s) missing and {len(extra)} extra in the unity build")
+        for symbol in missing[:args.top]:
+            print(f"  - {symbol}")
+        for symbol in extra[:args.top]:
+            print(f"  + {symbol}")
+    if failures:
+        print(f"{failures} target(s) differ.")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and verify unity build batches of the CMake targets.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generateParser = subparsers.add_parser("generate", help="Write the unity batches for CMake")
+    add_include_graph_arguments(generateParser)
+    generateParser.add_argument("targets", nargs="*", metavar="TARGET", help="CMake target to batch (default: all)")
+    generateParser.add_argument("--batch-size", type=int, default=8, help="Maximum number of files per batch (default: 8)")
+    generateParser.add_argument("--output", default=default_batches_path,
+                                help=f"CMake file to write (default: {os.path.relpath(default_batches_path, project_dir)})")
+    generateParser.add_argument("-v", "--verbose", action="store_true", help="List the files that are not batched and why")
+
+    verifyParser = subparsers.add_parser("verify", help="Compare the symbols of a regular and a unity build")
+    verifyParser.add_argument("regular_build", help="Build folder of a regular build")
+    verifyParser.add_argument("unity_build", help="Build folder of a build with RTS_BUILD_OPTION_UNITY=ON")
+    verifyParser.add_argument("targets", nargs="*", metavar="TARGET", help="CMake target to compare (default: all)")
+    verifyParser.add_argument("--nm", help="Path of nm or llvm-nm (default: search the PATH)")
+    verifyParser.add_argument("--top", type=int, default=20, help="Number of differing symbols to list per target (default: 20)")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args)
+    elif args.command == "verify":
+        verify(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# Copyright 2026 TheSuperHackers
+#
+# This file is part of Command & Conquer: Generals and Command & Conquer: Zero Hour.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Parallel replay compatibility check.
+
+This script runs one headless game process per replay, instead of one game process for all replays:
+- Replays are scheduled longest first over a number of slots, so a long replay does not start last.
+  The length is estimated from the measured time of a previous report, or from the duration in the replay
+  header as read by replay_index.py.
+- Every replay has its own timeout. A hanging replay is killed and the others go on.
+- The output of every game process goes to its own log file.
+- The result of every replay (exit code, CRC mismatch frame, game time, wall time) is written to a
+  JSON report, which also serves as the timing history of the next run.
+
+The game reads replays relative to its replay folder, so the replays must be below --replay-dir.
+Each game process is started like the worker processes of the game's own -jobs option:
+  generalszh.exe -headless -replay <replay relative to the replay folder>
+
+On Linux, the script can be tried with the stub that stands in for the game:
+  python scripts/replay_check.py --exe "python3 scripts/replay_stub.py" --replay-dir /tmp/replays /tmp/replays
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+from replay_index import add_selection_arguments, has_selection, load_replay_index, select_replays
+
+DEFAULT_TIMEOUT = 10 * 60
+POLL_INTERVAL = 0.1
+
+RE_MISMATCH = re.compile(r'CRC Mismatch in Frame (\d+)')
+RE_ELAPSED = re.compile(r'Elapsed Time: (\d+):(\d+) Game Time: (\d+):(\d+)/(\d+):(\d+)')
+RE_CANNOT_OPEN = re.compile(r'^Cannot open replay')
+
+
+class ReplayJob(NamedTuple):
+    path: str               # Absolute path of the replay
+    name: str               # Path relative to the replay folder, as passed to the game
+    estimate: float         # Estimated seconds, for scheduling
+
+
+class ReplayResult(NamedTuple):
+    name: str
+    status: str             # "passed", "mismatch", "failed", "timeout" or "error"
+    exitCode: int | None
+    wallSeconds: float
+    mismatchFrame: int | None
+    gameSeconds: int | None
+    totalGameSeconds: int | None
+    log: str                # Path of the log file with the output of the game process
+    message: str
+
+
+def match_path(path: str) -> list[str]:
+    if glob.has_magic(path):
+        return glob.glob(path)
+    return [path] if os.path.exists(path) else []
+
+
+def find_replays(paths: list[str], replayDir: str | None = None) -> list[str]:
+    """
+    Returns the absolute paths of the replays given as files, folders or wildcards. Folders are searched recursively.
+    Relative paths are relative to replayDir, like the -replay argument of the game, or to the current folder
+    if nothing matches there.
+    """
+    found = []
+    for path in paths:
+        matches = []
+        if replayDir is not None and not os.path.isabs(path):
+            matches = match_path(os.path.join(replayDir, path))
+        if not matches:
+            matches = match_path(path)
+        for match in matches:
+            if os.path.isdir(match):
+                for subdir, _, files in os.walk(match):
+                    found.extend(os.path.join(subdir, f) for f in files if f.lower().endswith(".rep"))
+            elif os.path.isfile(match):
+                found.append(match)
+    return sorted({os.path.normpath(os.path.abspath(path)) for path in found})
+
+
+def load_history(path: str | None) -> dict[str, float]:
+    """
+    Returns the wall seconds of the replays of a previous report. Timed out replays count with their timeout.
+    """
+    if not path or not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding="utf-8") as file:
+        report = json.load(file)
+    return {r["name"]: r["wallSeconds"] for r in report.get("replays", []) if r.get("status") != "error"}
+
+
+def estimate_durations(paths: list[str], names: list[str], history: dict[str, float],
+                       lengths: dict[str, float] | None = None) -> list[float]:
+    """
+    Returns the estimated seconds of every replay. Measured times of the history come first. Otherwise the
+    replay length (given in lengths by path, for example game seconds from the replay header) or the file size
+    is scaled by the ratio of measured time to length over the replays that have both. Replays without a
+    length count as the longest one.
+    """
+    if lengths:
+        longest = max(lengths.values())
+        sizes = [lengths.get(path, longest) for path in paths]
+    else:
+        sizes = [float(os.path.getsize(path)) for path in paths]
+    known = [(history[name], size) for name, size in zip(names, sizes) if name in history and size > 0]
+    ratio = sum(seconds for seconds, _ in known) / sum(size for _, size in known) if known else 1.0
+    return [history[name] if name in history else size * ratio for name, size in zip(names, sizes)]
+
+
+def schedule(jobs: list[ReplayJob]) -> list[ReplayJob]:
+    """
+    Returns the jobs longest first, which keeps the slots busy until the end (LPT scheduling).
+    """
+    return sorted(jobs, key=lambda job: (-job.estimate, job.name))
+
+
+def parse_replay_output(logPath: str) -> tuple[int | None, int | None, int | None, bool]:
+    """
+    Returns the mismatch frame, the game seconds reached, the total game seconds and whether the game could
+    not open the replay, read line by line from the output of a game process.
+    """
+    mismatchFrame = gameSeconds = totalGameSeconds = None
+    cannotOpen = False
+    with open(logPath, 'r', encoding="utf-8", errors="replace") as file:
+        for line in file:
+            match = RE_MISMATCH.search(line)
+            if match is not None and mismatchFrame is None:
+                mismatchFrame = int(match.group(1))
+            match = RE_ELAPSED.search(line)
+            if match is not None:
+                values = [int(g) for g in match.groups()]
+                gameSeconds = values[2] * 60 + values[3]
+                totalGameSeconds = values[4] * 60 + values[5]
+            if RE_CANNOT_OPEN.match(line):
+                cannotOpen = True
+    return mismatchFrame, gameSeconds, totalGameSeconds, cannotOpen
+
+
+class RunningJob:
+    def __init__(self, job: ReplayJob, process: subprocess.Popen, logFile, logPath: str):
+        self.job = job
+        self.process = process
+        self.logFile = logFile
+        self.logPath = logPath
+        self.startTime = time.monotonic()
+
+
+def log_path_of(logDir: str, name: str) -> str:
+    return os.path.join(logDir, re.sub(r'[\\/:]', "_", name) + ".log")
+
+
+def clear_logs(logDir: str) -> None:
+    # Logs of earlier runs would otherwise be read by replay_log.py together with the ones of this run
+    os.makedirs(logDir, exist_ok=True)
+    for entry in os.listdir(logDir):
+        path = os.path.join(logDir, entry)
+        if entry.lower().endswith(".log") and os.path.isfile(path):
+            os.remove(path)
+
+
+def finish(running: RunningJob, timedOut: bool) -> ReplayResult:
+    running.logFile.close()
+    wallSeconds = round(time.monotonic() - running.startTime, 3)
+    exitCode = None if timedOut else running.process.returncode
+    mismatchFrame, gameSeconds, totalGameSeconds, cannotOpen = parse_replay_output(running.logPath)
+    if timedOut:
+        status, message = "timeout", f"killed after {wallSeconds:.0f} seconds"
+    elif mismatchFrame is not None:
+        status, message = "mismatch", f"CRC mismatch in frame {mismatchFrame}"
+    elif cannotOpen:
+        status, message = "failed", "cannot open replay"
+    elif exitCode != 0:
+        status, message = "failed", f"exit code {exitCode}"
+    else:
+        status, message = "passed", ""
+    return ReplayResult(running.job.name, status, exitCode, wallSeconds, mismatchFrame, gameSeconds, totalGameSeconds,
+                        running.logPath, message)
+
+
+def run_replays(jobs: list[ReplayJob], command: list[str], cwd: str | None, slots: int, timeout: float,
+                totalTimeout: float, logDir: str, progress=None) -> list[ReplayResult]:
+    """
+    Runs the jobs in the given order on up to slots game processes at a time and returns their results.
+    Jobs that did not start before totalTimeout have the status "error".
+    The .log files of earlier runs in logDir are removed first.
+    """
+    clear_logs(logDir)
+    pending = list(jobs)
+    running: list[RunningJob] = []
+    results: list[ReplayResult] = []
+    startTime = time.monotonic()
+
+    def report(result: ReplayResult) -> None:
+        results.append(result)
+        if progress is not None:
+            progress(result, len(results), len(jobs))
+
+    try:
+        while pending or running:
+            overTime = totalTimeout > 0 and time.monotonic() - startTime > totalTimeout
+            while pending and len(running) < slots and not overTime:
+                job = pending.pop(0)
+                logPath = log_path_of(logDir, job.name)
+                logFile = open(logPath, 'wb')
+                try:
+                    process = subprocess.Popen(command + ["-replay", job.name], cwd=cwd, stdout=logFile,
+                                               stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+                except OSError as e:
+                    logFile.close()
+                    report(ReplayResult(job.name, "error", None, 0.0, None, None, None, logPath, f"cannot start: {e}"))
+                    continue
+                running.append(RunningJob(job, process, logFile, logPath))
+
+            for job in running[:]:
+                timedOut = False
+                if job.process.poll() is None:
+                    if time.monotonic() - job.startTime <= timeout and not overTime:
+                        continue
+                    job.process.kill()
+                    job.process.wait()
+                    timedOut = True
+                running.remove(job)
+                report(finish(job, timedOut))
+
+            if overTime and pending:
+                for job in pending:
+                    report(ReplayResult(job.name, "error", None, 0.0, None, None, None, "", "not started, total timeout reached"))
+                pending = []
+            if running:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for job in running:
+            job.process.kill()
+            job.logFile.close()
+    return results
+
+
+def write_report(path: str, results: list[ReplayResult], command: list[str], slots: int, timeout: float,
+                 wallSeconds: float) -> None:
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    report = {
+        "command": command,
+        "jobs": slots,
+        "timeout": timeout,
+        "wallSeconds": round(wallSeconds, 3),
+        "summary": counts,
+        "replays": [result._asdict() for result in sorted(results, key=lambda r: r.name)],
+    }
+    with open(path, 'w', encoding="utf-8") as file:
+        json.dump(report, file, indent=1)
+
+
+def format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run replay compatibility checks with one headless game process per replay.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Check all replays of the user replay folder on 8 slots
+  python scripts/replay_check.py --exe build/generalszh.exe --jobs 8 --report replay_report.json
+
+  # Only replays on 4 player maps that last at least 30 minutes
+  python scripts/replay_check.py --exe build/generalszh.exe --players 4 --min-minutes 30
+
+  # Schedule with the times of the last run, and show the order without running anything
+  python scripts/replay_check.py --exe build/generalszh.exe --history replay_report.json --dry-run
+        """
+    )
+    parser.add_argument("replays", nargs="*",
+                        help="Replay files, folders or wildcards below the replay folder, relative to it like -replay of the game (default: the replay folder)")
+    parser.add_argument("--exe", required=True, help="Game executable, or a command line like \"python3 scripts/replay_stub.py\"")
+    parser.add_argument("--replay-dir",
+                        default=os.path.join(os.path.expanduser("~"), "Documents", "Command and Conquer Generals Zero Hour Data", "Replays"),
+                        help="Replay folder of the game, which replay names are relative to (default: the Zero Hour user folder)")
+    parser.add_argument("--cwd", help="Working folder of the game processes (default: the folder of the executable)")
+    parser.add_argument("--args", default="-headless", help="Arguments in front of -replay (default: -headless)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of game processes at a time (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Seconds after which a replay is killed (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--total-timeout", type=float, default=0, help="Seconds after which all replays are killed (default: none)")
+    parser.add_argument("--history", metavar="FILE", help="Report of a previous run, to schedule by its measured times")
+    parser.add_argument("--log-dir", default="replay_logs", help="Folder for the output of each game process. Its .log files of earlier runs are removed (default: replay_logs)")
+    parser.add_argument("--report", metavar="FILE", help="Write the results to FILE as JSON")
+    parser.add_argument("--index", metavar="FILE", help="Replay header index file (default: .replay_index.json next to replay_index.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the schedule without running the replays")
+    add_selection_arguments(parser)
+    args = parser.parse_args()
+
+    command = shlex.split(args.exe, posix=os.name != "nt")
+    if len(command) == 1 and not os.path.isfile(command[0]):
+        print(f"Error: executable not found: {command[0]}")
+        sys.exit(1)
+    # The game runs in the folder of the executable, where a relative path to it no longer resolves
+    if command and os.path.isfile(command[0]):
+        command[0] = os.path.abspath(command[0])
+    command += shlex.split(args.args, posix=os.name != "nt")
+    cwd = args.cwd or (os.path.dirname(command[0]) if command and os.path.isfile(command[0]) else None)
+
+    replayDir = os.path.normpath(os.path.abspath(args.replay_dir))
+    paths = find_replays(args.replays or [replayDir], replayDir)
+    outside = [path for path in paths if not path.startswith(replayDir + os.sep)]
+    if outside:
+        print(f"Error: {len(outside)} replay(s) are not below the replay folder {replayDir}, for example {outside[0]}")
+        sys.exit(1)
+    if not paths:
+        print("Error: no replays found")
+        sys.exit(1)
+
+    index = load_replay_index(replayDir, args.index, quiet=True)
+    headers = {os.path.normpath(os.path.join(replayDir, header.name)): header for header in index.headers()}
+    if has_selection(args):
+        selected = {os.path.normpath(os.path.join(replayDir, header.name)) for header in select_replays(list(headers.values()), args)}
+        paths = [path for path in paths if path in selected]
+        if not paths:
+            print("Error: no replays match the selection")
+            sys.exit(1)
+
+    names = [os.path.relpath(path, replayDir) for path in paths]
+    lengths = {path: headers[path].seconds for path in paths if path in headers}
+    estimates = estimate_durations(paths, names, load_history(args.history), lengths)
+    jobs = schedule([ReplayJob(path, name, estimate) for path, name, estimate in zip(paths, names, estimates)])
+
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job.estimate:>10.1f}  {job.name}")
+        print(f"{len(jobs)} replay(s) on {args.jobs} slot(s)")
+        return
+
+    def progress(result: ReplayResult, done: int, total: int) -> None:
+        message = f"  ({result.message})" if result.message else ""
+        print(f"[{done}/{total}] {result.status:<8} {result.wallSeconds:>8.1f}s  {result.name}{message}", flush=True)
+
+    print(f"Running {len(jobs)} replay(s) on {args.jobs} slot(s): {' '.join(command)} -replay <replay>", flush=True)
+    startTime = time.monotonic()
+    results = run_replays(jobs, command, cwd, max(1, args.jobs), args.timeout, args.total_timeout, args.log_dir, progress)
+    wallSeconds = time.monotonic() - startTime
+
+    failed = [result for result in results if result.status != "passed"]
+    print(f"Simulation of all replays completed. Errors occurred: {len(failed)}")
+    print(f"Total Wall Time: {format_seconds(wallSeconds)}")
+    for result in sorted(failed, key=lambda r: r.name):
+        print(f"  {result.status:<8} {result.name}: {result.message}  [{result.log}]")
+
+    if args.report:
+        write_report(args.report, results, command, args.jobs, args.timeout, wallSeconds)
+        print(f"Wrote {args.report}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# Copyright 2026 TheSuperHackers
+#
+# This file is part of Command & Conquer: Generals and Command & Conquer: Zero Hour.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Replay header index.
+
+This script reads the headers of replay files (.rep) without the game, as RecorderClass::readReplayHeader does:
+- Game version, build time, executable and INI CRCs.
+- Map, map size, seed and CRC interval from the GameInfo string.
+- Player slots: humans and computer players with their faction, team and start position.
+- Frame count and duration (30 logic frames per second), desync and quit early flags.
+
+The headers of a replay folder are kept in an index file that is only refreshed for replays that changed,
+so listing thousands of replays takes a fraction of a second once the index exists. The index file is kept
+next to this script, not in the replay folder, so that neither the game folder nor the worktree is written to.
+
+The index also checks that the map of every replay exists. User maps ("userdata/maps/<name>") must be in
+the maps folder as <name>/<name>.map, with the size that the replay expects. Maps of the game ("maps/<name>")
+live in the .big archives of the game and are not checked.
+
+Replays can be selected by player count, duration, map and version. replay_check.py uses the same selection
+and schedules by the duration from the header.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import struct
+import sys
+from typing import NamedTuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+default_index_path = os.path.join(current_dir, ".replay_index.json")
+
+INDEX_FORMAT_VERSION = 2
+LOGICFRAMES_PER_SECOND = 30
+MAX_SLOTS = 8
+HEADER_READ_SIZE = 8192
+GENREP = b"GENREP"
+
+# GENREP, start time, end time, frame count, desync, quit early, disconnect flag per slot
+FIXED_HEADER = struct.Struct(f"<6siiI??{MAX_SLOTS}?")
+SYSTEMTIME = struct.Struct("<8H")
+VERSION_NUMBERS = struct.Struct("<III")
+
+RE_LOCAL_SLOT = re.compile(r'\s*-?\d+')
+
+SLOT_KINDS = {"H": "human", "C": "computer", "O": "open", "X": "closed"}
+AI_DIFFICULTIES = {"E": "easy", "M": "medium", "H": "hard"}
+
+
+class ReplaySlot(NamedTuple):
+    index: int
+    kind: str               # "human", "computer", "open" or "closed"
+    name: str               # Player name, or the difficulty of a computer player
+    color: int              # -1 is random
+    faction: int            # Player template, -1 is random, -2 is observer
+    startPos: int           # -1 is random
+    team: int               # -1 is no team
+
+
+class ReplayHeader(NamedTuple):
+    name: str               # Path relative to the replay folder with '/' separators
+    version: str
+    buildTime: str
+    versionNumber: int
+    exeCRC: int
+    iniCRC: int
+    recorded: str           # Local date and time of the recording, "YYYY-MM-DD hh:mm:ss"
+    frameCount: int
+    desync: bool
+    quitEarly: bool
+    map: str                # Portable map path like "maps/tournament desert" or "userdata/maps/my map"
+    mapCRC: int
+    mapSize: int
+    seed: int
+    crcInterval: int
+    slots: list[ReplaySlot]
+    localSlot: int          # -1 if recorded by an observer or a replay
+
+    @property
+    def seconds(self) -> float:
+        return self.frameCount / LOGICFRAMES_PER_SECOND
+
+    @property
+    def players(self) -> list[ReplaySlot]:
+        return [slot for slot in self.slots if slot.kind in ("human", "computer") and slot.faction != -2]
+
+    @property
+    def mapName(self) -> str:
+        return self.map.rsplit("/", 1)[-1]
+
+    def to_json(self) -> dict:
+        data = self._asdict()
+        data["slots"] = [slot._asdict() for slot in self.slots]
+        return data
+
+    @staticmethod
+    def from_json(data: dict) -> "ReplayHeader":
+        return ReplayHeader(**{**data, "slots": [ReplaySlot(**slot) for slot in data["slots"]]})
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _read_string(data: bytes, pos: int, wide: bool) -> tuple[str, int]:
+    """
+    Returns a 0 terminated string and the position after it.
+    """
+    if wide:
+        end = pos
+        while True:
+            end = data.find(b"\0\0", end)
+            if end < 0:
+                raise ReplayError("unterminated string")
+            if (end - pos) % 2 == 0:
+                break
+            end += 1
+        return data[pos:end].decode("utf-16-le", errors="replace"), end + 2
+    end = data.find(b"\0", pos)
+    if end < 0:
+        raise ReplayError("unterminated string")
+    return data[pos:end].decode("cp1252", errors="replace"), end + 1
+
+
+def parse_slots(value: str) -> list[ReplaySlot]:
+    """
+    Returns the slots of the "S=" value of a GameInfo string, as written by GameInfoToAsciiString.
+    """
+    slots = []
+    for index, text in enumerate(value.split(":")[:MAX_SLOTS]):
+        if not text:
+            continue
+        kind = SLOT_KINDS.get(text[0])
+        if kind is None:
+            raise ReplayError(f"bad slot '{text}'")
+        fields = text[1:].split(",")
+        try:
+            if kind == "human" and len(fields) >= 9:
+                # Name, IP, port, accepted and has map, color, faction, start position, team, NAT behavior
+                slots.append(ReplaySlot(index, kind, fields[0], int(fields[4]), int(fields[5]), int(fields[6]), int(fields[7])))
+            elif kind == "computer" and len(fields) >= 5:
+                slots.append(ReplaySlot(index, kind, AI_DIFFICULTIES.get(fields[0], fields[0]), int(fields[1]), int(fields[2]),
+                                        int(fields[3]), int(fields[4])))
+            else:
+                slots.append(ReplaySlot(index, kind, "", -1, -1, -1, -1))
+        except ValueError:
+            raise ReplayError(f"bad slot '{text}'")
+    return slots
+
+
+def parse_game_info(text: str) -> dict:
+    """
+    Returns the options of a GameInfo string like "US=1;M=07maps/alpine assault;MC=1A2B;MS=12345;SD=42;C=100;S=...;".
+    """
+    options = {}
+    for part in text.split(";"):
+        key, sep, value = part.partition("=")
+        if sep:
+            options[key] = value
+    if "M" not in options or len(options["M"]) < 3 or "S" not in options:
+        raise ReplayError("GameInfo without map or slots")
+    return options
+
+
+def parse_header(data: bytes, name: str) -> ReplayHeader:
+    """
+    Returns the header of a replay, given the first bytes of the file.
+    """
+    if len(data) < FIXED_HEADER.size or not data.startswith(GENREP):
+        raise ReplayError("no GENREP at the start")
+    _, _, _, frameCount, desync, quitEarly, *_ = FIXED_HEADER.unpack_from(data)
+    pos = FIXED_HEADER.size
+    _, pos = _read_string(data, pos, wide=True)     # Replay name
+    if pos + SYSTEMTIME.size > len(data):
+        raise ReplayError("header is cut off")
+    year, month, _, day, hour, minute, second, _ = SYSTEMTIME.unpack_from(data, pos)
+    pos += SYSTEMTIME.size
+    version, pos = _read_string(data, pos, wide=True)
+    buildTime, pos = _read_string(data, pos, wide=True)
+    if pos + VERSION_NUMBERS.size > len(data):
+        raise ReplayError("header is cut off")
+    versionNumber, exeCRC, iniCRC = VERSION_NUMBERS.unpack_from(data, pos)
+    pos += VERSION_NUMBERS.size
+    gameInfo, pos = _read_string(data, pos, wide=False)
+    localSlot = data[pos:pos + 4].decode("ascii", errors="replace")
+    options = parse_game_info(gameInfo)
+
+    def number(key: str, base: int = 10) -> int:
+        try:
+            return int(options.get(key, "0"), base)
+        except ValueError:
+            raise ReplayError(f"bad {key} value '{options[key]}'")
+
+    # The local slot is read like atoi does, because the first frame of the replay data follows it directly
+    match = RE_LOCAL_SLOT.match(localSlot)
+    if match is None:
+        raise ReplayError(f"bad local slot '{localSlot}'")
+    return ReplayHeader(
+        name=name, version=version, buildTime=buildTime, versionNumber=versionNumber, exeCRC=exeCRC, iniCRC=iniCRC,
+        recorded=f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}",
+        frameCount=frameCount, desync=desync, quitEarly=quitEarly,
+        map=options["M"][2:], mapCRC=number("MC", 16), mapSize=number("MS"), seed=number("SD"),
+        crcInterval=number("C"), slots=parse_slots(options["S"]), localSlot=int(match.group(0)))
+
+
+def read_header(path: str, name: str | None = None) -> ReplayHeader:
+    with open(path, 'rb') as file:
+        data = file.read(HEADER_READ_SIZE)
+    return parse_header(data, name if name is not None else os.path.basename(path))
+
+
+def find_map_file(mapsDir: str, portableMap: str) -> str | None:
+    """
+    Returns the file of a user map in the maps folder, or None if it is not there. Map paths in replays are
+    lower case, so the folder and file are looked up without case.
+    """
+    leaf = portableMap.rsplit("/", 1)[-1]
+
+    def lookup(folder: str, entry: str) -> str | None:
+        candidate = os.path.join(folder, entry)
+        if os.path.exists(candidate):
+            return candidate
+        try:
+            return next((os.path.join(folder, e) for e in os.listdir(folder) if e.lower() == entry.lower()), None)
+        except OSError:
+            return None
+
+    folder = lookup(mapsDir, leaf)
+    return lookup(folder, leaf + ".map") if folder is not None else None
+
+
+class ReplayIndex:
+    """
+    Headers of all replays below a replay folder, kept in an index file. Replays are identified by their path
+    relative to the replay folder with '/' separators. One index file holds the headers of several replay folders.
+    """
+
+    def __init__(self, replayDir: str, path: str | None = None):
+        self.replayDir = os.path.normpath(os.path.abspath(replayDir))
+        self.path = path or default_index_path
+        self.files: dict[str, list] = {}        # name -> [mtime_ns, size, header or None, error]
+        self.dirty = False
+        self.parsedCount = 0
+        self._load()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("format") != INDEX_FORMAT_VERSION:
+            return {}
+        return data.get("roots", {})
+
+    def _load(self) -> None:
+        self.files = self._read().get(self.replayDir, {})
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        # Keep the headers of the other replay folders
+        roots = self._read()
+        roots[self.replayDir] = self.files
+        with open(self.path, 'w', encoding="utf-8", newline="\n") as file:
+            json.dump({"format": INDEX_FORMAT_VERSION, "roots": roots}, file, sort_keys=True)
+        self.dirty = False
+
+    def update(self) -> bool:
+        """
+        Brings the index up to date with the replays on disk. Returns True if any of them changed.
+        """
+        self.parsedCount = 0
+        found = {}
+        for subdir, _, files in os.walk(self.replayDir):
+            for fileName in files:
+                if fileName.lower().endswith(".rep"):
+                    path = os.path.join(subdir, fileName)
+                    found[os.path.relpath(path, self.replayDir).replace(os.sep, "/")] = path
+
+        changed = False
+        for name in [name for name in self.files if name not in found]:
+            del self.files[name]
+            changed = True
+        for name, path in found.items():
+            st = os.stat(path)
+            entry = self.files.get(name)
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                continue
+            try:
+                header, error = read_header(path, name).to_json(), ""
+            except (ReplayError, OSError) as e:
+                header, error = None, str(e)
+            self.files[name] = [st.st_mtime_ns, st.st_size, header, error]
+            self.parsedCount += 1
+            changed = True
+
+        if changed:
+            self.dirty = True
+        return changed
+
+    def headers(self) -> list[ReplayHeader]:
+        return [ReplayHeader.from_json(entry[2]) for _, entry in sorted(self.files.items()) if entry[2] is not None]
+
+    def errors(self) -> list[tuple[str, str]]:
+        return [(name, entry[3]) for name, entry in sorted(self.files.items()) if entry[2] is None]
+
+    def header(self, name: str) -> ReplayHeader | None:
+        entry = self.files.get(name)
+        return ReplayHeader.from_json(entry[2]) if entry is not None and entry[2] is not None else None
+
+
+def load_replay_index(replayDir: str, path: str | None = None, quiet: bool = False) -> ReplayIndex:
+    index = ReplayIndex(replayDir, path)
+    index.update()
+    index.save()
+    if not quiet and index.parsedCount:
+        print(f"Indexed {index.parsedCount} replay(s)", file=sys.stderr)
+    return index
+
+
+def check_map(header: ReplayHeader, mapsDir: str) -> str:
+    """
+    Returns a problem with the map of a replay, or "" if there is none.
+    """
+    if not header.map.startswith("userdata/maps/"):
+        return ""
+    mapFile = find_map_file(mapsDir, header.map)
+    if mapFile is None:
+        return f"map not found: {header.mapName}"
+    size = os.path.getsize(mapFile)
+    if header.mapSize and size != header.mapSize:
+        return f"map size is {size} bytes, the replay expects {header.mapSize}"
+    return ""
+
+
+def add_selection_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("replay selection")
+    group.add_argument("--players", type=int, action="append", help="Only replays with this number of players (repeatable)")
+    group.add_argument("--humans", type=int, action="append", help="Only replays with this number of human players (repeatable)")
+    group.add_argument("--min-minutes", type=float, help="Only replays at least this long")
+    group.add_argument("--max-minutes", type=float, help="Only replays at most this long")
+    group.add_argument("--map", action="append", metavar="PATTERN", help="Only replays on maps matching this wildcard, like \"*desert*\" or \"userdata/maps/*\" (repeatable)")
+    group.add_argument("--version", action="append", metavar="PATTERN", help="Only replays of versions matching this wildcard (repeatable)")
+
+
+def has_selection(args: argparse.Namespace) -> bool:
+    return any(getattr(args, name) is not None for name in ("players", "humans", "min_minutes", "max_minutes", "map", "version"))
+
+
+def select_replays(headers: list[ReplayHeader], args: argparse.Namespace) -> list[ReplayHeader]:
+    """
+    Returns the headers that match the selection arguments.
+    """
+    selected = []
+    for header in headers:
+        minutes = header.seconds / 60
+        if args.players and len(header.players) not in args.players:
+            continue
+        if args.humans and sum(1 for slot in header.players if slot.kind == "human") not in args.humans:
+            continue
+        if args.min_minutes is not None and minutes < args.min_minutes:
+            continue
+        if args.max_minutes is not None and minutes > args.max_minutes:
+            continue
+        # Patterns with a '/' match the whole map path, others only the map name
+        if args.map and not any(fnmatch.fnmatch(header.map if "/" in pattern else header.mapName, pattern.lower())
+                                for pattern in args.map):
+            continue
+        if args.version and not any(fnmatch.fnmatch(header.version, pattern) for pattern in args.version):
+            continue
+        selected.append(header)
+    return selected
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index the headers of replay files and select replays by them.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # List all replays with 4 players that last at least 20 minutes
+  python scripts/replay_index.py list GeneralsReplays/Replays --players 4 --min-minutes 20
+
+  # Check that the user maps of all replays exist
+  python scripts/replay_index.py check GeneralsReplays/Replays --maps GeneralsReplays/Maps
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("replay_dir", help="Replay folder, searched recursively")
+        subparser.add_argument("--index", metavar="FILE", help="Index file (default: .replay_index.json next to this script)")
+        add_selection_arguments(subparser)
+
+    listParser = subparsers.add_parser("list", help="List the selected replays")
+    add_common(listParser)
+    listParser.add_argument("--names", action="store_true", help="Only print the replay names, longest first")
+    listParser.add_argument("--json", metavar="FILE", help="Write the headers of the selected replays to FILE")
+
+    checkParser = subparsers.add_parser("check", help="Check that the replays can be read and their maps exist")
+    add_common(checkParser)
+    checkParser.add_argument("--maps", metavar="DIR", help="Folder of user maps (default: Maps next to the replay folder)")
+
+    statsParser = subparsers.add_parser("stats", help="Summarize the selected replays by version, map and player count")
+    add_common(statsParser)
+
+    args = parser.parse_args()
+
+    try:
+        index = load_replay_index(args.replay_dir, args.index)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    headers = select_replays(index.headers(), args)
+
+    if args.command == "list":
+        if args.names:
+            for header in sorted(headers, key=lambda h: (-h.frameCount, h.name)):
+                print(header.name)
+        else:
+            print(f"{'Duration':>8}  {'Players':>7}  {'Version':<20}  {'Map':<30}  Replay")
+            for header in headers:
+                players = f"{sum(1 for s in header.players if s.kind == 'human')}+{sum(1 for s in header.players if s.kind == 'computer')}"
+                print(f"{format_duration(header.seconds):>8}  {players:>7}  {header.version[:20]:<20}  {header.mapName[:30]:<30}  {header.name}")
+            print(f"{len(headers)} replay(s), {format_duration(sum(h.seconds for h in headers))} game time")
+        if args.json:
+            with open(args.json, 'w', encoding="utf-8") as file:
+                json.dump([header.to_json() for header in headers], file, indent=1)
+            print(f"Wrote {len(headers)} replay(s) to {args.json}")
+
+    elif args.command == "check":
+        mapsDir = args.maps or os.path.join(os.path.dirname(index.replayDir), "Maps")
+        problems = [(name, f"cannot read header: {error}") for name, error in index.errors()]
+        problems += [(header.name, problem) for header in headers if (problem := check_map(header, mapsDir))]
+        for name, problem in sorted(problems):
+            print(f"{name}: {problem}")
+        print(f"{len(headers)} replay(s) checked against {mapsDir}, {len(problems)} problem(s)")
+        if problems:
+            sys.exit(1)
+
+    elif args.command == "stats":
+        for title, key in (("Version", lambda h: h.version), ("Map", lambda h: h.mapName),
+                           ("Players", lambda h: str(len(h.players)))):
+            counts: dict[str, list[float]] = {}
+            for header in headers:
+                counts.setdefault(key(header), []).append(header.seconds)
+            print(f"{title:<30}  {'Replays':>7}  {'Game time':>9}")
+            for value, seconds in sorted(counts.items(), key=lambda item: (-len(item[1]), item[0])):
+                print(f"{value[:30]:<30}  {len(seconds):>7}  {format_duration(sum(seconds)):>9}")
+            print()
+
+
+if __name__ == '__main__':
+    main()
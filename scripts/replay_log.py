@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# Copyright 2026 TheSuperHackers
+#
+# This file is part of Command & Conquer: Generals and Command & Conquer: Zero Hour.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Replay check log parser.
+
+This script reads the console output of the headless replay check (replay_check.log) and reports per replay:
+- Status: passed, mismatch, failed (cannot open replay or exit code), incomplete (the log ends in it), or
+  unknown (a per replay log without a report that tells its exit code).
+- The frame of the CRC mismatch, and the in-game and replay CRCs if the debug log lines are in the output.
+- Elapsed time and game time.
+
+It understands the output of a single game process (-replay a.rep b.rep), of the worker processes of the
+-jobs option ("1/20 Simulating Replay ..."), and the per replay logs of replay_check.py (pass the log folder).
+The exit codes of the replays of replay_check.py are not in their logs, but in its report. The report is taken
+from --check-report, or from replay_report.json next to the log folder. A replay whose log looks clean counts
+as passed only if the report says so. Without a report it is unknown, because the game may have crashed.
+
+The log is read line by line and only the current replay and the replays that did not pass are kept in
+memory, so logs of any size can be read.
+
+The results can be written as JUnit XML for CI test reports, and as a JSON summary with the replays that did
+not pass. Given the JSON summary of an earlier run (or a replay_check.py report) with --baseline, mismatches
+are split into new ones and known ones, and replays that passed again are listed as fixed.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from typing import Iterable, Iterator, NamedTuple
+from xml.sax.saxutils import escape, quoteattr
+
+SLOWEST_COUNT = 10
+
+RE_SIMULATING = re.compile(r'^(?:(\d+)/(\d+) )?Simulating Replay "(.*)"\s*$')
+RE_ELAPSED = re.compile(r'^Elapsed Time: (\d+):(\d+) Game Time: (\d+):(\d+)/(\d+):(\d+)')
+RE_MISMATCH = re.compile(r'^CRC Mismatch in Frame (\d+)')
+RE_CRC_VALUES = re.compile(r'InGame:([0-9A-Fa-f]{8}) Replay:([0-9A-Fa-f]{8})')
+RE_CANNOT_OPEN = re.compile(r'^Cannot open replay')
+RE_ERROR = re.compile(r'^Error!\s*$')
+RE_COMPLETED = re.compile(r'^Simulation of all replays completed\. Errors occurred: (\d+)')
+RE_TOTAL_TIME = re.compile(r'^Total (?:Wall )?Time: (\d+):(\d+):(\d+)')
+
+CHECK_REPORT_NAME = "replay_report.json"
+
+
+class ReplayRecord(NamedTuple):
+    name: str
+    status: str                 # "passed", "mismatch", "failed", "incomplete" or "unknown"
+    mismatchFrame: int | None
+    inGameCRC: str | None       # 8 hex digits, from the debug log output
+    replayCRC: str | None
+    elapsedSeconds: int | None
+    gameSeconds: int | None
+    totalGameSeconds: int | None
+    message: str
+
+
+class LogTotals:
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.reportedErrors: int | None = None     # From "Errors occurred: N"
+        self.totalSeconds: int | None = None       # From "Total Time" or "Total Wall Time"
+        self.elapsedSeconds = 0
+        self.gameSeconds = 0
+        self.slowest: list[tuple[int, str]] = []   # Heap of the slowest replays
+
+    def add(self, record: ReplayRecord) -> None:
+        self.counts[record.status] = self.counts.get(record.status, 0) + 1
+        self.elapsedSeconds += record.elapsedSeconds or 0
+        self.gameSeconds += record.gameSeconds or 0
+        if record.elapsedSeconds is not None:
+            if len(self.slowest) < SLOWEST_COUNT:
+                heapq.heappush(self.slowest, (record.elapsedSeconds, record.name))
+            elif record.elapsedSeconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (record.elapsedSeconds, record.name))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def failed(self) -> int:
+        return self.total - self.counts.get("passed", 0)
+
+
+class _Current:
+    def __init__(self, name: str):
+        self.name = name
+        self.mismatchFrame = None
+        self.inGameCRC = None
+        self.replayCRC = None
+        self.elapsedLine = ""
+        self.cannotOpen = False
+        self.error = False
+
+    @property
+    def elapsed(self) -> tuple[int, int, int] | None:
+        """
+        Returns the elapsed seconds, game seconds and total game seconds of the last progress line.
+        """
+        match = RE_ELAPSED.match(self.elapsedLine)
+        if match is None:
+            return None
+        values = [int(g) for g in match.groups()]
+        return values[0] * 60 + values[1], values[2] * 60 + values[3], values[4] * 60 + values[5]
+
+    def record(self, complete: bool) -> ReplayRecord:
+        elapsedSeconds = gameSeconds = totalGameSeconds = None
+        elapsed = self.elapsed
+        if elapsed is not None:
+            elapsedSeconds, gameSeconds, totalGameSeconds = elapsed
+        if self.mismatchFrame is not None:
+            status, message = "mismatch", f"CRC mismatch in frame {self.mismatchFrame}"
+        elif self.cannotOpen:
+            status, message = "failed", "cannot open replay"
+        elif self.error:
+            status, message = "failed", "game process failed"
+        elif not complete or elapsed is None:
+            status, message = "incomplete", "log ends in this replay"
+        else:
+            status, message = "passed", ""
+        return ReplayRecord(self.name, status, self.mismatchFrame, self.inGameCRC, self.replayCRC,
+                            elapsedSeconds, gameSeconds, totalGameSeconds, message)
+
+
+def parse_log(lines: Iterable[str], totals: LogTotals | None = None) -> Iterator[ReplayRecord]:
+    """
+    Yields the record of every replay in the output of the replay check. Totals printed at the end of the
+    output go into totals.
+    """
+    current: _Current | None = None
+    for line in lines:
+        # Cheap tests first; most lines are progress lines
+        if line.startswith("Elapsed Time:"):
+            # Only the last progress line of a replay counts, so it is parsed when the replay ends
+            if current is not None:
+                current.elapsedLine = line
+            continue
+        if "Simulating Replay" in line:
+            match = RE_SIMULATING.match(line.rstrip("\r\n"))
+            if match is not None:
+                if current is not None:
+                    # In worker output a replay ends with its last line or "Error!"; in single process output with the next one
+                    yield current.record(complete=bool(current.elapsedLine) or current.cannotOpen)
+                current = _Current(match.group(3))
+            continue
+        if line.startswith("Simulation of all") or line.startswith("Total "):
+            match = RE_COMPLETED.match(line)
+            if match is not None:
+                if current is not None:
+                    yield current.record(complete=True)
+                    current = None
+                if totals is not None:
+                    totals.reportedErrors = int(match.group(1))
+            match = RE_TOTAL_TIME.match(line)
+            if match is not None and totals is not None:
+                totals.totalSeconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+            continue
+        if current is None:
+            continue
+        if line.startswith("CRC Mismatch"):
+            match = RE_MISMATCH.match(line)
+            if match is not None and current.mismatchFrame is None:
+                current.mismatchFrame = int(match.group(1))
+        elif "InGame:" in line:
+            match = RE_CRC_VALUES.search(line)
+            if match is not None and current.inGameCRC is None:
+                current.inGameCRC, current.replayCRC = match.group(1).upper(), match.group(2).upper()
+        elif RE_CANNOT_OPEN.match(line):
+            current.cannotOpen = True
+        elif RE_ERROR.match(line):
+            current.error = True
+    if current is not None:
+        # Without a closing line the replay is complete only if its game time reached the end
+        elapsed = current.elapsed
+        yield current.record(complete=elapsed is not None and elapsed[1] >= elapsed[2])
+
+
+def read_lines(paths: list[str]) -> Iterator[str]:
+    """
+    Yields the lines of the given log files, or of the .log files in the given folders, one after another.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".log"))
+        else:
+            files = [path]
+        for fileName in files:
+            with open(fileName, 'r', encoding="utf-8", errors="replace", newline="") as file:
+                yield from file
+
+
+def find_check_report(logDir: str) -> str | None:
+    """
+    Returns the replay_check.py report next to a log folder, if it lists logs of that folder.
+    """
+    logDir = os.path.normpath(os.path.abspath(logDir))
+    path = os.path.join(os.path.dirname(logDir), CHECK_REPORT_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding="utf-8") as file:
+        data = json.load(file)
+    folderName = os.path.basename(logDir)
+    logs = (r.get("log") or "" for r in data.get("replays", []))
+    if not any(os.path.basename(os.path.dirname(log.replace("\\", "/"))) == folderName for log in logs):
+        return None
+    return path
+
+
+def load_check_report(path: str) -> dict[str, dict]:
+    """
+    Returns the results of a replay_check.py report by replay name.
+    """
+    with open(path, 'r', encoding="utf-8") as file:
+        data = json.load(file)
+    return {r["name"]: r for r in data.get("replays", [])}
+
+
+def apply_check_result(record: ReplayRecord, result: dict | None) -> ReplayRecord:
+    """
+    Completes the record of a per replay log of replay_check.py with the result of its game process.
+    """
+    if result is None:
+        if record.status == "passed":
+            return record._replace(status="unknown", message="exit code unknown, no replay_check.py report lists this replay")
+        return record
+    status = result.get("status")
+    if status == "passed" or record.status == "mismatch":
+        return record
+    if status == "timeout":
+        return record._replace(status="incomplete", message=result.get("message") or "timeout")
+    if record.status in ("passed", "incomplete"):
+        return record._replace(status="failed", message=result.get("message") or f"exit code {result.get('exitCode')}")
+    return record
+
+
+def parse_logs(paths: list[str], checkReportPath: str | None, totals: LogTotals) -> Iterator[ReplayRecord]:
+    """
+    Yields the records of the given log files and log folders. The records of log folders are completed with the
+    results of the replay_check.py report.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield from parse_log(read_lines([path]), totals)
+            continue
+        reportPath = checkReportPath or find_check_report(path)
+        results = load_check_report(reportPath) if reportPath else {}
+        for record in parse_log(read_lines([path]), totals):
+            yield apply_check_result(record, results.get(record.name))
+
+
+def load_baseline(path: str) -> dict[str, dict]:
+    """
+    Returns the replays that did not pass in an earlier run, from a JSON summary of this script or a
+    replay_check.py report.
+    """
+    with open(path, 'r', encoding="utf-8") as file:
+        data = json.load(file)
+    return {r["name"]: r for r in data.get("replays", []) if r.get("status") != "passed"}
+
+
+class JUnitWriter:
+    """
+    Writes JUnit XML without keeping the test cases in memory. The cases go to a temporary file first, because
+    the counts in the testsuite element are only known at the end.
+    """
+
+    def __init__(self, path: str, suiteName: str):
+        self.path = path
+        self.suiteName = suiteName
+        self.cases = tempfile.TemporaryFile('w+', encoding="utf-8")
+
+    def add(self, record: ReplayRecord) -> None:
+        folder, _, fileName = record.name.replace("\\", "/").rpartition("/")
+        className = f"{self.suiteName}.{folder.replace('/', '.')}" if folder else self.suiteName
+        time = record.elapsedSeconds or 0
+        self.cases.write(f'  <testcase classname={quoteattr(className)} name={quoteattr(fileName)} time="{time}"')
+        if record.status == "passed":
+            self.cases.write("/>\n")
+            return
+        details = [record.message]
+        if record.inGameCRC is not None:
+            details.append(f"InGame:{record.inGameCRC} Replay:{record.replayCRC}")
+        if record.gameSeconds is not None:
+            details.append(f"Game time {record.gameSeconds // 60:02d}:{record.gameSeconds % 60:02d}"
+                           f"/{record.totalGameSeconds // 60:02d}:{record.totalGameSeconds % 60:02d}")
+        element = "error" if record.status in ("incomplete", "unknown") else "failure"
+        self.cases.write(f'>\n    <{element} type={quoteattr(record.status)} message={quoteattr(record.message)}>'
+                         f'{escape(chr(10).join(details))}</{element}>\n  </testcase>\n')
+
+    def close(self, totals: LogTotals) -> None:
+        failures = totals.counts.get("mismatch", 0) + totals.counts.get("failed", 0)
+        errors = totals.counts.get("incomplete", 0) + totals.counts.get("unknown", 0)
+        with open(self.path, 'w', encoding="utf-8", newline="\n") as file:
+            file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            file.write(f'<testsuite name={quoteattr(self.suiteName)} tests="{totals.total}" failures="{failures}" '
+                       f'errors="{errors}" time="{totals.totalSeconds or totals.elapsedSeconds}">\n')
+            self.cases.seek(0)
+            shutil.copyfileobj(self.cases, file)
+            file.write("</testsuite>\n")
+        self.cases.close()
+
+
+def compare(record: ReplayRecord, baseline: dict[str, dict]) -> str:
+    """
+    Returns how a replay that did not pass relates to the baseline: "new", "known" or "changed" (it failed
+    before, but differently).
+    """
+    known = baseline.get(record.name)
+    if known is None:
+        return "new"
+    # A replay that replay_check.py killed shows as incomplete in its log
+    knownStatus = "incomplete" if known.get("status") == "timeout" else known.get("status")
+    if knownStatus != record.status or known.get("mismatchFrame") != record.mismatchFrame:
+        return "changed"
+    return "known"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse the output of the replay check into per replay results.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Summarize a replay check log
+  python scripts/replay_log.py replay_check.log
+
+  # JUnit XML and a JSON summary, and which mismatches are new compared to the last run
+  python scripts/replay_log.py replay_check.log --junit replays.xml --json summary.json --baseline last_summary.json
+
+  # Per replay logs of replay_check.py, with the exit codes from its report
+  python scripts/replay_log.py replay_logs --check-report replay_report.json --junit replays.xml
+        """
+    )
+    parser.add_argument("logs", nargs="+", help="Log files, or folders of per replay logs of replay_check.py")
+    parser.add_argument("--junit", metavar="FILE", help="Write the results as JUnit XML to FILE")
+    parser.add_argument("--suite", default="replays", help="Test suite name in the JUnit XML (default: replays)")
+    parser.add_argument("--json", metavar="FILE", help="Write a summary with the replays that did not pass to FILE")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="JSON summary of an earlier run, or replay_check.py report; only new failures fail the run")
+    parser.add_argument("--check-report", metavar="FILE",
+                        help=f"replay_check.py report with the exit codes of the per replay logs (default: {CHECK_REPORT_NAME} next to the log folder)")
+    args = parser.parse_args()
+
+    try:
+        baseline = load_baseline(args.baseline) if args.baseline else None
+        totals = LogTotals()
+        junit = JUnitWriter(args.junit, args.suite) if args.junit else None
+        notPassed: list[dict] = []
+        fixed: list[str] = []
+        for record in parse_logs(args.logs, args.check_report, totals):
+            totals.add(record)
+            if junit is not None:
+                junit.add(record)
+            if record.status == "passed":
+                if baseline is not None and record.name in baseline:
+                    fixed.append(record.name)
+                continue
+            entry = record._asdict()
+            if baseline is not None:
+                entry["baseline"] = compare(record, baseline)
+            notPassed.append(entry)
+            crcs = f"  InGame:{record.inGameCRC} Replay:{record.replayCRC}" if record.inGameCRC is not None else ""
+            known = f" [{entry['baseline']}]" if baseline is not None else ""
+            print(f"{record.status:<10} {record.name}: {record.message}{crcs}{known}")
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{totals.total} replay(s): " + ", ".join(f"{count} {status}" for status, count in sorted(totals.counts.items())))
+    print(f"Game time {totals.gameSeconds // 3600}:{totals.gameSeconds // 60 % 60:02d}:{totals.gameSeconds % 60:02d}, "
+          f"elapsed time {totals.elapsedSeconds // 3600}:{totals.elapsedSeconds // 60 % 60:02d}:{totals.elapsedSeconds % 60:02d}")
+    if totals.reportedErrors is not None and totals.reportedErrors != totals.failed:
+        print(f"Warning: the log reports {totals.reportedErrors} error(s), but {totals.failed} replay(s) did not pass")
+    if baseline is not None:
+        newCount = sum(1 for e in notPassed if e["baseline"] != "known")
+        print(f"Compared to {args.baseline}: {newCount} new or changed, "
+              f"{len(notPassed) - newCount} known, {len(fixed)} fixed")
+        for name in sorted(fixed):
+            print(f"fixed      {name}")
+
+    if junit is not None:
+        junit.close(totals)
+        print(f"Wrote {args.junit}")
+    if args.json:
+        summary = {
+            "total": totals.total,
+            "summary": totals.counts,
+            "reportedErrors": totals.reportedErrors,
+            "totalSeconds": totals.totalSeconds,
+            "elapsedSeconds": totals.elapsedSeconds,
+            "gameSeconds": totals.gameSeconds,
+            "slowest": [{"name": name, "elapsedSeconds": seconds} for seconds, name in sorted(totals.slowest, reverse=True)],
+            "replays": notPassed,
+        }
+        if baseline is not None:
+            summary["fixed"] = sorted(fixed)
+        with open(args.json, 'w', encoding="utf-8") as file:
+            json.dump(summary, file, indent=1)
+        print(f"Wrote {args.json}")
+
+    if baseline is not None:
+        sys.exit(1 if any(e["baseline"] != "known" for e in notPassed) else 0)
+    sys.exit(1 if totals.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
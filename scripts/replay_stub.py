@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Copyright 2026 TheSuperHackers
+#
+# This file is part of Command & Conquer: Generals and Command & Conquer: Zero Hour.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Stand-in for the game executable, to try replay_check.py without the game.
+
+It accepts the arguments of the game (-headless -replay <replay>) and prints what the game prints while it
+simulates a replay. A replay file that starts with the word "STUB" tells the stub what to do, for example:
+  STUB seconds=3 mismatch=1200 exit=1
+  STUB hang
+Keys: seconds (wall time, default 1), game (game seconds, default 60), mismatch (frame of a CRC mismatch),
+exit (exit code), hang (never ends). Other replay files take 1 second per 10 minutes of game time in
+their header, or 1 second per 100 KB if the header cannot be read.
+
+Usage:
+  python scripts/replay_stub.py --replay-dir /tmp/replays -headless -replay test.rep
+"""
+
+import os
+import sys
+import time
+
+from replay_index import ReplayError, read_header
+
+
+def read_directives(path: str) -> dict[str, str]:
+    with open(path, 'rb') as file:
+        head = file.read(256)
+    if not head.startswith(b"STUB"):
+        try:
+            gameSeconds = read_header(path).seconds
+            return {"seconds": str(gameSeconds / 600), "game": str(int(gameSeconds))}
+        except ReplayError:
+            return {"seconds": str(os.path.getsize(path) / 100000)}
+    directives = {}
+    for word in head.split(b"\n")[0].decode("ascii", errors="replace").split()[1:]:
+        key, _, value = word.partition("=")
+        directives[key] = value
+    return directives
+
+
+def main():
+    # Game style arguments like -headless do not suit argparse, so look up the two that matter
+    arguments = sys.argv[1:]
+    replayDir = arguments[arguments.index("--replay-dir") + 1] if "--replay-dir" in arguments[:-1] else "."
+    if "-replay" not in arguments[:-1]:
+        print("Usage: replay_stub.py [--replay-dir DIR] [game arguments] -replay REPLAY")
+        sys.exit(2)
+    replay = arguments[arguments.index("-replay") + 1]
+
+    path = os.path.join(replayDir, replay)
+    if not os.path.isfile(path):
+        print(f"Cannot open replay {replay}", flush=True)
+        sys.exit(1)
+    directives = read_directives(path)
+
+    print(f"Simulating Replay \"{replay}\"", flush=True)
+    seconds = float(directives.get("seconds") or 1)
+    gameSeconds = int(directives.get("game") or 60)
+    while "hang" in directives:
+        time.sleep(1)
+    time.sleep(seconds)
+    if "mismatch" in directives:
+        print(f"CRC Mismatch in Frame {directives['mismatch']}", flush=True)
+    print(f"Elapsed Time: {int(seconds) // 60:02d}:{int(seconds) % 60:02d} "
+          f"Game Time: {gameSeconds // 60:02d}:{gameSeconds % 60:02d}/{gameSeconds // 60:02d}:{gameSeconds % 60:02d}", flush=True)
+    sys.exit(int(directives.get("exit") or 0))
+
+
+if __name__ == '__main__':
+    main()